@@ -0,0 +1,303 @@
+"""benchmark runner for the solvers and factorizations in core.
+
+sweeps problem sizes, dtypes and matrix structures, records wall time,
+peak memory and achieved GFLOP/s to JSON, and optionally compares the run
+against a stored baseline to flag regressions.
+
+example:
+    python -m benchmarks.run --sizes 64 128 256 --output bench.json
+    python -m benchmarks.run --baseline bench.json --threshold 0.2
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from core.factorization.qr import (
+    classical_gram_schmidt,
+    house_qr,
+    modified_gram_schmidt,
+)
+from core.optimization.parabolic import parabolic
+from core.root.newton import newton
+from core.solver.bairstow_solver import BairstowSolver
+from core.solver.gauss_seidel_solver import GuassSeidelSolver
+from core.solver.gaussian_elimination_solver import GaussianEliminationSolver
+from core.solver.lu_decomposition_solver import LUDecompositionSolver, matrix_inv_lu
+
+STRUCTURES = ("random", "diagonally_dominant", "spd", "ill_conditioned")
+
+
+def make_matrix(n: int, structure: str, dtype, rng) -> np.ndarray:
+    """returns an n x n test matrix with the given structure"""
+    if structure == "random":
+        A = rng.standard_normal((n, n))
+    elif structure == "diagonally_dominant":
+        A = rng.uniform(-1, 1, (n, n))
+        A[np.diag_indices(n)] = np.abs(A).sum(axis=1) + 1
+    elif structure == "spd":
+        M = rng.standard_normal((n, n))
+        A = M @ M.T + n * np.identity(n)
+    elif structure == "ill_conditioned":
+        # singular values spread over 10 orders of magnitude
+        U, _ = np.linalg.qr(rng.standard_normal((n, n)))
+        V, _ = np.linalg.qr(rng.standard_normal((n, n)))
+        A = (U * np.logspace(0, -10, n)) @ V.T
+    else:
+        raise ValueError(f"Unknown structure {structure}")
+    return A.astype(dtype)
+
+
+class Benchmark:
+    """a benchmarked routine. setup(A, b, n) returns a zero argument callable
+    that performs the measured work. flops(n) estimates the floating point
+    operations of one call, or returns None when it depends on convergence.
+    routines that don't take a matrix solve n independent problems per call,
+    with structure and dtype recorded as "n/a".
+    """
+
+    def __init__(
+        self,
+        name: str,
+        setup: Callable,
+        flops: Callable = lambda n: None,
+        structures: Iterable[str] = STRUCTURES,
+        matrix: bool = True,
+    ) -> None:
+        self.name = name
+        self.setup = setup
+        self.flops = flops
+        self.structures = tuple(structures)
+        self.matrix = matrix
+
+
+def _solver_setup(solver_class, **set_kwargs):
+    def setup(A, b, n):
+        solver = solver_class(verbose=False)
+        extended = np.column_stack([A, b])
+
+        def run():
+            solver.set(extended, **set_kwargs)
+            return solver.solve()
+
+        return run
+
+    return setup
+
+
+def _bairstow_setup(A, b, n):
+    # n polynomials of degree 6 with known real roots, so the iteration converges
+    polynomials = [
+        list(np.polynomial.polynomial.polyfromroots(np.arange(1, 7) + k / n))
+        for k in range(n)
+    ]
+    solver = BairstowSolver(1e-8, 1e-8)
+
+    def run():
+        return [solver.solve(coef, 0.5, -0.5) for coef in polynomials]
+
+    return run
+
+
+def _newton_setup(A, b, n):
+    starts = np.linspace(0.5, 4, n)
+
+    def run():
+        return [newton(lambda x: x**3 - 2, lambda x: 3 * x**2, x0) for x0 in starts]
+
+    return run
+
+
+def _parabolic_setup(A, b, n):
+    def run():
+        return [
+            parabolic(lambda x: 2 * math.sin(x) - x**2 / 10 + k / n, 0, 1, 4)
+            for k in range(n)
+        ]
+
+    return run
+
+
+BENCHMARKS = [
+    Benchmark(
+        "GaussianEliminationSolver",
+        _solver_setup(GaussianEliminationSolver),
+        lambda n: 2 / 3 * n**3,
+    ),
+    Benchmark(
+        "LUDecompositionSolver",
+        _solver_setup(LUDecompositionSolver),
+        lambda n: 2 / 3 * n**3 + 2 * n**2,
+    ),
+    Benchmark(
+        "GuassSeidelSolver",
+        _solver_setup(GuassSeidelSolver, tolerance=1e-6),
+        structures=("diagonally_dominant",),
+    ),
+    Benchmark(
+        "matrix_inv_lu",
+        lambda A, b, n: lambda: matrix_inv_lu(A, verbose=False),
+        lambda n: 8 / 3 * n**3,
+    ),
+    Benchmark(
+        "classical_gram_schmidt",
+        lambda A, b, n: lambda: classical_gram_schmidt(A),
+        lambda n: 2 * n**3,
+    ),
+    Benchmark(
+        "modified_gram_schmidt",
+        lambda A, b, n: lambda: modified_gram_schmidt(A),
+        lambda n: 2 * n**3,
+    ),
+    Benchmark(
+        "house_qr",
+        lambda A, b, n: lambda: house_qr(A),
+        lambda n: 8 / 3 * n**3,
+    ),
+    Benchmark("BairstowSolver", _bairstow_setup, matrix=False),
+    Benchmark("newton", _newton_setup, matrix=False),
+    Benchmark("parabolic", _parabolic_setup, matrix=False),
+]
+
+
+def measure(run: Callable, repeat: int) -> Dict[str, float]:
+    """best wall time over repeat calls, then peak traced memory of one call.
+    memory is traced in a separate call since tracing slows down the run
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"time": min(times), "peak_memory": peak}
+
+
+def run_benchmarks(
+    sizes: Iterable[int],
+    dtypes: Iterable[str] = ("float64",),
+    structures: Iterable[str] = STRUCTURES,
+    names: Optional[Iterable[str]] = None,
+    repeat: int = 3,
+    seed: int = 0,
+) -> List[dict]:
+    """run the selected benchmarks over every size, dtype and structure"""
+    results = []
+    for benchmark in BENCHMARKS:
+        if names is not None and benchmark.name not in names:
+            continue
+        for n in sizes:
+            if not benchmark.matrix:
+                cases = [("n/a", "n/a")]
+            else:
+                cases = [
+                    (structure, dtype)
+                    for dtype in dtypes
+                    for structure in structures
+                    if structure in benchmark.structures
+                ]
+            for structure, dtype in cases:
+                rng = np.random.default_rng(seed)
+                A = b = None
+                if benchmark.matrix:
+                    A = make_matrix(n, structure, dtype, rng)
+                    b = rng.standard_normal(n).astype(dtype)
+                result = measure(benchmark.setup(A, b, n), repeat)
+                flops = benchmark.flops(n)
+                result["gflops"] = (
+                    None if flops is None else flops / result["time"] / 1e9
+                )
+                result.update(
+                    name=benchmark.name, n=n, dtype=dtype, structure=structure
+                )
+                results.append(result)
+                print(
+                    f"{benchmark.name:<28}n={n:<6}{dtype:<9}{structure:<21}"
+                    f"time={result['time']:.6f}s  peak={result['peak_memory'] / 1e6:.2f}MB"
+                    + ("" if flops is None else f"  {result['gflops']:.3f} GFLOP/s")
+                )
+    return results
+
+
+def _key(result: dict):
+    return result["name"], result["n"], result["dtype"], result["structure"]
+
+
+def compare(
+    results: List[dict], baseline: List[dict], threshold: float = 0.2
+) -> List[dict]:
+    """returns the results whose wall time exceeds the matching baseline
+    time by more than the threshold fraction
+    """
+    reference = {_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        base = reference.get(_key(result))
+        if base is None:
+            continue
+        ratio = result["time"] / base["time"]
+        if ratio > 1 + threshold:
+            regressions.append(dict(result, baseline_time=base["time"], ratio=ratio))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--dtypes", nargs="+", default=["float64"])
+    parser.add_argument("--structures", nargs="+", default=list(STRUCTURES))
+    parser.add_argument("--only", nargs="+", help="names of the benchmarks to run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="flag a regression when slower than the baseline by this fraction",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.sizes, args.dtypes, args.structures, args.only, args.repeat, args.seed
+    )
+    if args.output:
+        meta = {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for r in regressions:
+            print(
+                f"REGRESSION {r['name']} n={r['n']} {r['dtype']} {r['structure']}: "
+                f"{r['time']:.6f}s vs {r['baseline_time']:.6f}s ({r['ratio']:.2f}x)"
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+from typing import Iterable
+
+import numpy as np
+
+# Input layer shared by the solvers and factorizations.
+#
+# matrices are computed in float32, float64, complex64 or complex128,
+# whichever matches their input. arrays that are only read are used
+# without copying when their dtype allows, arrays that are modified are
+# copied unless the caller allows them to be overwritten.
+
+
+def working_dtype(*arrays) -> np.dtype:
+    """floating point type to compute with arrays in: float32, float64,
+    complex64 or complex128. inputs keep their precision, mixed inputs are
+    promoted, and integers and booleans are computed in float64
+    """
+    dtype = np.result_type(
+        *(a.dtype if hasattr(a, "dtype") else np.asarray(a).dtype for a in arrays)
+    )
+    if dtype.kind == "c":
+        return np.dtype(np.complex64 if dtype.itemsize <= 8 else np.complex128)
+    if dtype.kind == "f" and dtype.itemsize <= 4:
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def solve_dtype(factor_dtype, B) -> np.dtype:
+    """dtype of solutions computed from factors of factor_dtype against B:
+    the precision of the factors, complex when the factors or B are
+    """
+    dtype = np.dtype(factor_dtype)
+    if dtype.kind != "c" and np.iscomplexobj(B):
+        return np.result_type(dtype, np.complex64)
+    return dtype
+
+
+def as_array(A: Iterable, dtype=None) -> np.ndarray:
+    """A as an ndarray of dtype, working_dtype(A) by default, without
+    copying when A is an ndarray or exposes the buffer protocol with that
+    dtype already. the result may share memory with A, so it must only be read
+    """
+    A = np.asarray(A)
+    dtype = working_dtype(A) if dtype is None else np.dtype(dtype)
+    return A.astype(dtype, copy=False)
+
+
+def writable_array(A: Iterable, dtype=None, overwrite_a=False) -> np.ndarray:
+    """A as an ndarray of dtype, working_dtype(A) by default, that can be
+    modified. when overwrite_a is True and A is a writable ndarray or buffer
+    of that dtype, A itself is returned and will be modified in place.
+    otherwise the result is a new array, and a sequence such as a nested
+    list is converted only once
+    """
+    array = np.asarray(A)
+    dtype = working_dtype(array) if dtype is None else np.dtype(dtype)
+    if array.dtype != dtype:
+        return array.astype(dtype)
+    if isinstance(A, (list, tuple)) or (overwrite_a and array.flags.writeable):
+        return array
+    return array.copy()
@@ -0,0 +1,41 @@
+import asyncio
+import inspect
+from concurrent.futures import Executor
+from typing import Iterable, List, Tuple
+
+
+def evaluate(
+    calls: Iterable[Tuple[callable, object]], executor: Executor = None
+) -> List:
+    """evaluate f(x) for every (f, x) in calls and return the results in order.
+    the calls are independent, so they are dispatched concurrently:
+        - on executor, any concurrent.futures.Executor, when it's given
+        - with asyncio when any f is an async function. the other functions
+          run on executor, or on the default thread pool of the event loop
+    otherwise the calls are evaluated one after another.
+    async functions can't be evaluated from inside a running event loop.
+    example:
+        with ThreadPoolExecutor() as executor:
+            fx, gx = evaluate([(f, x), (g, x)], executor)
+    """
+    calls = list(calls)
+    if any(inspect.iscoroutinefunction(f) for f, _ in calls):
+        return asyncio.run(_gather(calls, executor))
+    if executor is None or len(calls) < 2:
+        return [f(x) for f, x in calls]
+    futures = [executor.submit(f, x) for f, x in calls]
+    return [future.result() for future in futures]
+
+
+async def _gather(calls, executor):
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(
+        *[
+            (
+                f(x)
+                if inspect.iscoroutinefunction(f)
+                else loop.run_in_executor(executor, f, x)
+            )
+            for f, x in calls
+        ]
+    )
@@ -0,0 +1,136 @@
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+import numpy as np
+
+from core.arrays import working_dtype
+from core.instrumentation import phase
+from core.factorization.cholesky import CholeskyFactorization, LDLFactorization
+from core.factorization.lu import LUFactorization
+
+METHODS = {
+    "lu": LUFactorization,
+    "cholesky": CholeskyFactorization,
+    "ldl": LDLFactorization,
+}
+
+
+def content_key(A, method: str, dtype=float, **options) -> Tuple:
+    """key of a factorization of A: a blake2b hash of the shape, dtype and
+    bytes of A, plus the method, the dtype of the factors and the options.
+    hashing is O(N^2), against the O(N^3) of a factorization. a matrix that
+    isn't C contiguous, such as a column slice, is hashed row by row so it is
+    never copied as a whole
+    """
+    A = np.asarray(A)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str((A.shape, A.dtype.str)).encode())
+    if A.flags.c_contiguous or A.ndim < 2:
+        digest.update(np.ascontiguousarray(A))
+    else:
+        for row in A:
+            digest.update(np.ascontiguousarray(row))
+    return (
+        digest.hexdigest(),
+        method,
+        np.dtype(dtype).str,
+        tuple(sorted(options.items())),
+    )
+
+
+def _nbytes(factorization) -> int:
+    """memory held by the arrays of a factorization"""
+    if isinstance(factorization, np.ndarray):
+        return factorization.nbytes
+    if isinstance(factorization, (tuple, list)):
+        return sum(_nbytes(item) for item in factorization)
+    return sum(
+        value.nbytes
+        for value in vars(factorization).values()
+        if isinstance(value, np.ndarray)
+    )
+
+
+class FactorizationCache:
+    """opt-in cache of factorizations keyed by the content of the matrix,
+    so repeated solves against the same matrix skip the O(N^3) step, even
+    across unrelated calls that pass equal but distinct arrays.
+
+    factorizations are kept within max_bytes, evicting the least recently
+    used first. hits, misses and evictions count the lookups.
+    cached factorizations are shared, so they must not be modified, and they
+    are created without metrics: pass metrics to their solve instead.
+    example:
+        cache = FactorizationCache(max_bytes=512 * 2**20)
+        factorization = cache.factorize(A, "lu")
+        solver = LUDecompositionSolver(cache=cache)
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2**20) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (factorization, nbytes)
+
+    def get(self, key, factorize: Callable):
+        """returns the factorization cached under key, or calls factorize()
+        and caches its result. results larger than max_bytes aren't cached
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+        self.misses += 1
+        factorization = factorize()
+        nbytes = _nbytes(factorization)
+        if nbytes > self.max_bytes:
+            return factorization
+        self._entries[key] = (factorization, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+        return factorization
+
+    def factorize(self, A, method: str = "lu", dtype=None, metrics=None, **options):
+        """cached factorization of A by method, one of "lu", "cholesky" or
+        "ldl". options are passed to the factorization class and are part
+        of the key, e.g. block_size or pivot. dtype is the type of the LU
+        factors, that of A by default, and A is hashed as given. metrics
+        counts the cache hits and misses and collects the timing of the
+        factorization on a miss.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown method {method}")
+        dtype = working_dtype(A) if dtype is None else np.dtype(dtype)
+        if method != "lu" and dtype != working_dtype(A):
+            raise ValueError(f"{method} factorization is computed in the dtype of A")
+        key = content_key(A, method, dtype, **options)
+        if method == "lu":
+            options["dtype"] = dtype
+
+        def factorize():
+            with phase(metrics, "factorize"):
+                return METHODS[method](A, **options)
+
+        hits = self.hits
+        factorization = self.get(key, factorize)
+        if metrics is not None:
+            metrics.count("cache_hits" if self.hits > hits else "cache_misses")
+        return factorization
+
+    def clear(self) -> None:
+        """remove every cached factorization. the counters are kept"""
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
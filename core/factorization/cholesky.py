@@ -0,0 +1,353 @@
+from typing import Iterable, Tuple
+
+import numpy as np
+
+from core.arrays import as_array, solve_dtype, writable_array
+from core.factorization.triangular import solve_triangular
+from core.instrumentation import Metrics, phase
+
+
+def cholesky_factor(
+    A: Iterable[Iterable], block_size: int = 64, overwrite_a: bool = False
+) -> Tuple[np.ndarray, int]:
+    """blocked Cholesky decomposition A = L * L.T of a symmetric positive
+    definite matrix, or A = L * L^H of a Hermitian one when A is complex.
+    only the lower triangle of A is read.
+
+    returns L and info. info is 0 on success. when A is not positive
+    definite, the factorization stops at the first non-positive pivot and
+    info is its one based index, so the failure costs no more than the work
+    done so far and no exception is raised.
+
+    the columns are processed in panels of block_size. the diagonal block is
+    factorized column by column, the panel below it is solved against it, and
+    only the lower triangle of the trailing matrix is updated, one block
+    column at a time, with matrix products.
+    L keeps the dtype of A, float32, float64, complex64 or complex128. when
+    overwrite_a is True and A is a writable ndarray of that dtype, L is
+    computed in place of A without allocating a copy.
+    """
+    c = writable_array(A, overwrite_a=overwrite_a)
+    nrow, ncol = c.shape
+    if nrow != ncol:
+        raise ValueError("A must be square matrix.")
+    n = nrow
+
+    info = 0
+    for k0 in range(0, n, block_size):
+        k1 = min(k0 + block_size, n)
+        failed = _factor_diagonal_block(c, k0, k1)
+        if failed is not None:
+            info = failed + 1
+            break
+        if k1 == n:
+            break
+
+        # L21 = A21 * L11^-H, computed as the adjoint of L11^-1 * A21^H
+        c[k1:, k0:k1] = solve_triangular(
+            c[k0:k1, k0:k1],
+            c[k1:, k0:k1].T.conj(),
+            lower=True,
+            block_size=block_size,
+        ).T.conj()
+
+        # A22 = A22 - L21 * L21^H, lower triangle only
+        L21 = c[k1:, k0:k1]
+        for j0 in range(k1, n, block_size):
+            j1 = min(j0 + block_size, n)
+            c[j0:, j0:j1] -= L21[j0 - k1 :] @ L21[j0 - k1 : j1 - k1].T.conj()
+
+    # zero the strict upper triangle one block row at a time, so no index
+    # arrays the size of the matrix are allocated
+    for k0 in range(0, n, block_size):
+        k1 = min(k0 + block_size, n)
+        c[k0:k1, k1:] = 0
+        block = c[k0:k1, k0:k1]
+        block[np.triu_indices(k1 - k0, 1)] = 0
+    return c, info
+
+
+def _factor_diagonal_block(c, k0, k1):
+    """unblocked Cholesky of the diagonal block c[k0:k1, k0:k1] in place.
+    returns the index of the first non-positive pivot, or None
+    """
+    for j in range(k0, k1):
+        # the diagonal of a Hermitian matrix is real
+        d = (c[j, j] - c[j, k0:j] @ c[j, k0:j].conj()).real
+        if not d > 0:
+            return j
+        c[j, j] = np.sqrt(d)
+        c[j + 1 : k1, j] -= c[j + 1 : k1, k0:j] @ c[j, k0:j].conj()
+        c[j + 1 : k1, j] /= c[j, j]
+    return None
+
+
+class CholeskyFactorization:
+    """reusable Cholesky factorization A = L * L^H of a symmetric, or
+    Hermitian, positive definite matrix. it needs half the flops and storage
+    of LU.
+    when A is not positive definite the factorization stops early,
+    `info` holds the one based index of the failing pivot and
+    `positive_definite` is False. solve then raises ValueError.
+    example:
+        factorization = CholeskyFactorization(A)
+        if factorization.positive_definite:
+            X = factorization.solve(B)
+            factorization.logdet()
+    """
+
+    def __init__(
+        self,
+        A: Iterable[Iterable],
+        block_size=64,
+        overwrite_a=False,
+        metrics: Metrics = None,
+    ) -> None:
+        with phase(metrics, "factorize"):
+            self.L, self.info = cholesky_factor(A, block_size, overwrite_a)
+        self.N = self.L.shape[0]
+        self.block_size = block_size
+        self.metrics = metrics
+
+    @property
+    def positive_definite(self) -> bool:
+        return self.info == 0
+
+    def _check(self):
+        if not self.positive_definite:
+            raise ValueError(
+                f"A is not positive definite, pivot {self.info} is not positive."
+            )
+
+    def solve(self, B: Iterable, metrics: Metrics = None) -> np.ndarray:
+        """solve AX = B. B is either a vector of length N or an N x k matrix
+        of right hand sides, and the returned X has the same shape as B.
+        metrics replaces the metrics given at creation for this solve
+        """
+        metrics = self.metrics if metrics is None else metrics
+        self._check()
+        B = as_array(B, solve_dtype(self.L.dtype, B))
+        if B.shape[0] != self.N:
+            raise ValueError(f"Expecting {self.N} rows for the right hand side.")
+        with phase(metrics, "solve"):
+            Y = solve_triangular(self.L, B, lower=True, block_size=self.block_size)
+            return solve_triangular(
+                self.L,
+                Y,
+                lower=True,
+                trans=True,
+                overwrite_b=True,
+                block_size=self.block_size,
+                conjugate=True,
+            )
+
+    def logdet(self) -> float:
+        """natural logarithm of the determinant of A, without overflow"""
+        self._check()
+        return 2 * np.log(np.diag(self.L).real).sum()
+
+
+def ldl_factor(
+    A: Iterable[Iterable], block_size: int = 64, overwrite_a: bool = False
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """blocked LDL.T decomposition of a symmetric, possibly indefinite matrix
+    with Bunch-Kaufman pivoting, namely A[perm][:, perm] = L * D * L.T where
+    L is unit lower triangular and D is block diagonal with 1x1 and 2x2
+    blocks. only the lower triangle of A is read. the factors keep the dtype
+    of A, and a complex A is taken to be symmetric, not Hermitian.
+
+    returns L, the block diagonal D stored as its diagonal d and its
+    subdiagonal e (nonzero only inside 2x2 blocks), and perm.
+
+    as in LAPACK's sytrf, the columns are processed in panels of block_size.
+    the pivots of a panel are chosen on columns updated with the panel so
+    far, and the products L * D of the panel are kept in an N x block_size
+    work array, so only the lower triangle of the trailing matrix is updated,
+    one block column at a time, with matrix products. L is computed in the
+    lower triangle of a copy of A, or of A itself when overwrite_a is True
+    and A is a writable ndarray of its working dtype.
+    """
+    a = writable_array(A, overwrite_a=overwrite_a)
+    nrow, ncol = a.shape
+    if nrow != ncol:
+        raise ValueError("A must be square matrix.")
+    n = nrow
+    d = np.zeros(n, dtype=a.dtype)
+    e = np.zeros(max(n - 1, 0), dtype=a.dtype)
+    perm = np.arange(n)
+    # L * D of the panel, with a spare column for a 2x2 pivot at its end
+    W = np.empty((n, block_size + 1), dtype=a.dtype)
+
+    k = 0
+    while k < n:
+        k0 = k
+        while k < min(k0 + block_size, n):
+            k += _ldl_pivot(a, W, d, e, perm, k0, k)
+
+        # A22 = A22 - L21 * (L21 * D).T, lower triangle only
+        L21, W21 = a[k:, k0:k], W[k:, : k - k0]
+        for j0 in range(k, n, block_size):
+            j1 = min(j0 + block_size, n)
+            a[j0:, j0:j1] -= L21[j0 - k :] @ W21[j0 - k : j1 - k].T
+
+    # unit diagonal and zero strict upper triangle, one block row at a time
+    for k0 in range(0, n, block_size):
+        k1 = min(k0 + block_size, n)
+        a[k0:k1, k1:] = 0
+        block = a[k0:k1, k0:k1]
+        block[np.triu_indices(k1 - k0, 1)] = 0
+    a[np.diag_indices(n)] = 1
+    return a, d, e, perm
+
+
+def _ldl_pivot(a, W, d, e, perm, k0, k) -> int:
+    """choose the Bunch-Kaufman pivot of column k in the panel starting at
+    k0, swap it into place and store its column(s) of L in a and of L * D in
+    W. returns the size of the pivot, 1 or 2
+    """
+    n = a.shape[0]
+    alpha = (1 + np.sqrt(17)) / 8
+    j = k - k0
+    L = a[k:, k0:k]
+
+    # column k updated with the panel so far
+    W[k:, j] = a[k:, k] - L @ W[k, :j]
+    s, r = 1, k
+    colmax = 0
+    if k < n - 1:
+        r = np.abs(W[k + 1 :, j]).argmax() + k + 1
+        colmax = abs(W[r, j])
+    if abs(W[k, j]) >= alpha * colmax:
+        r = k
+    else:
+        # column r updated with the panel so far, read from the lower triangle
+        W[k:r, j + 1] = a[r, k:r]
+        W[r:, j + 1] = a[r:, r]
+        W[k:, j + 1] -= L @ W[r, :j]
+        others = np.abs(W[k:, j + 1])
+        others[r - k] = 0
+        rowmax = others.max()
+        if abs(W[k, j]) * rowmax >= alpha * colmax**2:
+            r = k
+        elif abs(W[r, j + 1]) >= alpha * rowmax:
+            W[k:, j] = W[k:, j + 1]
+        else:
+            s = 2
+
+    # symmetric swap of row and column k + s - 1 with r in the lower triangle
+    t = k + s - 1
+    if r != t:
+        perm[[t, r]] = perm[[r, t]]
+        a[[t, r], :t] = a[[r, t], :t]
+        a[t + 1 : r, t], a[r, t + 1 : r] = (
+            a[r, t + 1 : r].copy(),
+            a[t + 1 : r, t].copy(),
+        )
+        a[r + 1 :, [t, r]] = a[r + 1 :, [r, t]]
+        a[t, t], a[r, r] = a[r, r], a[t, t]
+        W[[t, r], : j + s] = W[[r, t], : j + s]
+
+    if s == 1:
+        d[k] = W[k, j]
+        a[k + 1 :, k] = W[k + 1 :, j] / d[k] if d[k] != 0 else 0
+    else:
+        E = np.array([[W[k, j], W[k + 1, j]], [W[k + 1, j], W[k + 1, j + 1]]])
+        d[k], d[k + 1], e[k] = E[0, 0], E[1, 1], E[1, 0]
+        a[k + 1, k] = 0
+        a[k + 2 :, k : k + 2] = W[k + 2 :, j : j + 2] @ np.linalg.inv(E)
+    return s
+
+
+class LDLFactorization:
+    """reusable LDL.T factorization of a symmetric indefinite matrix with
+    Bunch-Kaufman pivoting, A[perm][:, perm] = L * D * L.T, see `ldl_factor`.
+    with overwrite_a, L is computed in place of A.
+    example:
+        factorization = LDLFactorization(A)
+        X = factorization.solve(B)
+    """
+
+    def __init__(
+        self,
+        A: Iterable[Iterable],
+        block_size=64,
+        overwrite_a=False,
+        metrics: Metrics = None,
+    ) -> None:
+        with phase(metrics, "factorize"):
+            self.L, self.d, self.e, self.perm = ldl_factor(A, block_size, overwrite_a)
+        self.N = self.L.shape[0]
+        self.block_size = block_size
+        self.metrics = metrics
+
+    @property
+    def D(self) -> np.ndarray:
+        """block diagonal factor"""
+        return np.diag(self.d) + np.diag(self.e, -1) + np.diag(self.e, 1)
+
+    def solve(self, B: Iterable, metrics: Metrics = None) -> np.ndarray:
+        """solve AX = B. B is either a vector of length N or an N x k matrix
+        of right hand sides, and the returned X has the same shape as B.
+        metrics replaces the metrics given at creation for this solve
+        """
+        metrics = self.metrics if metrics is None else metrics
+        B = as_array(B, solve_dtype(self.L.dtype, B))
+        if B.shape[0] != self.N:
+            raise ValueError(f"Expecting {self.N} rows for the right hand side.")
+        with phase(metrics, "solve"):
+            Y = solve_triangular(
+                self.L,
+                B[self.perm],
+                lower=True,
+                unit_diagonal=True,
+                overwrite_b=True,
+                block_size=self.block_size,
+            )
+            Y = self._solve_d(Y)
+            solve_triangular(
+                self.L,
+                Y,
+                lower=True,
+                trans=True,
+                unit_diagonal=True,
+                overwrite_b=True,
+                block_size=self.block_size,
+            )
+        X = np.empty_like(Y)
+        X[self.perm] = Y
+        return X
+
+    def _solve_d(self, Y: np.ndarray) -> np.ndarray:
+        """solve DZ = Y with the 1x1 and 2x2 blocks in closed form"""
+        Z = np.empty_like(Y)
+        d, e = self.d, self.e
+        k = 0
+        while k < self.N:
+            if k < self.N - 1 and e[k] != 0:
+                det = d[k] * d[k + 1] - e[k] * e[k]
+                Z[k] = (d[k + 1] * Y[k] - e[k] * Y[k + 1]) / det
+                Z[k + 1] = (d[k] * Y[k + 1] - e[k] * Y[k]) / det
+                k += 2
+            else:
+                if d[k] == 0:
+                    raise ValueError("A is singular.")
+                Z[k] = Y[k] / d[k]
+                k += 1
+        return Z
+
+    def slogdet(self) -> Tuple[float, float]:
+        """sign and natural logarithm of the absolute value of det(A). the
+        sign is a complex number of modulus one when A is complex
+        """
+        sign, logdet = 1.0, 0.0
+        k = 0
+        while k < self.N:
+            if k < self.N - 1 and self.e[k] != 0:
+                det = self.d[k] * self.d[k + 1] - self.e[k] ** 2
+                k += 2
+            else:
+                det = self.d[k]
+                k += 1
+            sign *= det / abs(det) if det != 0 else 0
+            logdet += np.log(abs(det)) if det != 0 else -np.inf
+        return sign, logdet
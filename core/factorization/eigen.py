@@ -0,0 +1,208 @@
+from typing import Iterable
+
+import numpy as np
+
+from core.factorization.qr import house_reflector
+from core.instrumentation import Metrics, phase
+
+
+def hessenberg(A, compute_q=False):
+    """reduce the square matrix A to upper Hessenberg form H = Q.T * A * Q
+    with Householder reflectors. returns H, or (H, Q) when compute_q
+    """
+    H = np.array(A, dtype=float)
+    nrow, ncol = H.shape
+    if nrow != ncol:
+        raise ValueError("A must be square matrix.")
+    n = nrow
+    Q = np.identity(n) if compute_q else None
+
+    for k in range(n - 2):
+        v, tau, beta = house_reflector(H[k + 1 :, k])
+        if tau == 0:
+            continue
+        H[k + 1 :, k:] -= tau * np.outer(v, v @ H[k + 1 :, k:])
+        H[:, k + 1 :] -= tau * np.outer(H[:, k + 1 :] @ v, v)
+        H[k + 2 :, k] = 0
+        if compute_q:
+            Q[:, k + 1 :] -= tau * np.outer(Q[:, k + 1 :] @ v, v)
+
+    if compute_q:
+        return H, Q
+    return H
+
+
+def balance(A) -> np.ndarray:
+    """scale the rows and columns of A by powers of 2, D^-1 * A * D, so that
+    their norms are about equal. the eigenvalues are unchanged but computed
+    more accurately, in particular for companion matrices. the Hessenberg
+    form is preserved.
+    """
+    B = np.array(A, dtype=float)
+    n = B.shape[0]
+    converged = False
+    while not converged:
+        converged = True
+        for i in range(n):
+            c = np.linalg.norm(np.delete(B[:, i], i), 1)
+            r = np.linalg.norm(np.delete(B[i], i), 1)
+            if c == 0 or r == 0:
+                continue
+            f = 1.0
+            s = c + r
+            while c < r / 2:
+                c, r, f = c * 2, r / 2, f * 2
+            while c >= r * 2:
+                c, r, f = c / 2, r * 2, f / 2
+            if (c + r) < 0.95 * s:
+                converged = False
+                B[i] /= f
+                B[:, i] *= f
+    return B
+
+
+def _eigvals_2x2(a, b, c, d) -> np.ndarray:
+    """eigenvalues of [[a, b], [c, d]]"""
+    p = (a + d) / 2
+    q = np.sqrt(complex(((a - d) / 2) ** 2 + b * c))
+    return np.array([p + q, p - q])
+
+
+def _francis_step(B, exceptional=False):
+    """one implicit Francis double-shift QR step on the unreduced upper
+    Hessenberg block B, in place. the shifts are the eigenvalues of the
+    trailing 2x2 block, and the bulge is chased down with 3x3 reflectors.
+    """
+    m = B.shape[0]
+    if exceptional:
+        # ad hoc shifts to break a cycle of non converging steps
+        w = abs(B[m - 1, m - 2]) + abs(B[m - 2, m - 3])
+        s, t = 1.5 * w, w * w
+    else:
+        s = B[m - 2, m - 2] + B[m - 1, m - 1]
+        t = B[m - 2, m - 2] * B[m - 1, m - 1] - B[m - 2, m - 1] * B[m - 1, m - 2]
+
+    # first column of (B - s1 I)(B - s2 I)
+    x = B[0, 0] * B[0, 0] + B[0, 1] * B[1, 0] - s * B[0, 0] + t
+    y = B[1, 0] * (B[0, 0] + B[1, 1] - s)
+    z = B[1, 0] * B[2, 1]
+
+    for k in range(m - 2):
+        v, tau, beta = house_reflector(np.array([x, y, z]))
+        q = max(0, k - 1)
+        r = min(k + 4, m)
+        B[k : k + 3, q:] -= tau * np.outer(v, v @ B[k : k + 3, q:])
+        B[:r, k : k + 3] -= tau * np.outer(B[:r, k : k + 3] @ v, v)
+        x = B[k + 1, k]
+        y = B[k + 2, k]
+        if k < m - 3:
+            z = B[k + 3, k]
+
+    v, tau, beta = house_reflector(np.array([x, y]))
+    B[m - 2 :, m - 3 :] -= tau * np.outer(v, v @ B[m - 2 :, m - 3 :])
+    B[:, m - 2 :] -= tau * np.outer(B[:, m - 2 :] @ v, v)
+
+
+def hessenberg_eigvals(H, max_iter=30, metrics: Metrics = None) -> np.ndarray:
+    """eigenvalues of the upper Hessenberg matrix H by the Francis double-shift
+    QR algorithm. a subdiagonal element is set to zero once it is negligible
+    relative to its diagonal neighbours, and the 1x1 and 2x2 blocks split off
+    at the bottom are deflated. only the active unreduced block is updated.
+
+    max_iter is the number of steps allowed per deflation. complex conjugate
+    pairs are returned next to each other.
+    metrics optionally collects the number of QR steps.
+    """
+    H = np.array(H, dtype=float)
+    n = H.shape[0]
+    eps = np.finfo(float).eps
+    norm = np.abs(H).max() if n else 0.0
+    eig = np.empty(n, dtype=complex)
+
+    hi = n - 1
+    iter = 0
+    while hi >= 0:
+        # look for a negligible subdiagonal element from the bottom up
+        lo = hi
+        while lo > 0:
+            scale = abs(H[lo - 1, lo - 1]) + abs(H[lo, lo])
+            if abs(H[lo, lo - 1]) <= eps * (scale if scale != 0 else norm):
+                H[lo, lo - 1] = 0
+                break
+            lo -= 1
+
+        if lo == hi:
+            eig[hi] = H[hi, hi]
+            hi -= 1
+            iter = 0
+        elif lo == hi - 1:
+            eig[hi - 1 : hi + 1] = _eigvals_2x2(
+                H[lo, lo], H[lo, hi], H[hi, lo], H[hi, hi]
+            )
+            hi -= 2
+            iter = 0
+        else:
+            if iter >= max_iter:
+                raise ValueError("QR algorithm doesn't converge.")
+            iter += 1
+            _francis_step(H[lo : hi + 1, lo : hi + 1], exceptional=iter % 10 == 0)
+            if metrics is not None:
+                metrics.count("iterations")
+    return eig
+
+
+def eigvals(A, balanced=True, max_iter=30, metrics: Metrics = None) -> np.ndarray:
+    """eigenvalues of the real square matrix A. A is optionally balanced,
+    reduced to upper Hessenberg form, then the eigenvalues are found by the
+    Francis double-shift QR algorithm in O(n^3) operations.
+    metrics optionally collects the timings of the hessenberg and qr phases
+    and the number of QR steps.
+    """
+    A = np.asarray(A, dtype=float)
+    if A.ndim != 2 or A.shape[0] != A.shape[1]:
+        raise ValueError("A must be square matrix.")
+    if balanced:
+        A = balance(A)
+    with phase(metrics, "hessenberg"):
+        H = hessenberg(A)
+    with phase(metrics, "qr"):
+        return hessenberg_eigvals(H, max_iter, metrics)
+
+
+def companion(a: Iterable) -> np.ndarray:
+    """companion matrix of the polynomial with coef a, where a[n] is the coef
+    of degree n. the matrix is upper Hessenberg and its eigenvalues are the
+    roots of the polynomial.
+    """
+    a = np.asarray(a, dtype=float)
+    n = len(a) - 1
+    if n < 1 or a[n] == 0:
+        raise ValueError("Expecting a polynomial of degree >= 1 with a[n] != 0.")
+    C = np.zeros((n, n))
+    C[np.arange(1, n), np.arange(n - 1)] = 1
+    C[:, n - 1] = -a[:n] / a[n]
+    return C
+
+
+def polynomial_roots(a: Iterable, max_iter=30, metrics: Metrics = None) -> np.ndarray:
+    """all roots of the real polynomial with coef a, where a[n] is the coef of
+    degree n, same as `BairstowSolver.solve`. ex: [4, -10, 10, -5, 1] stands
+    for x^4 -5x^3 +10x^2 -10x + 4.
+
+    the roots are the eigenvalues of the balanced companion matrix, so no
+    initial guess is needed. zero leading coef are dropped, and zero
+    trailing coef give roots at zero.
+    """
+    a = np.trim_zeros(np.asarray(a, dtype=float), "b")
+    if len(a) == 0:
+        raise ValueError("Expecting a nonzero polynomial.")
+    zeros = len(a) - len(np.trim_zeros(a, "f"))
+    a = a[zeros:]
+    roots = np.zeros(zeros, dtype=complex)
+    if len(a) == 1:
+        return roots
+
+    C = balance(companion(a))
+    with phase(metrics, "qr"):
+        eig = hessenberg_eigvals(C, max_iter, metrics)
+    return np.concatenate([eig, roots])
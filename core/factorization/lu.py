@@ -2,21 +2,247 @@ from typing import Iterable, Tuple
 
 import numpy as np
 
+from core.arrays import as_array, solve_dtype, writable_array
+from core.factorization.parallel import SharedLUFactors
+from core.factorization.triangular import solve_triangular
+from core.instrumentation import Metrics, phase
+
+
+def lu_factor(
+    A: Iterable[Iterable],
+    block_size: int = 64,
+    pivot: bool = True,
+    dtype=None,
+    overwrite_a: bool = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """right-looking blocked LU decomposition with partial pivoting,
+    namely A[perm] = LU.
+
+    returns the packed LU matrix and the permutation vector perm. the strictly
+    lower part of the packed matrix holds L (its unit diagonal is implicit) and
+    the upper part holds U.
+
+    the columns are processed in panels of block_size. each panel is factorized
+    column by column, then the block row of U is solved and the trailing matrix
+    is updated with a single rank-k matrix product.
+    dtype is the floating point type the factors are computed and stored in,
+    by default that of A: float32, float64, complex64 or complex128.
+    when overwrite_a is True and A is a writable ndarray of dtype, the factors
+    are computed in place of A without allocating a copy.
+    """
+    lu = writable_array(A, dtype, overwrite_a)
+    nrow, ncol = lu.shape
+    if nrow != ncol:
+        raise ValueError("A must be square matrix.")
+    n = nrow
+    perm = np.arange(n)
+
+    for k0 in range(0, n, block_size):
+        k1 = min(k0 + block_size, n)
+        _factor_panel(lu, perm, k0, k1, pivot)
+        if k1 == n:
+            break
+
+        # solve L11 * U12 = A12 for the block row of U
+        solve_triangular(
+            lu[k0:k1, k0:k1],
+            lu[k0:k1, k1:],
+            lower=True,
+            unit_diagonal=True,
+            overwrite_b=True,
+        )
+
+        # rank-k update of the trailing matrix: A22 = A22 - L21 * U12
+        lu[k1:, k1:] -= lu[k1:, k0:k1] @ lu[k0:k1, k1:]
+
+    return lu, perm
+
+
+def _factor_panel(lu, perm, k0, k1, pivot=True, offset=0):
+    """unblocked LU of the panel lu[k0:, k0:k1]. row swaps are applied to
+    the entire rows of lu so the L columns on the left stay consistent.
+    offset is subtracted from the column indices when lu only holds the
+    columns from offset onwards. returns the list of row swaps
+    """
+    swaps = []
+    for j in range(k0, k1):
+        c = j - offset
+        if pivot:
+            p = np.abs(lu[j:, c]).argmax() + j
+            if p != j:
+                lu[[j, p]] = lu[[p, j]]
+                perm[[j, p]] = perm[[p, j]]
+                swaps.append((j, p))
+        if lu[j, c] == 0:
+            raise ValueError("A is singular.")
+        lu[j + 1 :, c] /= lu[j, c]
+        lu[j + 1 :, c + 1 : k1 - offset] -= np.outer(
+            lu[j + 1 :, c], lu[j, c + 1 : k1 - offset]
+        )
+    return swaps
+
+
+def unpack_lu(lu: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """split the packed LU matrix from `lu_factor` into L and U"""
+    L = np.tril(lu, -1) + np.identity(lu.shape[0], dtype=lu.dtype)
+    U = np.triu(lu)
+    return L, U
+
+
+class LUFactorization:
+    """reusable LU factorization of a square matrix A, namely A[perm] = LU.
+    A is factorized once when the object is created, then `solve` can be
+    called repeatedly against any number of right hand sides.
+    example:
+        factorization = LUFactorization(A)
+        x = factorization.solve(b)
+        X = factorization.solve(B)  # each column of B is a right hand side
+    """
+
+    def __init__(
+        self,
+        A: Iterable[Iterable],
+        block_size=64,
+        pivot=True,
+        metrics: Metrics = None,
+        dtype=None,
+        overwrite_a=False,
+    ) -> None:
+        """dtype is the floating point type of the factors, that of A by
+        default, or for example np.float32 to halve their memory. solves are
+        then computed in dtype. with overwrite_a, A is factorized in place.
+        """
+        with phase(metrics, "factorize"):
+            self.lu, self.perm = lu_factor(A, block_size, pivot, dtype, overwrite_a)
+        self.N = self.lu.shape[0]
+        self.block_size = block_size
+        self.metrics = metrics
+        self._shared = None
+
+    @classmethod
+    def from_factors(
+        cls, lu: np.ndarray, perm: np.ndarray, block_size=64, metrics: Metrics = None
+    ):
+        """wrap a packed LU matrix and permutation vector computed elsewhere,
+        for example by `LUDecomposer`, without factorizing again
+        """
+        factorization = cls.__new__(cls)
+        factorization.lu = lu
+        factorization.perm = perm
+        factorization.N = lu.shape[0]
+        factorization.block_size = block_size
+        factorization.metrics = metrics
+        factorization._shared = None
+        return factorization
+
+    @property
+    def L(self) -> np.ndarray:
+        """unit lower triangular factor"""
+        return unpack_lu(self.lu)[0]
+
+    @property
+    def U(self) -> np.ndarray:
+        """upper triangular factor"""
+        return np.triu(self.lu)
+
+    def solve(
+        self, B: Iterable, processes=1, chunk_size=None, metrics: Metrics = None
+    ) -> np.ndarray:
+        """solve AX = B. B is either a vector of length N or an N x k matrix
+        of right hand sides, and the returned X has the same shape as B.
+        with processes > 1 (or None for every CPU) the columns of an N x k B
+        are partitioned in chunks of chunk_size among worker processes, in
+        every dtype: the factors are shared in their own dtype and X is
+        computed in solve_dtype, e.g. complex for a complex B. a vector B is
+        always solved in the calling process. the shared factors and the
+        worker pool are created on the first parallel solve and kept until
+        close(), see `core.factorization.parallel.SharedLUFactors`.
+        metrics replaces the metrics given at creation for this solve, e.g.
+        when the factorization is shared through a `FactorizationCache`
+        """
+        metrics = self.metrics if metrics is None else metrics
+        B = as_array(B, solve_dtype(self.lu.dtype, B))
+        if B.shape[0] != self.N:
+            raise ValueError(f"Expecting {self.N} rows for the right hand side.")
+        if processes != 1 and B.ndim == 2:
+            if self._shared is None:
+                self._shared = SharedLUFactors(self.lu, self.perm, self.block_size)
+            return self._shared.solve(B, processes, chunk_size, metrics)
+        # fancy indexing already copies B, so both solves can run in place
+        X = B[self.perm]
+        with phase(metrics, "solve"):
+            solve_triangular(
+                self.lu,
+                X,
+                lower=True,
+                unit_diagonal=True,
+                overwrite_b=True,
+                block_size=self.block_size,
+            )
+            return solve_triangular(
+                self.lu, X, lower=False, overwrite_b=True, block_size=self.block_size
+            )
+
+    def solve_transpose(self, B: Iterable) -> np.ndarray:
+        """solve A.T X = B using the same factorization"""
+        B = as_array(B, solve_dtype(self.lu.dtype, B))
+        if B.shape[0] != self.N:
+            raise ValueError(f"Expecting {self.N} rows for the right hand side.")
+        # A.T = U.T L.T P, so solve U.T then L.T, then undo the permutation
+        Y = solve_triangular(
+            self.lu, B, lower=False, trans=True, block_size=self.block_size
+        )
+        solve_triangular(
+            self.lu,
+            Y,
+            lower=True,
+            trans=True,
+            unit_diagonal=True,
+            overwrite_b=True,
+            block_size=self.block_size,
+        )
+        X = np.empty_like(Y)
+        X[self.perm] = Y
+        return X
+
+    def close(self) -> None:
+        """release the shared factors and the worker pool of parallel
+        solves, if any. the factorization can still be used afterwards
+        """
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
 
 # todo: this class should live in a separate module for matrix operation
 class LUDecomposer:
     """class that decomposes a square matrix using LU decomposition,
-    namely A = LU where L is a lower triangular matrix and U is an
-    upper triangular matrix.
+    namely A[perm] = LU where L is a lower triangular matrix, U is an
+    upper triangular matrix and perm is the row permutation vector
+    from partial pivoting.
     """
 
-    def __init__(self, verbose=True) -> None:
+    def __init__(
+        self, verbose=False, pivot=True, block_size=64, metrics: Metrics = None
+    ) -> None:
         self.L = None
         self.U = None
         self.N = None
+        self.lu = None
+        self.perm = None
         self.verbose = verbose
+        self.pivot = pivot
+        self.block_size = block_size
+        self.metrics = metrics
+        self.overwrite_a = False
 
-    def set(self, A: Iterable[Iterable]) -> None:
+    def set(self, A: Iterable[Iterable], overwrite_a=False) -> None:
         """set the matrix to be solved. A must be a square matrix
         example:
             A = [
@@ -24,38 +250,47 @@ class LUDecomposer:
                 [2, 5, -3],
                 [1, -1, -6]
             ]
+        an ndarray A is referenced without copying, and `decompose` factorizes
+        a copy of it. with overwrite_a, A is factorized in place instead and
+        its contents are destroyed.
         """
-        if not isinstance(A, np.ndarray):
-            A = np.array(A, dtype=float)
+        A = as_array(A)
         nrow, ncol = A.shape
         if nrow != ncol:
             raise ValueError("A must be square matrix.")
         self.N = nrow
-        self.L = np.identity(self.N)
+        self.L = np.identity(self.N, dtype=A.dtype)
         self.U = A
+        self.perm = np.arange(self.N)
+        self.overwrite_a = overwrite_a
         self.print_matrix_if_verbose(self.L, title="L Matrix")
         self.print_matrix_if_verbose(self.U, title="U Matrix")
 
     def decompose(self) -> Tuple[Iterable[Iterable], Iterable[Iterable]]:
         """returns tuple that contains L and U matrices"""
-        # eliminate rows in U matrix below row i
-        for i in range(self.N - 1):
-            pivot = self.U[i, i]
-            for offset, a in enumerate(self.U[(i + 1) :, i]):
-                scaling_factor = -1.0 * a / pivot
-                self.add_row_u(i, i + offset + 1, scaling_factor)
-                self.L[i + offset + 1, i] = -1.0 * scaling_factor
-            self.print_matrix_if_verbose(self.L, title=f"L Matrix - Iter {i+1}")
-            self.print_matrix_if_verbose(self.U, title=f"U Matrix - Iter {i+1}")
+        if self.metrics is not None:
+            a_max = np.abs(self.U).max()
+        with phase(self.metrics, "factorize"):
+            self.lu, self.perm = lu_factor(
+                self.U, self.block_size, self.pivot, overwrite_a=self.overwrite_a
+            )
+        if self.metrics is not None:
+            growth = np.abs(np.triu(self.lu)).max() / a_max
+            self.metrics.record("pivot_growth", growth)
+        self.L, self.U = unpack_lu(self.lu)
+        self.print_vector_if_verbose(self.perm, title="Row Permutation")
+        self.print_matrix_if_verbose(self.L, title="L Matrix")
+        self.print_matrix_if_verbose(self.U, title="U Matrix")
         return self.L, self.U
 
-    def add_row_u(self, i, j, scaling_factor=1):
-        """add row i * scaling_factor to row j for U matrix"""
-        temp = (self.U[i] * scaling_factor + self.U[j]).copy()
-        self.U[j] = temp
-
     def print_matrix_if_verbose(self, A, title=None):
         """print the given matrix if verbose"""
         if self.verbose:
             print(f"\n========== {title} ============")
             print(A)
+
+    def print_vector_if_verbose(self, x, title=None):
+        """print the given vector if verbose"""
+        if self.verbose:
+            print(f"\n========== {title} ============")
+            print(x)
@@ -0,0 +1,117 @@
+import os
+from typing import Iterable
+
+import numpy as np
+
+from core.arrays import as_array, solve_dtype, working_dtype
+from core.factorization.lu import _factor_panel
+from core.factorization.triangular import solve_triangular
+from core.instrumentation import Metrics, phase
+
+
+def _perm_path(path) -> str:
+    """file that stores the row permutation next to the packed factors"""
+    return os.path.splitext(os.fspath(path))[0] + ".perm.npy"
+
+
+def lu_factor_out_of_core(
+    A, path, panel_size=512, pivot=True, metrics: Metrics = None
+) -> "OutOfCoreLUFactorization":
+    """left-looking LU decomposition with partial pivoting, namely A[perm] = LU,
+    for matrices that don't fit in memory.
+
+    A is a np.memmap, an array or a path to a .npy file. the packed LU factors
+    are written to the .npy file at path and the permutation vector next to it,
+    so later solves can stream them from disk with `OutOfCoreLUFactorization`.
+    the factors keep the dtype of A: float32, float64, complex64 or complex128.
+
+    the matrix is processed in column panels of panel_size. each panel is read,
+    updated by streaming the previously factorized panels one at a time, then
+    factorized and written back. at most two panels are resident in memory.
+    metrics optionally collects the timings of the update and factorize phases.
+    """
+    if isinstance(A, (str, os.PathLike)):
+        A = np.load(A, mmap_mode="r")
+    nrow, ncol = A.shape
+    if nrow != ncol:
+        raise ValueError("A must be square matrix.")
+    n = nrow
+
+    # copy A into the factor file a block of rows at a time
+    F = np.lib.format.open_memmap(path, mode="w+", dtype=working_dtype(A), shape=(n, n))
+    for r0 in range(0, n, panel_size):
+        F[r0 : r0 + panel_size] = A[r0 : r0 + panel_size]
+    perm = np.arange(n)
+
+    for k0 in range(0, n, panel_size):
+        k1 = min(k0 + panel_size, n)
+        P = np.array(F[:, k0:k1])
+
+        # apply the updates from the factorized panels on the left
+        with phase(metrics, "update"):
+            for i0 in range(0, k0, panel_size):
+                i1 = min(i0 + panel_size, k0)
+                L = np.array(F[i0:, i0:i1])
+                solve_triangular(
+                    L[: i1 - i0],
+                    P[i0:i1],
+                    lower=True,
+                    unit_diagonal=True,
+                    overwrite_b=True,
+                )
+                P[i1:] -= L[i1 - i0 :] @ P[i0:i1]
+
+        # factorize the panel, then apply its row swaps to the rest of the rows
+        with phase(metrics, "factorize"):
+            swaps = _factor_panel(P, perm, k0, k1, pivot, offset=k0)
+            for j, p in swaps:
+                temp = np.array(F[j])
+                F[j] = F[p]
+                F[p] = temp
+            F[:, k0:k1] = P
+
+    F.flush()
+    np.save(_perm_path(path), perm)
+    del F
+    return OutOfCoreLUFactorization(path, panel_size)
+
+
+class OutOfCoreLUFactorization:
+    """LU factorization stored on disk by `lu_factor_out_of_core`.
+    the packed factors are memory mapped and streamed one column panel
+    at a time, so solving never holds more than one panel in memory.
+    """
+
+    def __init__(self, path, panel_size=512) -> None:
+        self.path = path
+        self.lu = np.load(path, mmap_mode="r")
+        self.perm = np.load(_perm_path(path))
+        self.N = self.lu.shape[0]
+        self.panel_size = panel_size
+
+    def solve(self, B: Iterable) -> np.ndarray:
+        """solve AX = B. B is either a vector of length N or an N x k matrix
+        of right hand sides, and the returned X has the same shape as B
+        """
+        B = as_array(B, solve_dtype(self.lu.dtype, B))
+        if B.shape[0] != self.N:
+            raise ValueError(f"Expecting {self.N} rows for the right hand side.")
+        n, nb = self.N, self.panel_size
+        X = B[self.perm]
+
+        # solve LY = PB streaming the panels of L left to right
+        for i0 in range(0, n, nb):
+            i1 = min(i0 + nb, n)
+            L = np.array(self.lu[i0:, i0:i1])
+            solve_triangular(
+                L[: i1 - i0], X[i0:i1], lower=True, unit_diagonal=True, overwrite_b=True
+            )
+            X[i1:] -= L[i1 - i0 :] @ X[i0:i1]
+
+        # solve UX = Y streaming the panels of U right to left
+        for i0 in reversed(range(0, n, nb)):
+            i1 = min(i0 + nb, n)
+            U = np.array(self.lu[:i1, i0:i1])
+            solve_triangular(U[i0:i1], X[i0:i1], lower=False, overwrite_b=True)
+            X[:i0] -= U[:i0] @ X[i0:i1]
+        return X
@@ -0,0 +1,190 @@
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable
+
+import numpy as np
+
+from core.arrays import as_array, solve_dtype
+from core.factorization.triangular import solve_triangular
+from core.instrumentation import Metrics, phase
+
+# Parallel solves against many right hand sides.
+#
+# the packed LU factors and the permutation are copied once into shared
+# memory and a pool of worker processes is kept across solves. for each
+# solve the right hand sides are copied into one more block, worker
+# processes attach to the blocks by name, so only the names, shapes and
+# column ranges are pickled, and each worker solves its own range of
+# columns in place.
+
+
+def _share(array: np.ndarray):
+    """copy array into a new shared memory block. returns the block and
+    the (name, shape, dtype) spec a worker needs to attach to it
+    """
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach(spec):
+    """attach to the shared memory block described by spec"""
+    name, shape, dtype = spec
+    try:
+        # python >= 3.13, the creating process owns the block
+        shm = SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype, buffer=shm.buf)
+
+
+def _release(blocks) -> None:
+    """close and unlink shared memory blocks created by this process"""
+    for shm, _ in blocks:
+        shm.close()
+        shm.unlink()
+
+
+def _solve_columns(lu_spec, perm_spec, x_spec, start, stop, block_size):
+    """overwrite columns start..stop of X, holding B, with the solution of
+    LUX = B[perm]
+    """
+    blocks = []
+    try:
+        for spec in (lu_spec, perm_spec, x_spec):
+            blocks.append(_attach(spec))
+        (_, lu), (_, perm), (_, X) = blocks
+        X[:, start:stop] = X[perm, start:stop]
+        solve_triangular(
+            lu,
+            X[:, start:stop],
+            lower=True,
+            unit_diagonal=True,
+            overwrite_b=True,
+            block_size=block_size,
+        )
+        solve_triangular(
+            lu, X[:, start:stop], lower=False, overwrite_b=True, block_size=block_size
+        )
+    finally:
+        for shm, _ in blocks:
+            shm.close()
+
+
+class SharedLUFactors:
+    """packed factors A[perm] = LU from `lu_factor` in shared memory, with a
+    pool of worker processes kept across solves. `LUFactorization` creates
+    one on its first parallel solve.
+
+    close() shuts the pool down and frees the shared memory, which also
+    happens when the object is garbage collected. it is a context manager:
+        with SharedLUFactors(lu, perm) as shared:
+            X = shared.solve(B, processes=8)
+    """
+
+    def __init__(self, lu: np.ndarray, perm: np.ndarray, block_size=64) -> None:
+        """the factors are shared in their own dtype"""
+        lu = np.asarray(lu)
+        self.dtype = lu.dtype
+        self.N = lu.shape[0]
+        self.block_size = block_size
+        self._blocks = []
+        self._finalizer = weakref.finalize(self, _release, self._blocks)
+        for array in (lu, np.asarray(perm)):
+            self._blocks.append(_share(array))
+        self._executor = None
+        self._processes = None
+
+    def _pool(self, processes: int) -> ProcessPoolExecutor:
+        """the worker pool, created again only when processes changes"""
+        if self._processes != processes:
+            if self._executor is not None:
+                self._executor.shutdown()
+            self._executor = ProcessPoolExecutor(processes)
+            self._processes = processes
+        return self._executor
+
+    def solve(
+        self,
+        B: Iterable[Iterable],
+        processes=None,
+        chunk_size=None,
+        metrics: Metrics = None,
+    ) -> np.ndarray:
+        """solve AX = B for an N x k matrix of right hand sides, see
+        `parallel_lu_solve`
+        """
+        if not self._finalizer.alive:
+            raise ValueError("The shared factors are closed.")
+        dtype = solve_dtype(self.dtype, B)
+        B = as_array(B, dtype)
+        if B.ndim != 2 or B.shape[0] != self.N:
+            raise ValueError(f"Expecting {self.N} rows for the right hand side.")
+        k = B.shape[1]
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if chunk_size is None:
+            chunk_size = max(-(-k // processes), 1)
+        starts = list(range(0, k, chunk_size))
+
+        (_, lu_spec), (_, perm_spec) = self._blocks
+        block_size = self.block_size
+        with phase(metrics, "solve"):
+            shm, x_spec = _share(B)
+            try:
+                args = [
+                    (lu_spec, perm_spec, x_spec, s, min(s + chunk_size, k), block_size)
+                    for s in starts
+                ]
+                if processes > 1 and len(starts) > 1:
+                    executor = self._pool(processes)
+                    list(executor.map(_solve_columns, *zip(*args)))
+                else:
+                    for arg in args:
+                        _solve_columns(*arg)
+                return np.ndarray(B.shape, dtype, buffer=shm.buf).copy()
+            finally:
+                shm.close()
+                shm.unlink()
+
+    def close(self) -> None:
+        """shut the worker pool down and free the shared memory"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._processes = None
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def parallel_lu_solve(
+    lu: np.ndarray,
+    perm: np.ndarray,
+    B: Iterable[Iterable],
+    block_size=64,
+    processes=None,
+    chunk_size=None,
+    metrics: Metrics = None,
+) -> np.ndarray:
+    """solve AX = B for an N x k matrix of right hand sides with the packed
+    factors A[perm] = LU from `lu_factor`, partitioning the columns of B
+    among worker processes.
+
+    the factors are shared with the workers through shared memory, so they
+    are not pickled. processes defaults to the number of CPUs and
+    processes=1 runs in the calling process. chunk_size is the number of
+    columns per task and defaults to splitting the columns evenly.
+    the solve is computed in the precision of the factors, complex when the
+    factors or B are. metrics optionally collects the timing of the solve.
+    the shared memory and the worker pool only last for this call, use
+    `SharedLUFactors` or `LUFactorization` to keep them across solves.
+    """
+    with SharedLUFactors(lu, perm, block_size) as shared:
+        return shared.solve(B, processes, chunk_size, metrics)
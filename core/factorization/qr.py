@@ -1,6 +1,12 @@
-from typing import Tuple
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Tuple
 import numpy as np
 
+from core.arrays import solve_dtype, working_dtype
+from core.factorization.triangular import solve_triangular
+from core.instrumentation import Metrics, phase
+
 
 def classical_gram_schmidt(A) -> Tuple[np.matrix, np.matrix]:
     """
@@ -53,7 +59,7 @@ def modified_gram_schmidt(A) -> Tuple[np.matrix, np.matrix]:
 
         # loop previous orthoganolized column vectors
         for i in range(j):
-            R[i, j] = Q[:, i].T * A[:, j]
+            R[i, j] = (Q[:, i].T * A[:, j]).item()
             Q[:, j] = Q[:, j] - Q[:, i] * R[i, j]
         
         R[j, j] = np.linalg.norm(Q[:, j])
@@ -100,7 +106,7 @@ def house_apply(U, X):
     Z = X
     _, n = U.shape
     for j in reversed(range(n)):
-        Z = H(U[:, j], Z)
+        Z = H(U[:, j:j+1], Z)
     return Z
 
 
@@ -112,55 +118,354 @@ def house_apply_transpose(U, X):
     Z = X.copy()
     _, n = U.shape
     for j in range(n):
-        Z = H(U[:, j], Z)
+        Z = H(U[:, j:j+1], Z)
     return Z
 
 
 def H(u, x):
     """reflection operator"""
-    return x - u * (u.T * x)
+    return x - u @ (u.T @ x)
+
+
+# Blocked Householder QR with compact WY representation
+# reference: Schreiber and Van Loan, A storage-efficient WY representation
+# for products of Householder transformations (1989)
+#
+# the reflectors are stored LAPACK style: H = I - tau * v * v.T with v[0] = 1,
+# so the v vectors fit below the diagonal of R. a block of reflectors
+# H1 * H2 * ... * Hk is written as I - V * T * V.T, where T is a small upper
+# triangular matrix. applying a block then costs three matrix products.
+# complex matrices use the conjugate transposes V.H in place of V.T, and
+# Q.H in place of Q.T, as in LAPACK's zgeqrf.
+
+def house_reflector(x) -> Tuple[np.ndarray, float, float]:
+    """Generate the reflector H = I - tau * v * v.T with v[0] = 1
+    such that H * x = beta * e1. returns v, tau and beta.
+    for a complex x, H = I - tau * v * v.H and H.H * x = beta * e1
+    with a real beta.
+    """
+    alpha = x[0]
+    sigma = np.linalg.norm(x[1:])
+    v = np.array(x, dtype=working_dtype(x))
+    v[0] = 1
+    if sigma == 0 and alpha.imag == 0:
+        # x is already a multiple of e1. no reflection needed
+        return v, 0.0, alpha
+
+    # beta has the opposite sign to x[0] to avoid cancellation in x[0] - beta
+    beta = -np.copysign(np.hypot(abs(alpha), sigma), alpha.real)
+    v[1:] = v[1:] / (alpha - beta)
+    tau = (beta - alpha) / beta
+    return v, tau, beta
+
+
+def house_wy_t(V, tau) -> np.ndarray:
+    """compute the upper triangular T so that the block reflector
+    H1 * H2 * ... * Hk = I - V * T * V.H
+    """
+    k = len(tau)
+    T = np.zeros([k, k], dtype=np.result_type(V, tau))
+    for i in range(k):
+        T[i, i] = tau[i]
+        T[:i, i] = -tau[i] * (T[:i, :i] @ (V[:, :i].conj().T @ V[:, i]))
+    return T
+
+
+def house_wy_apply(V, T, C, transpose=False):
+    """apply the block reflector I - V * T * V.H (or its conjugate
+    transpose) to C in place
+    """
+    W = V.conj().T @ C
+    W = (T.conj().T if transpose else T) @ W
+    C -= V @ W
+    return C
+
+
+def _house_block_v(qr, j0, j1):
+    """the unit lower trapezoidal V of reflectors j0..j1 stored in qr"""
+    V = np.tril(qr[j0:, j0:j1], -1)
+    V[np.arange(j1 - j0), np.arange(j1 - j0)] = 1
+    return V
+
+
+def blocked_house_qr(A, block_size=32) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute the Householder QR factorization of A in blocks of columns.
 
+    returns (qr, tau) stored LAPACK style: R is the upper triangle of qr and
+    the reflector vectors v (with an implicit v[0] = 1) are stored below the
+    diagonal, with the scalar factors in tau.
 
-def house_qr(A, compute_q=True):
+    each panel of block_size columns is reduced a column at a time, then the
+    panel reflectors are accumulated into compact WY form and applied to the
+    trailing columns with matrix-matrix products.
+    qr and tau keep the dtype of A: float32, float64, complex64 or complex128.
+    """
+    qr = np.array(A, dtype=working_dtype(A))
+    m, n = qr.shape
+    k = min(m, n)
+    tau = np.zeros(k, dtype=qr.dtype)
+
+    for j0 in range(0, k, block_size):
+        j1 = min(j0 + block_size, k)
+
+        # reduce the panel one column at a time
+        for j in range(j0, j1):
+            v, tau[j], beta = house_reflector(qr[j:, j])
+            qr[j, j] = beta
+            qr[j+1:, j] = v[1:]
+            if j + 1 < j1:
+                w = v.conj() @ qr[j:, j+1:j1]
+                qr[j:, j+1:j1] -= np.conj(tau[j]) * np.outer(v, w)
+
+        # apply the block reflector transposed to the trailing columns
+        if j1 < n:
+            V = _house_block_v(qr, j0, j1)
+            T = house_wy_t(V, tau[j0:j1])
+            house_wy_apply(V, T, qr[j0:, j1:], transpose=True)
+
+    return qr, tau
+
+
+def house_qr_apply(qr, tau, C, transpose=False, block_size=32):
+    """apply Q (or Q.T when transpose is True, Q.H for a complex Q) from
+    `blocked_house_qr` to C without forming Q. C has m rows. returns a new
+    array.
+    """
+    C = np.array(C, dtype=solve_dtype(qr.dtype, C))
+    k = len(tau)
+    blocks = list(range(0, k, block_size))
+    # Q = H1 * H2 * ... * Hk, so Q.T applies the blocks first to last
+    # and Q applies them last to first
+    if not transpose:
+        blocks.reverse()
+    for j0 in blocks:
+        j1 = min(j0 + block_size, k)
+        V = _house_block_v(qr, j0, j1)
+        T = house_wy_t(V, tau[j0:j1])
+        house_wy_apply(V, T, C[j0:], transpose=transpose)
+    return C
+
+
+def house_form_q(qr, tau, block_size=32, full=False):
+    """form the thin Q with min(m, n) orthonormal columns
+    from `blocked_house_qr`, or the full m x m Q when full is True
+    """
+    m = qr.shape[0]
+    k = len(tau)
+    Q = np.eye(m, m if full else k, dtype=qr.dtype)
+    for j0 in reversed(range(0, k, block_size)):
+        j1 = min(j0 + block_size, k)
+        V = _house_block_v(qr, j0, j1)
+        T = house_wy_t(V, tau[j0:j1])
+        # columns left of j0 are still identity columns that
+        # are zero in rows j0 onwards, so they are unaffected
+        house_wy_apply(V, T, Q[j0:, j0:])
+    return Q
+
+
+def house_qr(A, compute_q=True, block_size=32, metrics: Metrics = None):
     """Compute R by applying Householder reflections to matrix A
-    a column at a time. The reflection will create zeros below
+    a block of columns at a time. The reflection will create zeros below
     diagonal for each column j.
 
     When compute_q is True, return Q, R.
-    Otherwise, return the U matrix that stores the v vectors.
-    
+    Otherwise, return the U matrix that stores the v vectors,
+    scaled so that each reflection is H(u, x) = x - u * (u.T * x).
+    Q and R (or U and R) are np.matrix when A is a np.matrix.
+    metrics optionally collects the timings of the factorize and form_q phases.
+
     A very good vedio that explains this algorithm
     https://www.youtube.com/watch?v=yyOXDSlY8d4&t=1002s
     """
-    if not isinstance(A, np.matrix):
-        A = np.matrix(A)
-    
-    m, n = A.shape
+    wrap = np.asmatrix if isinstance(A, np.matrix) else np.asarray
 
-    U = np.matrix(np.zeros([m, n]))
-    R = A.copy()
-
-    # the square matrix embedded in the rectangular matrix
-    for j in range(min(m, n)):
-        u = generate_house_v(R[j:, j])
-        U[j:, j] = u
-        R[j:, j:] = H(u, R[j:, j:])
-        R[j+1:, j] = 0
+    with phase(metrics, "factorize"):
+        qr, tau = blocked_house_qr(A, block_size)
+    m, n = qr.shape
+    k = min(m, n)
+    R = np.triu(qr[:k, :])
 
     # compute Q and return Q, R
     if compute_q:
-        if m == n:
-            I = np.identity(n)
-        elif m > n:
-            I = np.row_stack([np.identity(n), np.zeros([1, n])])
-        else:
-            raise NotImplementedError()
-        Q = house_apply(U, I)
-        return Q, R[:min(m, n), :min(m, n)]
-    
+        with phase(metrics, "form_q"):
+            Q = house_form_q(qr, tau, block_size)
+        return wrap(Q), wrap(R)
+
     # return U, R
     else:
-        return U, R[:min(m, n), :min(m, n)]
+        if np.iscomplexobj(qr):
+            raise ValueError("U is only defined for real A, use compute_q.")
+        U = _house_block_v(qr, 0, k) * np.sqrt(tau)
+        return wrap(U), wrap(R)
 
 # alias
 householder_reflection = house_qr
+
+
+def house_lstsq(A, b, block_size=32, metrics: Metrics = None):
+    """Solve the least squares problem min |Ax - b| for a full rank m x n A
+    with m >= n. b is a vector or a matrix with one right hand side per column.
+
+    A = QR is computed with `blocked_house_qr` and Q.T * b is applied with
+    the stored reflectors, so Q is never formed. then Rx = (Q.T * b)[:n].
+    returns x and the residual norms |Ax - b|, which are the norms of
+    (Q.T * b)[n:]. complex A or b give a complex x, using Q.H.
+    """
+    with phase(metrics, "factorize"):
+        qr, tau = blocked_house_qr(A, block_size)
+    m, n = qr.shape
+    if m < n:
+        raise ValueError("A must have at least as many rows as columns.")
+    if np.any(np.diag(qr) == 0):
+        raise ValueError("A is rank deficient.")
+    with phase(metrics, "solve"):
+        c = house_qr_apply(qr, tau, b, transpose=True, block_size=block_size)
+        x = solve_triangular(qr[:n], c[:n], lower=False)
+    return x, np.linalg.norm(c[n:], axis=0)
+
+
+class StreamingLeastSquares:
+    """least squares fit min |Ax - b| over observations that arrive in
+    batches of rows, for example from a generator. only the n x n R and
+    Q.T * b of the rows seen so far are kept, so any number of observations
+    fit in O(n^2) memory.
+
+    each new row is folded into R with n Givens rotations, which also
+    update Q.T * b and accumulate the residual sum of squares.
+    forgetting < 1 exponentially down-weights older rows, giving recursive
+    least squares with a fading memory. R is kept in dtype, promoted to
+    complex by complex rows.
+    example:
+        fit = StreamingLeastSquares(n)
+        fit.add_batches((A_batch, b_batch) for A_batch, b_batch in reader)
+        x = fit.solve()
+    """
+
+    def __init__(self, n: int, forgetting: float = 1.0, dtype=float) -> None:
+        self.n = n
+        self.forgetting = forgetting
+        self.R = np.zeros((n, n), dtype=dtype)
+        self.qtb = np.zeros(n, dtype=dtype)  # first n entries of Q.H * b
+        self.residual = 0.0  # residual sum of squares |Ax - b|^2
+        self.count = 0  # number of rows folded in
+
+    def add(self, A, b) -> None:
+        """fold a batch of rows A (k x n, or one row of length n) and
+        their right hand sides b (length k, or a scalar) into the fit
+        """
+        dtype = working_dtype(self.R, A, b)
+        A = np.atleast_2d(np.asarray(A, dtype=dtype))
+        b = np.atleast_1d(np.asarray(b, dtype=dtype))
+        if A.shape[1] != self.n or len(A) != len(b):
+            raise ValueError(f"Expecting rows of length {self.n} with one b each.")
+        scale = np.sqrt(self.forgetting)
+        # the row is extended with its b, so one rotation updates both
+        R = np.column_stack([self.R, self.qtb]).astype(dtype, copy=False)
+        for row, rhs in zip(A, b):
+            if scale != 1:
+                R *= scale
+                self.residual *= self.forgetting
+            w = np.append(row, rhs)
+            for j in range(self.n):
+                if w[j] == 0:
+                    continue
+                # the rotation [[conj(c), conj(s)], [-s, c]] is unitary
+                r = np.hypot(abs(R[j, j]), abs(w[j]))
+                c, s = R[j, j] / r, w[j] / r
+                R[j, j:], w[j:] = (np.conj(c) * R[j, j:] + np.conj(s) * w[j:],
+                                   c * w[j:] - s * R[j, j:])
+            self.residual += abs(w[self.n]) ** 2
+        self.R, self.qtb = R[:, :self.n], R[:, self.n]
+        self.count += len(A)
+
+    def add_batches(self, batches: Iterable) -> "StreamingLeastSquares":
+        """fold every (A, b) batch from an iterable such as a generator"""
+        for A, b in batches:
+            self.add(A, b)
+        return self
+
+    def solve(self) -> np.ndarray:
+        """least squares solution of the rows seen so far"""
+        if np.any(np.diag(self.R) == 0):
+            raise ValueError("Not enough observations, R is singular.")
+        return solve_triangular(self.R, self.qtb, lower=False)
+
+
+# Tall-skinny QR (TSQR)
+# reference: Demmel, Grigori, Hoemmen and Langou, Communication-optimal
+# parallel and sequential QR and LU factorizations (2012)
+#
+# the rows of A are split into chunks that are factorized independently.
+# stacking the R factors of two chunks and factorizing again gives the R
+# of both chunks together, so the R factors are combined pairwise in a
+# reduction tree until one R is left.
+
+def _tsqr_chunk_r(source, start, stop, block_size):
+    """R factor of rows start..stop of the source. the source is either
+    a path to a .npy file, which is memory mapped so only the chunk is
+    read, or the chunk itself
+    """
+    if isinstance(source, (str, os.PathLike)):
+        chunk = np.load(source, mmap_mode="r")[start:stop]
+    else:
+        chunk = source
+    qr, _ = blocked_house_qr(chunk, block_size)
+    return np.triu(qr[:min(qr.shape), :])
+
+
+def _tsqr_combine_r(R1, R2, block_size):
+    """R factor of two stacked R factors"""
+    return _tsqr_chunk_r(np.vstack([R1, R2]), None, None, block_size)
+
+
+def tsqr(A, chunk_rows=None, processes=None, block_size=32,
+         metrics: Metrics = None) -> np.ndarray:
+    """Compute R of the QR factorization of a tall-skinny matrix A with
+    the TSQR algorithm. Q is not formed.
+
+    A is either an array (including a np.memmap) or a path to a .npy file.
+    when a path is given, each worker memory maps the file and reads only
+    its own rows, so A is never fully materialized.
+    chunk_rows: number of rows per chunk. defaults to splitting the rows
+        evenly among the processes, with at least n rows per chunk.
+    processes: number of worker processes. processes=1 runs in the
+        calling process. defaults to the number of CPUs.
+    metrics: optionally collects the timings of the local and reduce phases.
+    """
+    if isinstance(A, (str, os.PathLike)):
+        m, n = np.load(A, mmap_mode="r").shape
+    else:
+        m, n = A.shape
+    if m == 0 or n == 0:
+        raise ValueError("A must have at least one row and one column.")
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if chunk_rows is None:
+        chunk_rows = max(-(-m // processes), n)
+    if chunk_rows < 1:
+        raise ValueError("chunk_rows must be positive.")
+    starts = range(0, m, chunk_rows)
+
+    def chunk_args(start):
+        stop = min(start + chunk_rows, m)
+        if isinstance(A, (str, os.PathLike)):
+            return A, start, stop, block_size
+        return A[start:stop], None, None, block_size
+
+    executor = ProcessPoolExecutor(processes) if processes > 1 else None
+    map_chunks = executor.map if executor else map
+    try:
+        with phase(metrics, "local"):
+            Rs = list(map_chunks(_tsqr_chunk_r, *zip(*map(chunk_args, starts))))
+        # combine pairs of R factors level by level in the reduction tree
+        with phase(metrics, "reduce"):
+            while len(Rs) > 1:
+                pairs = len(Rs) // 2
+                combined = map_chunks(
+                    _tsqr_combine_r, Rs[0:2*pairs:2], Rs[1:2*pairs:2],
+                    [block_size] * pairs)
+                Rs = list(combined) + Rs[2*pairs:]
+    finally:
+        if executor:
+            executor.shutdown()
+    return Rs[0]
@@ -0,0 +1,80 @@
+from typing import Iterable
+
+import numpy as np
+
+from core.arrays import as_array, solve_dtype, writable_array
+
+
+def solve_triangular(
+    T: Iterable[Iterable],
+    B: Iterable,
+    lower=False,
+    trans=False,
+    unit_diagonal=False,
+    overwrite_b=False,
+    block_size=64,
+    conjugate=False,
+) -> np.ndarray:
+    """solve TX = B, or T.T X = B when trans is True, where T is a triangular
+    matrix. B is either a vector or a matrix whose columns are separate right
+    hand sides, and the returned X has the same shape as B.
+
+    only the triangle of T selected by lower is read, so T can be a packed
+    LU matrix. when unit_diagonal is True the diagonal of T is taken to be ones.
+    when conjugate is True as well, the conjugate transpose T^H X = B is
+    solved instead. when overwrite_b is True and B is an ndarray of the dtype
+    of X, X is computed in place of B without allocating a copy. X has the
+    precision of T, float32, float64, complex64 or complex128, and is complex
+    when either T or B is.
+
+    rows are processed in blocks of block_size. inside a diagonal block the
+    solve is column oriented: once x[j] is known, column j of T is eliminated
+    from the remaining rows of the block. the rows outside the block are then
+    updated with a single matrix product.
+    """
+    T = as_array(T)
+    X = writable_array(B, solve_dtype(T.dtype, B), overwrite_b)
+    if trans:
+        # transposing swaps rows and columns without copying, and
+        # turns a lower triangular matrix into an upper triangular one
+        T = T.T
+        lower = not lower
+        if conjugate and T.dtype.kind == "c":
+            T = T.conj()
+
+    n = T.shape[0]
+    if lower:
+        for k0 in range(0, n, block_size):
+            k1 = min(k0 + block_size, n)
+            for j in range(k0, k1):
+                if not unit_diagonal:
+                    X[j] /= T[j, j]
+                X[j + 1 : k1] -= np.multiply.outer(T[j + 1 : k1, j], X[j])
+            X[k1:] -= T[k1:, k0:k1] @ X[k0:k1]
+    else:
+        for k1 in range(n, 0, -block_size):
+            k0 = max(k1 - block_size, 0)
+            for j in range(k1 - 1, k0 - 1, -1):
+                if not unit_diagonal:
+                    X[j] /= T[j, j]
+                X[k0:j] -= np.multiply.outer(T[k0:j, j], X[j])
+            X[:k0] -= T[:k0, k0:k1] @ X[k0:k1]
+    return X
+
+
+def forward_substitute(
+    L: Iterable[Iterable], B: Iterable, unit_diagonal=False, block_size=64
+) -> np.ndarray:
+    """solve LX = B where L is a lower triangular matrix"""
+    return solve_triangular(
+        L, B, lower=True, unit_diagonal=unit_diagonal, block_size=block_size
+    )
+
+
+def backward_substitute(
+    U: Iterable[Iterable], B: Iterable, unit_diagonal=False, block_size=64
+) -> np.ndarray:
+    """solve UX = B where U is an upper triangular matrix"""
+    return solve_triangular(
+        U, B, lower=False, unit_diagonal=unit_diagonal, block_size=block_size
+    )
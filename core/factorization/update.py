@@ -0,0 +1,210 @@
+from typing import Iterable, Tuple
+
+import numpy as np
+
+from core.factorization.qr import blocked_house_qr, house_form_q
+from core.factorization.triangular import solve_triangular
+
+# Updating factorizations after a small change of A instead of refactorizing
+# in O(mn^2): O(m^2) for the routines that update Q, O(n^2) for the rest.
+# reference: Golub and Van Loan, Matrix Computations, section 6.5
+#
+# the QR routines work on the full factorization A = Q * R, where Q is m x m
+# orthogonal and R is m x n upper triangular, see `full_qr`. every change of
+# R is undone with Givens rotations, which are accumulated into Q, so row
+# updates cost O(m^2) for Q. the Q-less `r_insert_row` and `r_delete_row`
+# update only the n x n R in O(n^2), for streams where m keeps growing.
+
+
+def full_qr(A, block_size=32) -> Tuple[np.ndarray, np.ndarray]:
+    """full QR factorization A = Q * R from `blocked_house_qr`, with Q m x m
+    and R m x n, as required by the update routines
+    """
+    qr, tau = blocked_house_qr(A, block_size)
+    return house_form_q(qr, tau, block_size, full=True), np.triu(qr)
+
+
+def givens(a: float, b: float) -> Tuple[float, float]:
+    """returns c and s such that [[c, s], [-s, c]] * [a, b] = [r, 0]"""
+    if b == 0:
+        return 1.0, 0.0
+    r = np.hypot(a, b)
+    return a / r, b / r
+
+
+def _rotate_pair(x, y, c, s):
+    """x, y = c * x + s * y, c * y - s * x in place"""
+    t = c * x + s * y
+    y *= c
+    y -= s * x
+    x[...] = t
+
+
+def _rotate(Q, R, i, j, c, s, col=0):
+    """apply the rotation [[c, s], [-s, c]] to rows i and j of R from column
+    col onwards, and its transpose to columns i and j of Q, so Q * R is
+    unchanged. both are updated in place through slices. Q may be None
+    """
+    _rotate_pair(R[i, col:], R[j, col:], c, s)
+    if Q is not None:
+        _rotate_pair(Q[:, i], Q[:, j], c, s)
+
+
+def _zero_below(Q, R, q):
+    """rotate the vector q along with Q * R into a multiple of e1, from the
+    bottom up. this turns an upper triangular R into upper Hessenberg
+    """
+    for j in range(len(q) - 1, 0, -1):
+        c, s = givens(q[j - 1], q[j])
+        q[[j - 1, j]] = [np.hypot(q[j - 1], q[j]), 0]
+        _rotate(Q, R, j - 1, j, c, s, col=max(j - 2, 0))
+
+
+def _hessenberg_to_triangular(Q, R, start=0):
+    """restore R from upper Hessenberg to upper triangular from column start"""
+    m, n = R.shape
+    for j in range(start, min(m - 1, n)):
+        c, s = givens(R[j, j], R[j + 1, j])
+        _rotate(Q, R, j, j + 1, c, s, col=j)
+        R[j + 1, j] = 0
+
+
+def qr_update(Q, R, u: Iterable, v: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+    """QR factorization of A + u * v.T given A = Q * R.
+    w = Q.T * u is rotated into a multiple of e1, which turns R into an upper
+    Hessenberg matrix. after the rank-one change of its first row, R is
+    restored to upper triangular with another sweep of rotations.
+    """
+    Q = np.array(Q, dtype=float)
+    R = np.array(R, dtype=float)
+    w = Q.T @ np.asarray(u, dtype=float)
+    _zero_below(Q, R, w)
+    R[0] += w[0] * np.asarray(v, dtype=float)
+    _hessenberg_to_triangular(Q, R)
+    return Q, R
+
+
+def qr_insert_row(Q, R, row: Iterable, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """QR factorization of A with row inserted before row k.
+    the row is appended below R and rotated into it, one column at a time.
+    """
+    Q = np.array(Q, dtype=float)
+    R = np.asarray(R, dtype=float)
+    m, n = R.shape
+    R = np.vstack([R, np.asarray(row, dtype=float)[None]])
+    Q_new = np.zeros((m + 1, m + 1))
+    Q_new[:m, :m] = Q
+    Q_new[m, m] = 1
+    for j in range(min(m, n)):
+        c, s = givens(R[j, j], R[m, j])
+        _rotate(Q_new, R, j, m, c, s, col=j)
+        R[m, j] = 0
+    # move the appended row of A to position k
+    order = list(range(k)) + [m] + list(range(k, m))
+    return Q_new[order], R
+
+
+def qr_delete_row(Q, R, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """QR factorization of A with row k removed.
+    row k of Q is rotated into a multiple of e1, after which the first
+    column of Q is +-e_k and the rest of the factorization no longer
+    involves row k.
+    """
+    Q = np.array(Q, dtype=float)
+    R = np.array(R, dtype=float)
+    q = Q[k].copy()
+    _zero_below(Q, R, q)
+    return np.delete(Q, k, axis=0)[:, 1:], R[1:]
+
+
+def r_insert_row(R, row: Iterable) -> np.ndarray:
+    """R of the QR factorization of A with row appended, given R of A,
+    without Q, in O(n^2). R is n x n, or k x n with k < n rows while A
+    has fewer rows than columns, and the result has one more row until n.
+    append b as the last column of A to keep Q.T * b in the last column of R.
+    """
+    R = np.asarray(R, dtype=float)
+    k, n = R.shape
+    R = np.vstack([R, np.asarray(row, dtype=float)[None]])
+    for j in range(min(k, n)):
+        c, s = givens(R[j, j], R[k, j])
+        _rotate(None, R, j, k, c, s, col=j)
+        R[k, j] = 0
+    return R[:n]
+
+
+def r_delete_row(R, row: Iterable) -> np.ndarray:
+    """R of the QR factorization of A with row removed, given the n x n R
+    of A and the values of the row, without Q, in O(n^2).
+    with R.T * a = row and rho = sqrt(1 - |a|^2), rotations that turn
+    [a, rho] into e_n+1 from the bottom up, applied to R stacked on a zero
+    row, leave the removed row in the last row and the downdated R above it.
+    raises ValueError when the remaining rows don't have full rank.
+    """
+    R = np.array(R, dtype=float)
+    n = R.shape[0]
+    a = solve_triangular(R, np.asarray(row, dtype=float), lower=False, trans=True)
+    rho2 = 1 - a @ a
+    if not rho2 > 0:
+        raise ValueError("Removing the row leaves A rank deficient.")
+    rho = np.sqrt(rho2)
+    z = np.zeros(R.shape[1])
+    for i in range(n - 1, -1, -1):
+        c, s = givens(rho, a[i])
+        rho = np.hypot(rho, a[i])
+        _rotate_pair(z[i:], R[i, i:], c, s)
+    return R
+
+
+def qr_insert_col(Q, R, col: Iterable, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """QR factorization of A with col inserted before column k.
+    the new column of R is Q.T * col, whose entries below row k are rotated
+    away from the bottom up.
+    """
+    Q = np.array(Q, dtype=float)
+    R = np.insert(np.asarray(R, dtype=float), k, Q.T @ np.asarray(col), axis=1)
+    m = R.shape[0]
+    for j in range(m - 1, k, -1):
+        c, s = givens(R[j - 1, k], R[j, k])
+        _rotate(Q, R, j - 1, j, c, s, col=k)
+        R[j, k] = 0
+    return Q, R
+
+
+def qr_delete_col(Q, R, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """QR factorization of A with column k removed.
+    removing the column leaves R upper Hessenberg from column k on,
+    which is restored to upper triangular with rotations.
+    """
+    Q = np.array(Q, dtype=float)
+    R = np.delete(np.asarray(R, dtype=float), k, axis=1)
+    _hessenberg_to_triangular(Q, R, start=k)
+    return Q, R
+
+
+def lu_update(
+    lu: np.ndarray, perm: np.ndarray, u: Iterable, v: Iterable
+) -> Tuple[np.ndarray, np.ndarray]:
+    """LU factorization of A + u * v.T given the packed factors A[perm] = LU
+    from `lu_factor`, with Bennett's algorithm in O(n^2).
+    LU + x * y.T with x = u[perm] is updated one column of L and row of U
+    at a time, carrying the rank-one remainder along.
+
+    the row permutation is kept, so there is no pivoting for the change:
+    when the updated factors grow large, factorize A + u * v.T again.
+    raises ValueError when a pivot becomes zero.
+    """
+    lu = np.array(lu, dtype=float)
+    x = np.asarray(u, dtype=float)[perm].copy()
+    y = np.array(v, dtype=float)
+    n = lu.shape[0]
+    for j in range(n):
+        x1, y1 = x[j], y[j]
+        lu[j, j] += x1 * y1
+        if lu[j, j] == 0:
+            raise ValueError("A + u * v.T is singular without pivoting.")
+        lu[j, j + 1 :] += x1 * y[j + 1 :]
+        x[j + 1 :] -= x1 * lu[j + 1 :, j]
+        lu[j + 1 :, j] += x[j + 1 :] * (y1 / lu[j, j])
+        y[j + 1 :] -= (y1 / lu[j, j]) * lu[j, j + 1 :]
+    return lu, perm.copy()
@@ -0,0 +1,82 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Iterable
+
+
+class Metrics:
+    """collects structured measurements from solvers, factorizations,
+    root finders and optimizers: accumulated per-phase timings, counters
+    such as iteration counts, and series of recorded values such as
+    residuals or pivot growth.
+
+    callbacks are called as callback(event, data) for every measurement,
+    where event is "phase", "count" or "record" and data is a dict.
+
+    classes and functions take metrics=None by default, in which case no
+    measurement is taken at all.
+    example:
+        metrics = Metrics()
+        solver = GuassSeidelSolver(metrics=metrics)
+        solver.set(A)
+        solver.solve()
+        metrics.counts["iterations"], metrics.values["residual"]
+    """
+
+    def __init__(self, callbacks: Iterable[Callable] = ()) -> None:
+        self.timings = defaultdict(float)  # seconds spent in each phase
+        self.counts = defaultdict(int)
+        self.values = defaultdict(list)
+        self.callbacks = list(callbacks)
+
+    @contextmanager
+    def phase(self, name: str):
+        """time the enclosed block and add it to the timing of phase name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] += elapsed
+            self.emit("phase", name=name, elapsed=elapsed)
+
+    def count(self, name: str, n: int = 1) -> None:
+        """increase counter name by n"""
+        self.counts[name] += n
+        self.emit("count", name=name, n=n)
+
+    def record(self, name: str, value) -> None:
+        """append value to the series name"""
+        self.values[name].append(value)
+        self.emit("record", name=name, value=value)
+
+    def emit(self, event: str, **data) -> None:
+        """pass a measurement to every callback"""
+        for callback in self.callbacks:
+            callback(event, data)
+
+    def reset(self) -> None:
+        """clear every measurement"""
+        self.timings.clear()
+        self.counts.clear()
+        self.values.clear()
+
+    def summary(self) -> dict:
+        """plain dict of every measurement, for example to dump as JSON"""
+        return {
+            "timings": dict(self.timings),
+            "counts": dict(self.counts),
+            "values": {name: list(values) for name, values in self.values.items()},
+        }
+
+
+_NO_PHASE = nullcontext()
+
+
+def phase(metrics, name: str):
+    """time a block with metrics.phase(name), or do nothing when metrics
+    is None. usage: with phase(self.metrics, "factorize"): ...
+    """
+    if metrics is None:
+        return _NO_PHASE
+    return metrics.phase(name)
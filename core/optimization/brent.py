@@ -0,0 +1,98 @@
+import logging
+import math
+
+from core.instrumentation import Metrics
+from core.optimization.cache import cached
+
+GOLDEN = (3 - math.sqrt(5)) / 2
+
+
+def brent(
+    f: callable,
+    a: float,
+    x: float,
+    b: float,
+    tol: float = 1e-6,
+    max_iter: int = 500,
+    cache_size: int = 128,
+    metrics: Metrics = None,
+):
+    """Brent's method for solving the maximum value of a function f
+    on the interval [a, b].
+    every iteration tries a parabolic interpolation step through the three
+    best points, and falls back to a golden-section step when the parabola
+    degenerates, steps outside the bracket or doesn't shrink fast enough,
+    so the bracket is guaranteed to shrink. each iteration evaluates f once.
+
+    f: callable function f to be solved for the maxima. evaluated through
+        a CachedFunction, pass one to share its cache
+    a, b: the interval that brackets the maximum
+    x: initial guess inside the interval
+    tol: stopping criteria for relative size of the interval
+    max_iter: maximum number of iterations
+    cache_size: size of the cache of evaluations when f isn't cached yet
+    metrics: optionally collects iteration counts and evaluations
+    """
+    f = cached(f, cache_size, metrics)
+    a, b = min(a, b), max(a, b)
+    if not a <= x <= b:
+        raise ValueError("x must be inside the interval [a, b].")
+
+    # minimize -f. x is the best point, w the second best and v the previous w
+    v = w = x
+    fv = fw = fx = -f(x)
+    d = e = 0.0
+    for it in range(1, max_iter + 1):
+        m = (a + b) / 2
+        tol1 = tol * abs(x) + 1e-10
+        tol2 = 2 * tol1
+        if abs(x - m) <= tol2 - (b - a) / 2:
+            return x
+
+        golden = True
+        if abs(e) > tol1:
+            # parabola through x, w and v
+            r = (x - w) * (fx - fv)
+            q = (x - v) * (fx - fw)
+            p = (x - v) * q - (x - w) * r
+            q = 2 * (q - r)
+            if q > 0:
+                p = -p
+            q = abs(q)
+            e_prev, e = e, d
+            if abs(p) < abs(0.5 * q * e_prev) and q * (a - x) < p < q * (b - x):
+                d = p / q
+                u = x + d
+                if u - a < tol2 or b - u < tol2:
+                    d = math.copysign(tol1, m - x)
+                golden = False
+        if golden:
+            e = (a - x) if x >= m else (b - x)
+            d = GOLDEN * e
+
+        u = x + d if abs(d) >= tol1 else x + math.copysign(tol1, d)
+        fu = -f(u)
+        if fu <= fx:
+            if u >= x:
+                a = x
+            else:
+                b = x
+            v, w, x = w, x, u
+            fv, fw, fx = fw, fx, fu
+        else:
+            if u < x:
+                a = u
+            else:
+                b = u
+            if fu <= fw or w == x:
+                v, w = w, u
+                fv, fw = fw, fu
+            elif fu <= fv or v == x or v == w:
+                v, fv = u, fu
+
+        if metrics is not None:
+            metrics.count("iterations")
+            metrics.record("interval", b - a)
+        logging.info(f"iter {it}: a={a:.6f}; x={x:.6f}; b={b:.6f}; golden={golden}")
+
+    raise ValueError("Brent's method doesn't converge.")
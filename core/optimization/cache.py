@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Iterable, List
+
+from core.evaluation import evaluate
+from core.instrumentation import Metrics
+
+
+class CachedFunction:
+    """memoizes an expensive function f of one hashable argument with a
+    bounded least recently used cache of maxsize entries.
+    every optimizer in core.optimization evaluates f through this class,
+    and passing the same CachedFunction to several optimizers shares the cache.
+
+    hits and misses count the calls answered from the cache and the
+    evaluations of f. metrics optionally counts them as well.
+    example:
+        f = CachedFunction(simulate, maxsize=256)
+        x = parabolic(f, 0, 1, 4)
+        x = brent(f, 0, x, 4)
+        f.hits, f.misses
+    """
+
+    def __init__(
+        self, f: callable, maxsize: int = 128, metrics: Metrics = None
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive.")
+        self.f = f
+        self.maxsize = maxsize
+        self.metrics = metrics
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def __call__(self, x):
+        return self.map([x])[0]
+
+    def map(self, xs: Iterable, executor: Executor = None) -> List:
+        """f(x) for every x in xs. the points missing from the cache are
+        evaluated concurrently with `core.evaluation.evaluate`, on executor
+        or with asyncio when f is an async function.
+        """
+        xs = list(xs)
+        results = {}
+        for x in dict.fromkeys(xs):
+            if x in self._cache:
+                self._cache.move_to_end(x)
+                results[x] = self._cache[x]
+        self.hits += len(results)
+
+        missing = [x for x in dict.fromkeys(xs) if x not in results]
+        values = evaluate([(self.f, x) for x in missing], executor)
+        self.misses += len(missing)
+        for x, value in zip(missing, values):
+            results[x] = self._cache[x] = value
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+        if self.metrics is not None:
+            if len(results) > len(missing):
+                self.metrics.count("cache_hits", len(results) - len(missing))
+            if missing:
+                self.metrics.count("evaluations", len(missing))
+        return [results[x] for x in xs]
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def clear(self) -> None:
+        """remove every cached value and reset the counters"""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+def cached(f: callable, maxsize: int = 128, metrics: Metrics = None) -> CachedFunction:
+    """wrap f in a CachedFunction, or return f when it's already one
+    so that its cache is shared
+    """
+    if isinstance(f, CachedFunction):
+        return f
+    return CachedFunction(f, maxsize, metrics)
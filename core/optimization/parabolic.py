@@ -1,7 +1,23 @@
 import logging
 
+from concurrent.futures import Executor
 
-def parabolic(f: callable, x0: float, x1: float, x2: float, tol: float = 1e-6):
+from core.instrumentation import Metrics
+from core.optimization.brent import brent
+from core.optimization.cache import cached
+
+
+def parabolic(
+    f: callable,
+    x0: float,
+    x1: float,
+    x2: float,
+    tol: float = 1e-6,
+    metrics: Metrics = None,
+    method: str = "parabolic",
+    cache_size: int = 128,
+    executor: Executor = None,
+):
     """parabolic interpolation method for solving maximum value
     of a function f.
     f: callable function f to be solved for the maxima
@@ -9,7 +25,24 @@ def parabolic(f: callable, x0: float, x1: float, x2: float, tol: float = 1e-6):
     x1: initial guess point two
     x2: initial guess point three
     tol: stopping criteria for relative approximation error
+    metrics: optionally collects iteration counts and approximation errors
+    method: "parabolic" for plain parabolic interpolation, or "brent" for
+        Brent's method on [x0, x2] starting from x1, which falls back to
+        golden-section steps when the parabola degenerates
+    cache_size: size of the cache of evaluations when f isn't cached yet
+    executor: optional concurrent.futures.Executor. the interpolation points
+        missing from the cache are evaluated concurrently on it. f may also
+        be an async function. Brent's method evaluates one point at a time
+
+    f is evaluated through a CachedFunction, so each iteration evaluates
+    f only at the new point. pass a CachedFunction to share its cache.
     """
+    f = cached(f, cache_size, metrics)
+    if method == "brent":
+        return brent(f, x0, x1, x2, tol, metrics=metrics)
+    if method != "parabolic":
+        raise ValueError(f"Unknown method {method}")
+
     def g1(x, a, b):
         """helper function for evaluating the numerators"""
         return f(x) * (a ** 2 - b ** 2)
@@ -22,12 +55,16 @@ def parabolic(f: callable, x0: float, x1: float, x2: float, tol: float = 1e-6):
     it = 0
     while abs(ea) >= tol:
         it += 1
+        f.map([x0, x1, x2], executor)
         numerator = g1(x0, x1, x2) + g1(x1, x2, x0) + g1(x2, x0, x1)
         denominator = g2(x0, x1, x2) + g2(x1, x2, x0) + g2(x2, x0, x1)
         
         x3 = numerator / denominator
 
         ea = (x3 - x1) / x3
+        if metrics is not None:
+            metrics.count("iterations")
+            metrics.record("approx_error", ea)
 
         # update x0, x1, x2
         # below is the simple update. 
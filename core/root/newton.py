@@ -1,7 +1,16 @@
 import logging
+from concurrent.futures import Executor
 
+import numpy as np
 
-def newton(f: callable, g: callable, x0: float, tol: float = 1e-6):
+from core.evaluation import evaluate
+from core.instrumentation import Metrics
+
+
+def newton(
+    f: callable, g: callable, x0: float, tol: float = 1e-6, metrics: Metrics = None,
+    executor: Executor = None
+):
     """use Newton's method to locate the root of a 1-d function
     this finds the root iteratively by evaluating:
     x(i+1) = x(i) - f(x(i)) / f'(x(i))
@@ -10,15 +19,93 @@ def newton(f: callable, g: callable, x0: float, tol: float = 1e-6):
     g: the first derivative function to f. ie: g = f'(x)
     x0: initial guess
     tol: the stopping criteria when relative error is smaller than tolerance
+    metrics: optionally collects iteration counts and approximation errors
+    executor: optional concurrent.futures.Executor to evaluate f and g at the
+        same point concurrently. f and g may also be async functions
     """
     old = x0
     ea = 1
 
     while abs(ea) >= tol:
-        new = old - f(old) / g(old)
+        fx, gx = evaluate([(f, old), (g, old)], executor)
+        new = old - fx / gx
         ea = (new - old) / new
         old = new
+        if metrics is not None:
+            metrics.count("iterations")
+            metrics.record("approx_error", ea)
         logging.debug(f"new={new:}; old={old}; approx error={ea}")
         # print(f"new value={new};  old={old}; approx error={ea}")
 
     return new
+
+
+def _complex_step(f: callable, x, h):
+    """derivative of a real analytic f by the complex step f'(x) = Im(f(x + ih)) / h,
+    accurate to machine precision since there is no subtractive cancellation
+    """
+    return np.imag(f(x + 1j * h)) / h
+
+
+def _finite_difference(f: callable, x, h):
+    """derivative of f by central differences with a step scaled to x"""
+    step = h * np.maximum(1, np.abs(x))
+    return (f(x + step) - f(x - step)) / (2 * step)
+
+
+DERIVATIVES = {
+    "complex_step": (_complex_step, 1e-20),
+    "finite_difference": (_finite_difference, np.finfo(float).eps ** (1 / 3)),
+}
+
+
+def newton_vectorized(
+    f: callable, x0, g: callable = None, tol: float = 1e-6, max_iter: int = 100,
+    derivative: str = "complex_step", metrics: Metrics = None,
+    executor: Executor = None
+):
+    """use Newton's method to locate the roots of a 1-d function from an array
+    of initial guesses, iterating all points together.
+
+    f: vectorized function. f(x) is evaluated on arrays of the active points
+    x0: array of initial guesses
+    g: vectorized first derivative of f. computed automatically when None
+    tol: the stopping criteria when relative error is smaller than tolerance
+    max_iter: the maximum number of iterations
+    derivative: how g is computed when it's not given:
+        "complex_step": Im(f(x + ih)) / h. f must accept complex arrays
+        "finite_difference": central differences
+    metrics: optionally collects iteration counts and the number of active points
+    executor: optional concurrent.futures.Executor to evaluate f and g
+        concurrently. f and g may also be async functions when g is given
+
+    returns the array of roots and a boolean array marking the points that
+    converged. points that stopped with a nan or inf aren't converged.
+    """
+    x = np.array(x0, dtype=float)
+    if g is None:
+        if derivative not in DERIVATIVES:
+            raise ValueError(f"Unknown derivative {derivative}")
+        method, h = DERIVATIVES[derivative]
+        g = lambda x: method(f, x, h)
+
+    active = np.ones(x.shape, dtype=bool)
+    failed = np.zeros(x.shape, dtype=bool)
+    iter = 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        while active.any() and iter < max_iter:
+            old = x[active]
+            fx, gx = evaluate([(f, old), (g, old)], executor)
+            new = old - fx / gx
+            ea = np.abs(new - old) / np.where(new == 0, 1, np.abs(new))
+            x[active] = new
+
+            failed[active] = ~np.isfinite(new)
+            active[active] = np.isfinite(new) & (ea >= tol)
+            iter += 1
+            if metrics is not None:
+                metrics.count("iterations")
+                metrics.record("active", int(active.sum()))
+            logging.debug(f"iter={iter}; active={active.sum()}")
+
+    return x, ~active & ~failed
@@ -2,6 +2,8 @@ import numpy as np
 
 from typing import Iterable
 
+from core.instrumentation import Metrics
+
 
 class BairstowSolver:
     """class that implements Bairstow's Method to solve real and imaginary roots
@@ -9,48 +11,144 @@ class BairstowSolver:
     https://archive.nptel.ac.in/content/storage2/courses/122104019/numerical-analysis/Rathish-kumar/ratish-1/f3node9.html
     """
 
-    def __init__(self, er: float, es: float):
-        """er and es are stopping criterion"""
+    def __init__(self, er: float, es: float, verbose=False, metrics: Metrics = None):
+        """er and es are stopping criterion. verbose prints every iteration.
+        metrics optionally collects iteration counts and approximation errors
+        """
         self.er_threshold = er
         self.es_threshold = es
         self.roots = []
+        self.converged = None  # convergence mask of the last `solve_batch`
+        self.verbose = verbose
+        self.metrics = metrics
 
     def solve(self, a: Iterable, r: float, s: float):
         """solves roots for real polynomials. a is an array of coef of the polynomial to be solved.
         a[n] is the coef of degree n. ex: [4, -10, 10, -5, 1] stands for x^4 -5x^3 +10x^2 -10x + 4
         r and s are the two initial guesses of the algorithm.
         The algorithms solves two roots at a time and reduces the degree of order by 2.
+        returns the solved roots.
         """
         # clear pervious results
         self.roots = []
         # use the algorithm when degree > 3
         while len(a) > 3:
-            print(f"Solving polynomial a={a}")
-            print("=" * 50)
+            self.print_if_verbose(f"Solving polynomial a={a}")
+            self.print_if_verbose("=" * 50)
             roots, a = self._solve_bairstow(a, r, s)
-            print(f"Solved roots: {roots}")
+            self.print_if_verbose(f"Solved roots: {roots}\n")
             self.roots.extend(roots)
-            print()
 
         if len(a) == 3:
-            print(f"Solving polynomial a={a}")
-            print("=" * 50)
+            self.print_if_verbose(f"Solving polynomial a={a}")
+            self.print_if_verbose("=" * 50)
             roots = self._solve_quadratic(a[2], a[1], a[0])
-            print(f"Solved roots: {roots}")
+            self.print_if_verbose(f"Solved roots: {roots}\n")
             self.roots.extend(roots)
-            print()
 
         elif len(a) == 2:
-            print(f"Solving polynomial a={a}")
-            print("=" * 50)
+            self.print_if_verbose(f"Solving polynomial a={a}")
+            self.print_if_verbose("=" * 50)
             roots = self._solve_quadratic(0, a[1], a[0])
-            print(f"Solved roots: {roots}")
+            self.print_if_verbose(f"Solved roots: {roots}\n")
             self.roots.extend(roots)
-            print()
 
-        print("Final solved roots")
-        print("=" * 50)
-        self.show()
+        if self.verbose:
+            print("Final solved roots")
+            print("=" * 50)
+            self.show()
+        return self.roots
+
+    def print_if_verbose(self, message):
+        """print the given message if verbose"""
+        if self.verbose:
+            print(message)
+
+    def solve_batch(self, A: Iterable[Iterable], r=0.5, s=-0.5, max_iter=100):
+        """solves the roots of a batch of real polynomials of the same degree at once.
+        A is a batch * (degree + 1) array where A[k] holds the coef of polynomial k
+        in the same order as `solve`. r and s are the initial guesses, either scalars
+        or arrays with one guess per polynomial.
+
+        the b and c recurrences, the 2x2 increment and the deflation are vectorized
+        across the batch. each quadratic factor is iterated until every polynomial
+        meets the er and es criterion or max_iter is reached.
+        returns the batch * degree array of complex roots. `converged` is set to a
+        boolean mask of the polynomials whose every factor met the criterion.
+        """
+        a = np.array(A, dtype=float)
+        if a.ndim != 2 or a.shape[1] < 2:
+            raise ValueError("Expecting a batch * (degree + 1) array of coef")
+        batch, degree = a.shape[0], a.shape[1] - 1
+        roots = np.empty((batch, degree), dtype=complex)
+        self.converged = np.ones(batch, dtype=bool)
+
+        # use the algorithm when degree > 3, two roots at a time
+        col = 0
+        while a.shape[1] > 3:
+            rs, ss, converged = self._solve_bairstow_batch(a, r, s, max_iter)
+            self.converged &= converged
+            roots[:, col : col + 2] = self._solve_quadratic_batch(1, -rs, -ss)
+            a = self._solve_coef_b_batch(a, rs, ss)[:, 2:]
+            col += 2
+
+        if a.shape[1] == 3:
+            roots[:, col:] = self._solve_quadratic_batch(a[:, 2], a[:, 1], a[:, 0])
+        elif a.shape[1] == 2:
+            roots[:, col] = -a[:, 0] / a[:, 1]
+        return roots
+
+    def _solve_bairstow_batch(self, a: np.ndarray, r, s, max_iter):
+        """iterate r and s of the quadratic factor x^2 - r*x - s for every
+        polynomial in the batch. returns r, s and the converged mask
+        """
+        batch = a.shape[0]
+        r = np.array(np.broadcast_to(r, batch), dtype=float)
+        s = np.array(np.broadcast_to(s, batch), dtype=float)
+        active = np.ones(batch, dtype=bool)
+        failed = np.zeros(batch, dtype=bool)
+        iter = 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            while active.any() and iter < max_iter:
+                b = self._solve_coef_b_batch(a, r, s)
+                c = self._solve_coef_b_batch(b, r, s, stop=1)
+                # closed form solution of [[c2, c3], [c1, c2]] [dr, ds] = [-b1, -b0]
+                det = c[:, 2] * c[:, 2] - c[:, 3] * c[:, 1]
+                dr = (-b[:, 1] * c[:, 2] + b[:, 0] * c[:, 3]) / det
+                ds = (-b[:, 0] * c[:, 2] + b[:, 1] * c[:, 1]) / det
+                r = np.where(active, r + dr, r)
+                s = np.where(active, s + ds, s)
+                er, es = self._compute_error(r, s, dr, ds)
+
+                failed |= active & ~(np.isfinite(r) & np.isfinite(s))
+                active &= ~failed & (
+                    (er > self.er_threshold) | (es > self.es_threshold)
+                )
+                iter += 1
+                if self.metrics is not None:
+                    self.metrics.count("iterations")
+                    self.metrics.record("active", int(active.sum()))
+        return r, s, ~active & ~failed
+
+    def _solve_coef_b_batch(self, a: np.ndarray, r: np.ndarray, s: np.ndarray, stop=0):
+        """vectorized b recurrence b[i] = a[i] + r * b[i+1] + s * b[i+2] for every
+        polynomial in the batch, from the leading coef down to index stop.
+        with stop=1 this gives the c recurrence on b. entries below stop are nan
+        """
+        batch, l = a.shape
+        # two zero columns above the leading coef start the recurrence
+        b = np.zeros((batch, l + 2))
+        b[:, :stop] = np.nan
+        for i in range(l - 1, stop - 1, -1):
+            b[:, i] = a[:, i] + r * b[:, i + 1] + s * b[:, i + 2]
+        return b[:, :l]
+
+    def _solve_quadratic_batch(self, a, b, c):
+        """vectorized roots of a*x^2 + b*x + c = 0, returns a batch * 2 array"""
+        sqrt_term = np.sqrt(np.asarray(b**2 - 4 * a * c, dtype=complex))
+        return np.stack(
+            [(-b + sqrt_term) / (2 * a), (-b - sqrt_term) / (2 * a)], axis=1
+        )
 
     def show(self):
         """display solved roots in a nice foramt"""
@@ -76,15 +174,18 @@ class BairstowSolver:
             r, s = r + dr, s + ds
             er, es = self._compute_error(r, s, dr, ds)
             iter += 1
+            if self.metrics is not None:
+                self.metrics.count("iterations")
+                self.metrics.record("approx_error", max(er, es))
             # print(f"iter={iter}; b={b}; c={c}; dr={dr:.3f}; ds={ds:.3f}; r={r:.3f}; s={s:.3f}; er={er:.3f}; es={es:.3f}")
-            print(
+            self.print_if_verbose(
                 f"iter={iter}; dr={dr:.3f}; ds={ds:.3f}; r={r:.3f}; s={s:.3f}; er={er:.3f}; es={es:.3f}"
             )
 
         # compute the two roots
         roots = self._solve_quadratic(1, -r, -s)
-        print(f"Criterion met after {iter} iterations.")
-        print(f"New coef to solve b={b[2:]}")
+        self.print_if_verbose(f"Criterion met after {iter} iterations.")
+        self.print_if_verbose(f"New coef to solve b={b[2:]}")
         return roots, b[2:]
 
     def _solve_coef_b(self, a: Iterable, r: float, s: float):
@@ -0,0 +1,303 @@
+from typing import Iterable
+
+import numpy as np
+
+from core.arrays import as_array, working_dtype
+from core.instrumentation import Metrics, phase
+from core.solver.solver import Solver
+
+
+def dense_to_banded(A: Iterable[Iterable], lower: int, upper: int) -> np.ndarray:
+    """convert a dense matrix with lower subdiagonals and upper superdiagonals
+    to diagonal-ordered storage ab, where ab[upper + i - j, j] = A[i, j].
+    a stack of matrices with shape batch * N * N is converted to
+    batch * (lower + upper + 1) * N. ab has the dtype of A.
+    """
+    A = as_array(A)
+    n = A.shape[-1]
+    ab = np.zeros(A.shape[:-2] + (lower + upper + 1, n), dtype=A.dtype)
+    for k in range(-lower, upper + 1):
+        # diagonal k holds A[i, i + k], stored in row upper - k
+        j = np.arange(max(k, 0), min(n + k, n))
+        ab[..., upper - k, j] = A[..., j - k, j]
+    return ab
+
+
+class BandedSolver(Solver):
+    """class that solves banded linear systems with LU decomposition and
+    partial pivoting, in O(N * lower * (lower + upper)) operations instead of
+    O(N^3). the coefficient matrix is given in diagonal-ordered storage
+    ab[upper + i - j, j] = A[i, j], see `dense_to_banded`.
+
+    a stack of systems of the same size and bandwidths is solved at once,
+    with the elimination vectorized across the stack. systems whose matrix is
+    singular are flagged in `singular` and get nan solutions.
+    the factorization is computed on the first call to solve and reused
+    for any further right hand sides.
+    the systems are solved in the dtype of ab and b: float32, float64,
+    complex64 or complex128.
+    """
+
+    def __init__(self, verbose=False, metrics: Metrics = None) -> None:
+        super().__init__(verbose, metrics)
+        self.ab = None  # diagonal-ordered coefficients, batch * bands * N
+        self.b = None  # right hand sides, batch * N
+        self.lower = None
+        self.upper = None
+        self.batch = None  # number of systems, None for a single system
+        self.singular = None  # boolean mask of singular systems
+        self.factors = None  # packed banded LU factors with pivots
+
+    def set(self, ab: Iterable, b: Iterable, lower=1, upper=1) -> None:
+        """set up the banded system(s) Ax = b. ab has shape
+        (lower + upper + 1) * N for a single system with b of length N,
+        or batch * (lower + upper + 1) * N with b of shape batch * N.
+        """
+        self.ab, self.b, self.batch = _as_batch(ab, b, lower + upper + 1)
+        self.lower = lower
+        self.upper = upper
+        self.N = self.ab.shape[2]
+        self.singular = np.zeros(self.ab.shape[0], dtype=bool)
+        self.factors = None
+        self.print_matrix_if_verbose(self.ab, title="Banded System Set Up")
+
+    def solve(self, b: Iterable = None) -> np.ndarray:
+        """solve the banded system(s). b optionally supplies other right
+        hand sides with the same shape as the b passed to set
+        """
+        if self.factors is None:
+            with phase(self.metrics, "factorize"):
+                self.factors = self._factorize()
+            if self.metrics is not None:
+                self.metrics.count("singular", int(self.singular.sum()))
+        b = _as_rhs(b, self.b, self.batch)
+        with phase(self.metrics, "substitute"):
+            x = self._substitute(b)
+        x[self.singular] = np.nan
+        x = x if self.batch is not None else x[0]
+        self.print_vector_if_verbose(x, title="Solved Solution")
+        return x
+
+    def _factorize(self):
+        """vectorized banded LU with partial pivoting. the factors are kept
+        in LAPACK's gbtrf layout AB[kv + i - j, j] with kv = lower + upper, so
+        U gets room for the lower extra superdiagonals of fill from row swaps
+        """
+        l, u, n = self.lower, self.upper, self.N
+        batch = self.ab.shape[0]
+        kv = l + u
+        AB = np.zeros((batch, 2 * l + u + 1, n), dtype=self.ab.dtype)
+        AB[:, l:] = self.ab
+        pivots = np.empty((batch, n), dtype=np.intp)
+        systems = np.arange(batch)[:, None]
+        # pivots below this size are treated as zero for each system
+        tolerance = n * np.finfo(AB.dtype).eps * np.abs(self.ab).max(axis=(1, 2))
+
+        for i in range(n):
+            last = min(i + l, n - 1)
+            cols = np.arange(i, min(i + kv, n - 1) + 1)
+
+            # swap row i with the row holding the largest pivot candidate
+            p = np.abs(AB[:, kv : kv + last - i + 1, i]).argmax(axis=1) + i
+            pivots[:, i] = p
+            row_i = kv + i - cols
+            row_p = kv + p[:, None] - cols
+            temp = AB[:, row_i, cols]
+            AB[:, row_i, cols] = AB[systems, row_p, cols]
+            AB[systems, row_p, cols] = temp
+
+            pivot = AB[:, kv, i]
+            self.singular |= np.abs(pivot) <= tolerance
+            pivot = np.where(self.singular, 1.0, pivot)
+            AB[:, kv, i] = pivot
+
+            # eliminate the rows below the pivot within the band
+            if last > i:
+                rows = np.arange(i + 1, last + 1)
+                AB[:, kv + rows - i, i] /= pivot[:, None]
+                cols = cols[1:]
+                AB[:, kv + rows[:, None] - cols, cols] -= (
+                    AB[:, kv + rows - i, i][:, :, None]
+                    * AB[:, None, kv + i - cols, cols]
+                )
+        return AB, pivots
+
+    def _substitute(self, b: np.ndarray) -> np.ndarray:
+        """forward and backward substitution with the banded factors"""
+        AB, pivots = self.factors
+        l, n = self.lower, self.N
+        kv = l + self.upper
+        systems = np.arange(len(b))
+        x = np.array(b, dtype=working_dtype(AB, b))
+
+        for i in range(n):
+            p = pivots[:, i]
+            temp = x[:, i].copy()
+            x[:, i] = x[systems, p]
+            x[systems, p] = temp
+            rows = np.arange(i + 1, min(i + l, n - 1) + 1)
+            x[:, rows] -= AB[:, kv + rows - i, i] * x[:, i : i + 1]
+
+        for i in reversed(range(n)):
+            cols = np.arange(i + 1, min(i + kv, n - 1) + 1)
+            x[:, i] -= np.einsum("bj,bj->b", AB[:, kv + i - cols, cols], x[:, cols])
+            x[:, i] /= AB[:, kv, i]
+        return x
+
+
+class TridiagonalSolver(Solver):
+    """class that solves tridiagonal linear systems with the Thomas algorithm
+    in O(N) operations. the coefficients are in diagonal-ordered storage
+    with lower = upper = 1:
+        ab[0, 1:] is the superdiagonal A[i, i + 1]
+        ab[1] is the main diagonal A[i, i]
+        ab[2, :-1] is the subdiagonal A[i + 1, i]
+    there is no pivoting, so the matrix should be diagonally dominant or
+    symmetric positive definite, as for splines and 1-d diffusion. use
+    `BandedSolver` otherwise.
+
+    a stack of systems is solved at once, with the recurrences vectorized
+    across the stack. systems that hit a zero pivot are flagged in `singular`
+    and get nan solutions. the dtype of ab and b is kept, as in
+    `BandedSolver`.
+    """
+
+    def __init__(self, verbose=False, metrics: Metrics = None) -> None:
+        super().__init__(verbose, metrics)
+        self.ab = None  # diagonal-ordered coefficients, batch * 3 * N
+        self.b = None  # right hand sides, batch * N
+        self.batch = None  # number of systems, None for a single system
+        self.singular = None  # boolean mask of singular systems
+
+    def set(self, ab: Iterable, b: Iterable) -> None:
+        """set up the tridiagonal system(s) Ax = b. ab has shape 3 * N for a
+        single system with b of length N, or batch * 3 * N with b of shape
+        batch * N.
+        """
+        self.ab, self.b, self.batch = _as_batch(ab, b, 3)
+        self.N = self.ab.shape[2]
+        self.singular = np.zeros(self.ab.shape[0], dtype=bool)
+        self.print_matrix_if_verbose(self.ab, title="Tridiagonal System Set Up")
+
+    def solve(self, b: Iterable = None) -> np.ndarray:
+        """solve the tridiagonal system(s). b optionally supplies other right
+        hand sides with the same shape as the b passed to set
+        """
+        b = _as_rhs(b, self.b, self.batch)
+        with phase(self.metrics, "solve"):
+            x = self._solve(b)
+        return self._finish(x)
+
+    def _solve(self, b: np.ndarray) -> np.ndarray:
+        ab = self.ab
+        x, singular = _thomas(ab[:, 2, :-1], ab[:, 1], ab[:, 0, 1:], b[:, :, None])
+        self.singular = singular
+        return x[:, :, 0]
+
+    def _finish(self, x: np.ndarray) -> np.ndarray:
+        x[self.singular] = np.nan
+        if self.metrics is not None:
+            self.metrics.count("singular", int(self.singular.sum()))
+        x = x if self.batch is not None else x[0]
+        self.print_vector_if_verbose(x, title="Solved Solution")
+        return x
+
+
+class CyclicTridiagonalSolver(TridiagonalSolver):
+    """class that solves cyclic tridiagonal systems, which arise from
+    periodic boundary conditions, e.g. for closed splines. A is tridiagonal
+    plus the corners A[0, N - 1] and A[N - 1, 0]. they are stored where the
+    diagonal-ordered storage wraps around:
+        ab[0, 0] is A[N - 1, 0], the superdiagonal wrapped to row -1
+        ab[2, -1] is A[0, N - 1], the subdiagonal wrapped to row N
+    the corners are handled with the Sherman-Morrison formula, so the cost is
+    two Thomas solves sharing one elimination. N must be at least 3.
+    """
+
+    def set(self, ab: Iterable, b: Iterable) -> None:
+        super().set(ab, b)
+        if self.N < 3:
+            raise ValueError("Expecting at least 3 equations for cyclic system.")
+
+    def _solve(self, b: np.ndarray) -> np.ndarray:
+        ab = self.ab
+        alpha = ab[:, 0, 0]  # A[N - 1, 0]
+        beta = ab[:, 2, -1]  # A[0, N - 1]
+        diagonal = ab[:, 1].copy()
+        gamma = np.where(diagonal[:, 0] != 0, -diagonal[:, 0], -1.0)
+        # A = T + u v.T with u = (gamma, 0, ..., 0, alpha), v = (1, 0, ..., 0, beta / gamma)
+        diagonal[:, 0] -= gamma
+        diagonal[:, -1] -= alpha * beta / gamma
+        rhs = np.zeros(b.shape + (2,), dtype=working_dtype(ab, b))
+        rhs[:, :, 0] = b
+        rhs[:, 0, 1] = gamma
+        rhs[:, -1, 1] = alpha
+        y, singular = _thomas(ab[:, 2, :-1], diagonal, ab[:, 0, 1:], rhs)
+        x, z = y[:, :, 0], y[:, :, 1]
+
+        ratio = beta / gamma
+        denominator = 1 + z[:, 0] + ratio * z[:, -1]
+        singular |= denominator == 0
+        denominator = np.where(singular, 1.0, denominator)
+        factor = (x[:, 0] + ratio * x[:, -1]) / denominator
+        self.singular = singular
+        return x - factor[:, None] * z
+
+
+def _as_batch(ab, b, bands):
+    """returns ab as batch * bands * N, b as batch * N, and the batch size
+    or None when a single system was given. both are in the working dtype
+    of ab and b
+    """
+    dtype = working_dtype(ab, b)
+    ab = as_array(ab, dtype)
+    b = as_array(b, dtype)
+    batch = None if ab.ndim == 2 else ab.shape[0]
+    if ab.ndim == 2:
+        ab, b = ab[None], b[None]
+    if ab.ndim != 3 or ab.shape[1] != bands:
+        raise ValueError(f"Expecting {bands} diagonals in ab")
+    if b.shape != (ab.shape[0], ab.shape[2]):
+        raise ValueError("Expecting one right hand side element per equation")
+    return ab, b, batch
+
+
+def _as_rhs(b, default, batch):
+    """returns the right hand sides b, or default when b is None, as batch * N"""
+    if b is None:
+        return default
+    b = as_array(b, working_dtype(default, b))
+    if batch is None:
+        b = b[None]
+    if b.shape != default.shape:
+        raise ValueError("Expecting one right hand side element per equation")
+    return b
+
+
+def _thomas(sub, diagonal, sup, B):
+    """vectorized Thomas algorithm. sub, diagonal and sup are batch * (N - 1),
+    batch * N and batch * (N - 1), B is batch * N * k right hand sides.
+    returns the solutions and the mask of systems with a zero pivot
+    """
+    batch, n, k = B.shape
+    dtype = working_dtype(diagonal, B)
+    c = np.empty((batch, n), dtype=dtype)
+    d = np.empty((batch, n, k), dtype=dtype)
+    singular = np.zeros(batch, dtype=bool)
+
+    pivot = diagonal[:, 0]
+    for i in range(n):
+        if i > 0:
+            pivot = diagonal[:, i] - sub[:, i - 1] * c[:, i - 1]
+        singular |= pivot == 0
+        pivot = np.where(singular, 1.0, pivot)
+        if i < n - 1:
+            c[:, i] = sup[:, i] / pivot
+        if i > 0:
+            d[:, i] = (B[:, i] - sub[:, i - 1, None] * d[:, i - 1]) / pivot[:, None]
+        else:
+            d[:, 0] = B[:, 0] / pivot[:, None]
+
+    for i in reversed(range(n - 1)):
+        d[:, i] -= c[:, i, None] * d[:, i + 1]
+    return d, singular
@@ -2,39 +2,244 @@ from typing import Iterable
 
 import numpy as np
 
+from core.arrays import as_array, working_dtype
+from core.instrumentation import Metrics, phase
 from core.solver.solver import Solver
+from core.solver.sparse import (
+    CSRMatrix,
+    multicolor_ordering,
+    split_by_color,
+    sum_by_index,
+)
 
 
 # todo: some methods are the same as GaussianEliminationSolver. refactor
 class GuassSeidelSolver(Solver):
-    """class that implements Gauss-Seidel method for solving linear system"""
+    """class that implements Gauss-Seidel method for solving linear system.
+    the system is either a dense extended matrix passed to `set`, or a sparse
+    CSR coefficient matrix and right hand side passed to `set_sparse`.
+    """
 
-    def set(self, A: Iterable[Iterable], tolerance=0.05, relaxation=1) -> None:
-        """tolerance specifies the stopping criterion for approximation error
-        relaxation specifies x_new = relaxation * x_new + (1-relaxation) * x_old
+    def __init__(self, verbose=False, metrics: Metrics = None) -> None:
+        super().__init__(verbose, metrics)
+        self.csr = None  # sparse coefficient matrix
+        self.b = None  # right hand side of the sparse system
+        self.diagonal = None  # diagonal of the sparse coefficient matrix
+        self.color_groups = None  # rows of the sparse system grouped by color
+        self.iterations = 0  # sweeps performed by the last solve
+        self.converged = False  # whether the last solve met the tolerance
+
+    def set(
+        self,
+        A: Iterable[Iterable],
+        tolerance=0.05,
+        relaxation=1,
+        acceleration=None,
+        max_iter=None,
+        overwrite_a=False,
+    ) -> None:
+        """tolerance specifies the stopping criterion |b - Ax| <= tolerance * |b|
+        relaxation specifies x_new = relaxation * x_new + (1-relaxation) * x_old,
+        see `set_options` for acceleration and max_iter
+        A is copied unless overwrite_a allows its rows to be swapped in place
         """
-        super().set(A)
+        super().set(A, overwrite_a)
+        self.csr = None
+        self.set_options(tolerance, relaxation, acceleration, max_iter)
+
+    def set_sparse(
+        self,
+        A,
+        b: Iterable,
+        tolerance=0.05,
+        relaxation=1,
+        ordering="multicolor",
+        colors: Iterable = None,
+        acceleration=None,
+        max_iter=None,
+    ) -> None:
+        """set up a sparse linear system Ax = b. A is a CSRMatrix or any object
+        with CSR attributes data, indices, indptr and shape, such as
+        scipy.sparse.csr_matrix. every diagonal element must be nonzero.
+        the system is solved in the working dtype of A and b, e.g. complex
+        when either is.
+
+        ordering specifies the order rows are updated in during a sweep:
+            "multicolor": rows are colored so that rows of the same color
+                don't depend on each other, then each color is updated with
+                whole-array operations. a 5-point stencil gives red-black.
+            "natural": rows are updated one at a time in their given order.
+        colors optionally supplies the color of every row, for example the
+        parity of the grid point for a red-black ordering.
+        """
+        self.csr = CSRMatrix.from_any(A)
+        nrow, ncol = self.csr.shape
+        if nrow != ncol:
+            raise ValueError("Expecting square matrix for coefficient A")
+        self.N = nrow
+        self.A = None
+        self.b = as_array(b, working_dtype(self.csr, b))
+        self.diagonal = self.csr.diagonal()
+        if np.any(self.diagonal == 0):
+            raise ValueError("Gauss-Seidel method requires a nonzero diagonal.")
+        self.set_options(tolerance, relaxation, acceleration, max_iter)
+        if ordering == "multicolor":
+            if colors is None:
+                colors = multicolor_ordering(self.csr)
+            self.color_groups = split_by_color(self.csr, colors)
+        elif ordering == "natural":
+            self.color_groups = None
+        else:
+            raise ValueError(f"Unknown ordering {ordering}")
+
+    def set_options(
+        self, tolerance=0.05, relaxation=1, acceleration=None, max_iter=None
+    ) -> None:
+        """tolerance specifies the stopping criterion |b - Ax| <= tolerance * |b|
+        and max_iter caps the number of sweeps, 10 * N and at least 100 by
+        default.
+
+        relaxation is the SOR parameter omega, or "auto" to estimate the
+        optimal omega while iterating: sweeps start with omega = 1 and, once
+        the contraction |x_k+1 - x_k| / |x_k - x_k-1| settles, omega is raised
+        to 2 / (1 + sqrt(1 - rho^2)) with the spectral radius rho of Jacobi
+        derived from it, which is optimal for consistently ordered matrices
+        such as a red-black 5-point stencil.
+
+        acceleration is None or "chebyshev" for Chebyshev semi-iterative
+        acceleration of symmetric SOR (SSOR) sweeps with the given omega. the
+        spectral radius of SSOR is estimated from the contraction of the
+        first sweeps. A should be symmetric positive definite. SSOR gains
+        less over SOR with a multicolor ordering than with the natural one.
+        """
+        if acceleration not in (None, "chebyshev"):
+            raise ValueError(f"Unknown acceleration {acceleration}")
+        if relaxation == "auto" and acceleration is not None:
+            raise ValueError(
+                "Automatic relaxation applies to SOR without acceleration."
+            )
         self.tolerance = tolerance
         self.relaxation = relaxation
+        self.acceleration = acceleration
+        self.max_iter = max(10 * self.N, 100) if max_iter is None else max_iter
 
-    def solve(self):
-        # swap rows so that the values on diagonal are relatively large
-        for i in range(self.N):
-            self.partial_pivot_and_swap(i)
-
-        # initial guess with zeroes
-        curr = np.zeros(self.N)
-        approx_err = 1
-        while approx_err >= self.tolerance:
-            prev = curr
-            curr = self._solve_next_iter(prev)
-            curr = self.relaxation * curr + (1 - self.relaxation) * prev
-            approx_err = np.max(np.abs(1 - prev / curr))
-            self.print_vector_if_verbose(prev, title=f"approx err {approx_err}")
-            self.print_vector_if_verbose(curr, title=f"approx err {approx_err}")
-        if any(np.isnan(curr)) or any(np.isinf(curr)):
+    def solve(self, x0: Iterable = None):
+        """returns the solution, starting from the initial guess x0 or from
+        zeros. iterations reports the sweeps performed and converged whether
+        the residual criterion was met within max_iter sweeps.
+        raises ValueError when the iteration diverges
+        """
+        if self.csr is None:
+            # swap rows so that the values on diagonal are relatively large
+            for i in range(self.N):
+                self.partial_pivot_and_swap(i)
+
+        dtype = self.b.dtype if self.A is None else self.A.dtype
+        if x0 is None:
+            x = np.zeros(self.N, dtype=dtype)
+        else:
+            x = np.array(x0, dtype=np.result_type(dtype, np.asarray(x0).dtype))
+        bnorm = np.linalg.norm(self._rhs())
+        bnorm = bnorm if bnorm != 0 else 1.0
+        self.iterations = 0
+        with phase(self.metrics, "iterate"):
+            if self.acceleration == "chebyshev":
+                x = self._iterate_chebyshev(x, bnorm)
+            else:
+                x = self._iterate_sor(x, bnorm)
+        residual = np.linalg.norm(self._rhs() - self._matvec(x))
+        self.converged = bool(residual <= self.tolerance * bnorm)
+        if any(np.isnan(x)) or any(np.isinf(x)):
             raise ValueError("Gauss-Seidel method doesn't converge.")
-        return curr
+        return x
+
+    def _iterate_sor(self, x, bnorm):
+        """SOR sweeps until the residual is below tolerance, adapting omega
+        when relaxation is "auto"
+        """
+        adaptive = self.relaxation == "auto"
+        w = 1.0 if adaptive else self.relaxation
+        prev = np.empty_like(x)
+        step = ratio = None
+        since_update = 0
+        while not self._done(x, bnorm):
+            np.copyto(prev, x)
+            self._sweep(x, w)
+            if adaptive:
+                step, prev_step = np.linalg.norm(x - prev), step
+                ratio, prev_ratio = (step / prev_step if prev_step else None), ratio
+                since_update += 1
+                # near the optimum the contraction approaches w - 1, where
+                # the estimate is unreliable and overshooting is costly
+                if (
+                    since_update > 10
+                    and _settled(ratio, prev_ratio)
+                    and ratio > 1.05 * (w - 1)
+                ):
+                    estimate = _optimal_relaxation(ratio, w)
+                    if estimate > w + 1e-3:
+                        w, since_update = estimate, 0
+                        if self.metrics is not None:
+                            self.metrics.record("relaxation", w)
+        return x
+
+    def _iterate_chebyshev(self, x, bnorm):
+        """SSOR sweeps until the contraction settles, giving the spectral
+        radius rho of the SSOR iteration, then the Chebyshev semi-iteration
+        x_k+1 = omega_k+1 * (SSOR(x_k) - x_k-1) + x_k-1 with
+        omega_1 = 1, omega_2 = 2 / (2 - rho^2) and
+        omega_k+1 = 1 / (1 - rho^2 * omega_k / 4)
+        """
+        w = self.relaxation
+        older = np.empty_like(x)
+        step = ratio = None
+        while not self._done(x, bnorm):
+            np.copyto(older, x)
+            self._symmetric_sweep(x, w)
+            step, prev_step = np.linalg.norm(x - older), step
+            ratio, prev_ratio = (step / prev_step if prev_step else None), ratio
+            if self.iterations > 5 and _settled(ratio, prev_ratio):
+                break
+        if ratio is None or not ratio < 1:
+            # converged already or SSOR doesn't contract
+            return x
+        rho2 = ratio**2
+        if self.metrics is not None:
+            self.metrics.record("spectral_radius", ratio)
+
+        ssor = np.empty_like(x)
+        omega = 1.0
+        np.copyto(older, x)
+        while not self._done(x, bnorm):
+            np.copyto(ssor, x)
+            self._symmetric_sweep(ssor, w)
+            # older holds x_k-1, and becomes x_k+1
+            older += omega * (ssor - older)
+            x, older = older, x
+            omega = 2 / (2 - rho2) if omega == 1.0 else 1 / (1 - rho2 * omega / 4)
+        return x
+
+    def _done(self, x, bnorm) -> bool:
+        """whether |b - Ax| <= tolerance * |b| or the sweeps are exhausted.
+        records the relative residual of every sweep
+        """
+        residual = np.linalg.norm(self._rhs() - self._matvec(x)) / bnorm
+        if self.iterations > 0:
+            if self.metrics is not None:
+                self.metrics.count("iterations")
+                self.metrics.record("residual", residual)
+            self.print_vector_if_verbose(x, title=f"residual {residual}")
+        return residual <= self.tolerance or self.iterations >= self.max_iter
+
+    def _rhs(self) -> np.ndarray:
+        """right hand side b"""
+        return self.b if self.csr is not None else self.A[:, self.N]
+
+    def _matvec(self, x) -> np.ndarray:
+        """returns Ax"""
+        if self.csr is not None:
+            return self.csr.matvec(x)
+        return self.A[:, : self.N] @ x
 
     def partial_pivot_and_swap(self, i):
         """find largest element below element (i, i). then swap the rows
@@ -51,17 +256,67 @@ class GuassSeidelSolver(Solver):
         self.A[i] = self.A[j]
         self.A[j] = temp
 
-    def _solve_next_iter(self, prev):
-        """solve next iteration of x"""
-        # todo: below commented the array operation yields wrong result. debug.
-        # return (
-        #     self.A[:, self.N] - sum(self.A[:, :self.N] * prev) + np.diag(self.A) * prev
-        # ) / np.diag(self.A)
-        x = np.zeros(self.N, dtype=float)
-        for i in range(self.N):
-            x[i] = (
-                self.A[i, self.N]
-                - sum(self.A[i, :i] * prev[:1])
-                - sum(self.A[i, i + 1 : self.N] * prev[i + 1 :])
-            ) / self.A[i, i]
-        return x
+    def _sweep(self, x, w, reverse=False):
+        """update x in place with one relaxed Gauss-Seidel (SOR) sweep,
+        through the rows in reverse order when reverse is True
+        """
+        self.iterations += not reverse
+        if self.csr is None:
+            self._sweep_dense(x, w, reverse)
+        elif self.color_groups is None:
+            self._sweep_sparse_natural(x, w, reverse)
+        else:
+            self._sweep_sparse_multicolor(x, w, reverse)
+
+    def _symmetric_sweep(self, x, w):
+        """one forward and one backward sweep, the SSOR iteration"""
+        self._sweep(x, w)
+        self._sweep(x, w, reverse=True)
+
+    def _sweep_dense(self, x, w, reverse=False):
+        """sweep the rows of the dense extended matrix in order"""
+        rows = range(self.N - 1, -1, -1) if reverse else range(self.N)
+        for i in rows:
+            a_ii = self.A[i, i]
+            x_gs = x[i] + (self.A[i, self.N] - self.A[i, : self.N] @ x) / a_ii
+            x[i] = w * x_gs + (1 - w) * x[i]
+
+    def _sweep_sparse_natural(self, x, w, reverse=False):
+        """sweep the rows of the CSR matrix in order. the cost is
+        proportional to the number of nonzeros
+        """
+        data, indices, indptr = self.csr.data, self.csr.indices, self.csr.indptr
+        rows = range(self.N - 1, -1, -1) if reverse else range(self.N)
+        for i in rows:
+            start, end = indptr[i], indptr[i + 1]
+            residual = self.b[i] - data[start:end] @ x[indices[start:end]]
+            x[i] += w * residual / self.diagonal[i]
+
+    def _sweep_sparse_multicolor(self, x, w, reverse=False):
+        """sweep the CSR matrix one color at a time. rows of a color don't
+        depend on each other, so each half-sweep is a vectorized update
+        """
+        groups = reversed(self.color_groups) if reverse else self.color_groups
+        for rows, local_rows, indices, data in groups:
+            ax = sum_by_index(local_rows, data * x[indices], len(rows))
+            x[rows] += w * (self.b[rows] - ax) / self.diagonal[rows]
+
+
+def _settled(ratio, prev_ratio, rtol=1e-3) -> bool:
+    """whether consecutive contraction ratios agree within rtol"""
+    return (
+        ratio is not None
+        and prev_ratio is not None
+        and abs(ratio - prev_ratio) <= rtol * ratio
+    )
+
+
+def _optimal_relaxation(ratio, w) -> float:
+    """optimal SOR omega estimated from the contraction ratio of sweeps with
+    relaxation w. for a consistently ordered matrix the eigenvalues lambda of
+    SOR and mu of Jacobi satisfy (lambda + w - 1)^2 = lambda * w^2 * mu^2
+    """
+    rho2 = (ratio + w - 1) ** 2 / (ratio * w**2)
+    if not 0 <= rho2 < 1:
+        return w
+    return 2 / (1 + np.sqrt(1 - rho2))
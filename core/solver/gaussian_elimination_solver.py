@@ -1,6 +1,10 @@
 from typing import Iterable
 
-from core.solver.solver import LUSolver
+import numpy as np
+
+from core.arrays import writable_array
+from core.instrumentation import Metrics, phase
+from core.solver.solver import LUSolver, Solver
 
 
 class GaussianEliminationSolver(LUSolver):
@@ -13,10 +17,17 @@ class GaussianEliminationSolver(LUSolver):
         """for each row in matrix A, swap rows so that element (i, i) is the largest in abs
         value. then use row i to cancel rows below. returns solution to the linear system
         """
-        for i in range(self.N - 1):
-            self.partial_pivot_and_swap(i)
-            self.eliminate(i)
-        return self.backward_substitute()
+        if self.metrics is not None:
+            a_max = np.abs(self.A[:, : self.N]).max()
+        with phase(self.metrics, "eliminate"):
+            for i in range(self.N - 1):
+                self.partial_pivot_and_swap(i)
+                self.eliminate(i)
+        if self.metrics is not None:
+            growth = np.abs(np.triu(self.A[:, : self.N])).max() / a_max
+            self.metrics.record("pivot_growth", growth)
+        with phase(self.metrics, "substitute"):
+            return self.backward_substitute()
 
     def partial_pivot_and_swap(self, i):
         """find largest element below element (i, i). then swap the rows
@@ -47,3 +58,79 @@ class GaussianEliminationSolver(LUSolver):
         """add row i * scaling_factor to row j"""
         temp = (self.A[i] * scaling_factor + self.A[j]).copy()
         self.A[j] = temp
+
+
+class BatchGaussianEliminationSolver(Solver):
+    """class that solves a stack of independent linear systems at once using
+    Gaussian elimination with partial pivoting. the pivot search, elimination
+    and backward substitution are vectorized across the batch axis so the
+    per-system Python overhead is paid only once per column.
+    """
+
+    def __init__(self, verbose=False, metrics: Metrics = None) -> None:
+        super().__init__(verbose, metrics)
+        self.batch = None  # number of systems in the stack
+        self.singular = None  # boolean mask of singular systems
+
+    def set(self, A: Iterable[Iterable[Iterable]], overwrite_a=False) -> None:
+        """set up the stacked linear equations to be solved. A has dimension
+        batch * N * (N + 1), where A[k] is the extended coefficient matrix of
+        system k that includes the right hand side coefficients.
+        A is copied unless overwrite_a allows it to be eliminated in place.
+        """
+        self.A = writable_array(A, overwrite_a=overwrite_a)
+        if self.A.ndim != 3:
+            raise ValueError("Expecting a stack of extended matrices for A")
+        batch, nrow, ncol = self.A.shape
+        if not nrow + 1 == ncol:
+            raise ValueError("Expecting square matrix for coefficient A")
+        self.batch = batch
+        self.N = nrow
+        self.singular = np.zeros(batch, dtype=bool)
+        self.print_matrix_if_verbose(self.A, title="Linear System Set Up")
+
+    def solve(self) -> np.ndarray:
+        """returns the batch * N solutions. systems whose coefficient matrix is
+        singular are flagged in `singular` and get nan solutions, without
+        affecting the other systems in the batch
+        """
+        with phase(self.metrics, "solve"):
+            x = self._solve()
+        if self.metrics is not None:
+            self.metrics.count("singular", int(self.singular.sum()))
+        self.print_vector_if_verbose(x, title="Solved Solution")
+        return x
+
+    def _solve(self) -> np.ndarray:
+        """vectorized elimination and backward substitution"""
+        A = self.A
+        rows = np.arange(self.batch)
+        # pivots below this size are treated as zero for each system
+        tolerance = (
+            self.N * np.finfo(A.dtype).eps * np.abs(A[:, :, : self.N]).max(axis=(1, 2))
+        )
+        diagonal = np.empty((self.batch, self.N), dtype=A.dtype)
+        for i in range(self.N):
+            # swap row i with the row holding the largest pivot candidate
+            row_to_swap = np.abs(A[:, i:, i]).argmax(axis=1) + i
+            temp = A[rows, i].copy()
+            A[rows, i] = A[rows, row_to_swap]
+            A[rows, row_to_swap] = temp
+
+            pivot = A[:, i, i]
+            self.singular |= np.abs(pivot) <= tolerance
+            pivot = np.where(self.singular, 1.0, pivot)
+            diagonal[:, i] = pivot
+
+            # eliminate coefficients below element (i, i) for every system
+            scaling_factors = A[:, i + 1 :, i] / pivot[:, None]
+            A[:, i + 1 :, i:] -= scaling_factors[:, :, None] * A[:, None, i, i:]
+
+        x = np.empty((self.batch, self.N), dtype=A.dtype)
+        for i in range(self.N)[::-1]:
+            x[:, i] = (
+                A[:, i, self.N]
+                - np.einsum("bj,bj->b", A[:, i, i + 1 : self.N], x[:, i + 1 :])
+            ) / diagonal[:, i]
+        x[self.singular] = np.nan
+        return x
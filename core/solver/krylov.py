@@ -0,0 +1,376 @@
+from typing import Callable, Iterable, Tuple
+
+import numpy as np
+
+from core.arrays import as_array, solve_dtype, working_dtype
+from core.factorization.triangular import solve_triangular
+from core.instrumentation import Metrics, phase
+from core.solver.sparse import (
+    CSRMatrix,
+    multicolor_ordering,
+    split_by_color,
+    sum_by_index,
+)
+
+
+class LinearOperator:
+    """matrix-free linear operator defined by its action y = Ax.
+    operators such as stencils never need to be assembled.
+    example:
+        def laplacian(x):
+            y = 2 * x
+            y[1:] -= x[:-1]
+            y[:-1] -= x[1:]
+            return y
+
+        A = LinearOperator((n, n), laplacian)
+        x, converged = cg(A, b)
+    """
+
+    def __init__(
+        self,
+        shape: Tuple[int, int],
+        matvec: Callable,
+        rmatvec: Callable = None,
+        dtype=None,
+    ) -> None:
+        """matvec(x) returns Ax, rmatvec(x) optionally returns A.T x.
+        dtype is that of the entries of A, if known. the solvers compute in
+        the wider of dtype and that of the right hand side, e.g. complex
+        for a complex operator
+        """
+        self.shape = tuple(shape)
+        self.dtype = None if dtype is None else np.dtype(dtype)
+        self._matvec = matvec
+        self._rmatvec = rmatvec
+
+    def matvec(self, x: Iterable) -> np.ndarray:
+        """returns Ax"""
+        return self._matvec(as_array(x))
+
+    def rmatvec(self, x: Iterable) -> np.ndarray:
+        """returns A.T x"""
+        if self._rmatvec is None:
+            raise ValueError("rmatvec is not defined for this operator.")
+        return self._rmatvec(as_array(x))
+
+    def __matmul__(self, x):
+        return self.matvec(x)
+
+
+def aslinearoperator(A) -> LinearOperator:
+    """accept a LinearOperator, any object with a matvec method such as
+    CSRMatrix, any object with the CSR attributes such as
+    scipy.sparse.csr_matrix, or a dense matrix
+    """
+    if isinstance(A, LinearOperator):
+        return A
+    if hasattr(A, "matvec"):
+        return LinearOperator(A.shape, A.matvec, dtype=getattr(A, "dtype", None))
+    if all(hasattr(A, name) for name in ("data", "indices", "indptr", "shape")):
+        return aslinearoperator(CSRMatrix.from_any(A))
+    A = as_array(A)
+    return LinearOperator(A.shape, A.dot, A.T.dot, A.dtype)
+
+
+def _as_preconditioner(M, n) -> LinearOperator:
+    """M approximates the inverse of A. it is None for no preconditioning,
+    a factorization with a solve method such as `ilu0`, or anything
+    accepted by `aslinearoperator`
+    """
+    if M is None:
+        return LinearOperator((n, n), lambda x: x)
+    if hasattr(M, "solve"):
+        return LinearOperator((n, n), M.solve, dtype=getattr(M, "dtype", None))
+    return aslinearoperator(M)
+
+
+def ssor_preconditioner(A, omega=1.0, colors: Iterable = None) -> LinearOperator:
+    """symmetric successive over-relaxation (SSOR) preconditioner of A.
+    applying it performs one forward and one backward Gauss-Seidel sweep
+    with relaxation omega from a zero initial guess, which is symmetric
+    when A is, so it can be used with `cg`.
+
+    rows are colored with `multicolor_ordering` (or the given colors) so each
+    color is updated with whole-array operations, as in `GuassSeidelSolver`.
+    every diagonal element of A must be nonzero.
+    """
+    csr = CSRMatrix.from_any(A)
+    diagonal = csr.diagonal()
+    if np.any(diagonal == 0):
+        raise ValueError("SSOR preconditioner requires a nonzero diagonal.")
+    if colors is None:
+        colors = multicolor_ordering(csr)
+    groups = split_by_color(csr, colors)
+
+    def update(x, r, group):
+        rows, local_rows, indices, data = group
+        ax = sum_by_index(local_rows, data * x[indices], len(rows))
+        x[rows] += omega * (r[rows] - ax) / diagonal[rows]
+
+    def apply(r):
+        x = np.zeros(csr.shape[0], dtype=solve_dtype(csr.dtype, r))
+        for group in groups:
+            update(x, r, group)
+        for group in reversed(groups):
+            update(x, r, group)
+        return x
+
+    return LinearOperator(csr.shape, apply, dtype=csr.dtype)
+
+
+class ILU0:
+    """incomplete LU factorization with no fill-in, ILU(0), of a sparse
+    matrix. the elimination is performed without pivoting on the values of
+    A in CSR format, and every update outside the nonzero pattern of A is
+    dropped, so the factors take the memory of A and applying them costs
+    O(nnz). `csr` holds L + U - I with the pattern of A, where L is unit
+    lower triangular. raises ValueError on a zero pivot.
+    """
+
+    def __init__(self, A) -> None:
+        csr = CSRMatrix.from_any(A).canonical()
+        nrow, ncol = csr.shape
+        if nrow != ncol:
+            raise ValueError("A must be square matrix.")
+        data, indices, indptr = csr.data, csr.indices, csr.indptr
+        diag = np.empty(nrow, dtype=np.intp)
+        position = np.full(nrow, -1, dtype=np.intp)  # column -> index in data
+
+        for i in range(nrow):
+            start, end = indptr[i], indptr[i + 1]
+            position[indices[start:end]] = np.arange(start, end)
+            diag[i] = position[i]
+            if diag[i] < 0:
+                raise ValueError("ILU(0) zero pivot.")
+            # eliminate the entries left of the diagonal in column order
+            for p in range(start, diag[i]):
+                k = indices[p]
+                data[p] /= data[diag[k]]
+                upper = slice(diag[k] + 1, indptr[k + 1])
+                targets = position[indices[upper]]
+                keep = targets >= 0
+                data[targets[keep]] -= data[p] * data[upper][keep]
+            if data[diag[i]] == 0:
+                raise ValueError("ILU(0) zero pivot.")
+            position[indices[start:end]] = -1
+
+        self.csr = csr
+        self.diag = diag  # index of the diagonal of each row in data
+        self.shape = csr.shape
+        self.dtype = csr.dtype
+
+    def solve(self, b: Iterable) -> np.ndarray:
+        """solve LUx = b by sparse forward and backward substitution.
+        b is a vector or a matrix with one right hand side per column
+        """
+        data, indices, indptr = self.csr.data, self.csr.indices, self.csr.indptr
+        x = np.array(b, dtype=solve_dtype(self.dtype, b))
+        if x.shape[0] != self.shape[0]:
+            raise ValueError(f"Expecting {self.shape[0]} rows for the right hand side.")
+        for i in range(self.shape[0]):
+            lower = slice(indptr[i], self.diag[i])
+            x[i] -= data[lower] @ x[indices[lower]]
+        for i in range(self.shape[0] - 1, -1, -1):
+            upper = slice(self.diag[i] + 1, indptr[i + 1])
+            x[i] -= data[upper] @ x[indices[upper]]
+            x[i] /= data[self.diag[i]]
+        return x
+
+
+def ilu0(A) -> ILU0:
+    """ILU(0) preconditioner of A, a CSRMatrix, any object with the CSR
+    attributes such as scipy.sparse.csr_matrix, or a dense matrix.
+    see `ILU0`
+    """
+    return ILU0(A)
+
+
+def _setup(A, b, x0, M, max_iter):
+    """operators and arrays of a Krylov solve, computed in the widest dtype
+    of A, M, b and x0 so that complex or double precision input is kept
+    """
+    A = aslinearoperator(A)
+    n = A.shape[0]
+    M = _as_preconditioner(M, n)
+    inputs = [b] + ([] if x0 is None else [x0])
+    dtype = working_dtype(*inputs, *(op for op in (A, M) if op.dtype is not None))
+    b = as_array(b, dtype)
+    x = np.zeros(n, dtype=dtype) if x0 is None else np.array(x0, dtype=dtype)
+    max_iter = 10 * n if max_iter is None else max_iter
+    bnorm = np.linalg.norm(b)
+    return A, b, x, M, max_iter, bnorm if bnorm != 0 else 1.0
+
+
+def _record(metrics, residual):
+    if metrics is not None:
+        metrics.count("iterations")
+        metrics.record("residual", residual)
+
+
+def cg(
+    A,
+    b: Iterable,
+    x0: Iterable = None,
+    tol=1e-8,
+    max_iter=None,
+    M=None,
+    metrics: Metrics = None,
+) -> Tuple[np.ndarray, bool]:
+    """preconditioned conjugate gradient method for Ax = b, where A is
+    symmetric positive definite. A is anything accepted by `aslinearoperator`,
+    M an approximate inverse of A, for example `ssor_preconditioner(A)` or
+    `ilu0(A)`, which should be symmetric positive definite as well.
+
+    stops when |b - Ax| <= tol * |b| or after max_iter iterations (10 * n
+    by default). returns the solution and whether it converged.
+    metrics optionally collects iteration counts and relative residuals.
+    """
+    A, b, x, M, max_iter, bnorm = _setup(A, b, x0, M, max_iter)
+    with phase(metrics, "iterate"):
+        r = b - A.matvec(x)
+        z = M.matvec(r)
+        p = z.copy()
+        rz = np.vdot(r, z)
+        for _ in range(max_iter):
+            if np.linalg.norm(r) <= tol * bnorm:
+                return x, True
+            Ap = A.matvec(p)
+            alpha = rz / np.vdot(p, Ap)
+            x += alpha * p
+            r -= alpha * Ap
+            z = M.matvec(r)
+            rz, rz_prev = np.vdot(r, z), rz
+            p = z + (rz / rz_prev) * p
+            _record(metrics, np.linalg.norm(r) / bnorm)
+    return x, bool(np.linalg.norm(r) <= tol * bnorm)
+
+
+def gmres(
+    A,
+    b: Iterable,
+    x0: Iterable = None,
+    tol=1e-8,
+    restart=30,
+    max_iter=None,
+    M=None,
+    metrics: Metrics = None,
+) -> Tuple[np.ndarray, bool]:
+    """restarted GMRES(restart) for a general square Ax = b, with right
+    preconditioning by M so that the residual is that of the original
+    system. A and M are as in `cg`.
+
+    the Arnoldi basis is orthogonalized with classical Gram-Schmidt applied
+    twice, and the least squares problem is kept triangular with Givens
+    rotations. stops when |b - Ax| <= tol * |b| or after max_iter inner
+    iterations in total. returns the solution and whether it converged.
+    """
+    A, b, x, M, max_iter, bnorm = _setup(A, b, x0, M, max_iter)
+    n = A.shape[0]
+    it = 0
+    with phase(metrics, "iterate"):
+        while it < max_iter:
+            r = b - A.matvec(x)
+            beta = np.linalg.norm(r)
+            if beta <= tol * bnorm:
+                return x, True
+
+            m = min(restart, max_iter - it)
+            V = np.zeros((m + 1, n), dtype=x.dtype)
+            H = np.zeros((m + 1, m), dtype=x.dtype)
+            cs = np.zeros(m, dtype=x.dtype)
+            sn = np.zeros(m, dtype=x.dtype)
+            g = np.zeros(m + 1, dtype=x.dtype)
+            g[0] = beta
+            V[0] = r / beta
+            k = 0
+            while k < m:
+                w = A.matvec(M.matvec(V[k]))
+                h = V[: k + 1].conj() @ w
+                w -= V[: k + 1].T @ h
+                correction = V[: k + 1].conj() @ w
+                w -= V[: k + 1].T @ correction
+                H[: k + 1, k] = h + correction
+                H[k + 1, k] = np.linalg.norm(w)
+                breakdown = H[k + 1, k] == 0
+                if not breakdown:
+                    V[k + 1] = w / H[k + 1, k]
+
+                # apply the previous rotations, then eliminate H[k+1, k].
+                # the rotations [[conj(c), conj(s)], [-s, c]] are unitary
+                for i in range(k):
+                    H[i, k], H[i + 1, k] = (
+                        np.conj(cs[i]) * H[i, k] + np.conj(sn[i]) * H[i + 1, k],
+                        -sn[i] * H[i, k] + cs[i] * H[i + 1, k],
+                    )
+                denominator = np.hypot(abs(H[k, k]), abs(H[k + 1, k]))
+                if denominator == 0:
+                    break
+                cs[k], sn[k] = H[k, k] / denominator, H[k + 1, k] / denominator
+                H[k, k], H[k + 1, k] = denominator, 0
+                g[k], g[k + 1] = np.conj(cs[k]) * g[k], -sn[k] * g[k]
+
+                k += 1
+                it += 1
+                _record(metrics, abs(g[k]) / bnorm)
+                if abs(g[k]) <= tol * bnorm or breakdown:
+                    break
+
+            if k == 0:
+                break
+            y = solve_triangular(H[:k, :k], g[:k], lower=False)
+            x += M.matvec(V[:k].T @ y)
+    return x, bool(np.linalg.norm(b - A.matvec(x)) <= tol * bnorm)
+
+
+def bicgstab(
+    A,
+    b: Iterable,
+    x0: Iterable = None,
+    tol=1e-8,
+    max_iter=None,
+    M=None,
+    metrics: Metrics = None,
+) -> Tuple[np.ndarray, bool]:
+    """preconditioned BiCGSTAB for a general square Ax = b with right
+    preconditioning by M. A and M are as in `cg`. it needs two matvecs per
+    iteration and short recurrences, so its memory doesn't grow like GMRES.
+
+    stops when |b - Ax| <= tol * |b| or after max_iter iterations, or on
+    breakdown. returns the solution and whether it converged.
+    """
+    A, b, x, M, max_iter, bnorm = _setup(A, b, x0, M, max_iter)
+    with phase(metrics, "iterate"):
+        r = b - A.matvec(x)
+        r_hat = r.copy()
+        rho = alpha = omega = 1.0
+        p = v = np.zeros_like(r)
+        for _ in range(max_iter):
+            if np.linalg.norm(r) <= tol * bnorm:
+                return x, True
+            rho, rho_prev = np.vdot(r_hat, r), rho
+            if rho == 0 or omega == 0:
+                break
+            p = r + (rho / rho_prev) * (alpha / omega) * (p - omega * v)
+            p_hat = M.matvec(p)
+            v = A.matvec(p_hat)
+            r_hat_v = np.vdot(r_hat, v)
+            if r_hat_v == 0:
+                break
+            alpha = rho / r_hat_v
+            s = r - alpha * v
+            if np.linalg.norm(s) <= tol * bnorm:
+                x += alpha * p_hat
+                r = s
+                _record(metrics, np.linalg.norm(r) / bnorm)
+                break
+            s_hat = M.matvec(s)
+            t = A.matvec(s_hat)
+            tt = np.vdot(t, t)
+            if tt == 0:
+                break
+            omega = np.vdot(t, s) / tt
+            x += alpha * p_hat + omega * s_hat
+            r = s - omega * t
+            _record(metrics, np.linalg.norm(r) / bnorm)
+    return x, bool(np.linalg.norm(r) <= tol * bnorm)
@@ -2,65 +2,179 @@ from typing import Iterable
 
 import numpy as np
 
-from core.factorization.lu import LUDecomposer
+from core.arrays import as_array, working_dtype
+from core.factorization.cache import FactorizationCache
+from core.factorization.lu import LUDecomposer, LUFactorization
+from core.instrumentation import Metrics, phase
 from core.solver.solver import LUSolver
 
 
 class LUDecompositionSolver(LUSolver):
     """class that decomposes a matrix using LU decomposition,
-    namely A = LU where L is a lower triangular matrix and U
-    is an upper triangular matrix.
+    namely PA = LU where L is a lower triangular matrix, U
+    is an upper triangular matrix and P is a row permutation.
+    the factorization is computed on the first call to solve
+    and reused for any further right hand sides.
+
+    with mixed_precision, A is factorized in float32, which halves the memory
+    of the factors, and the float64 accuracy is recovered by iterative
+    refinement with residuals computed in float64 against the original A.
+    when refinement stalls or doesn't converge within max_refinement
+    iterations, e.g. for an ill-conditioned A, the solver falls back to a
+    float64 factorization. refinement_iterations reports the iterations of
+    the last solve and fallback whether the float64 factorization is used.
+
+    cache optionally is a `FactorizationCache` shared between solvers, so a
+    coefficient matrix equal to one factorized before, in this solver or
+    another, is not factorized again.
+
+    A keeps its dtype: float32, float64, complex64 or complex128. A is only
+    read, so an ndarray is used without copying it. with overwrite_a, the
+    coefficient part of A is factorized in place instead of in a copy.
     """
 
-    def __init__(self, verbose=True) -> None:
-        super().__init__(verbose)
+    modifies_a = False
+
+    def __init__(
+        self,
+        verbose=False,
+        metrics: Metrics = None,
+        mixed_precision=False,
+        max_refinement=30,
+        cache: FactorizationCache = None,
+    ) -> None:
+        super().__init__(verbose, metrics)
         self.L = None
         self.U = None
         self.decomposer = None
+        self.factorization = None
+        self.mixed_precision = mixed_precision
+        self.max_refinement = max_refinement
+        self.refinement_iterations = 0
+        self.fallback = False
+        self.cache = cache
 
     # todo: refactor base class init to accept b
-    def set(self, A: Iterable[Iterable]) -> None:
-        super().set(A)
-        self.decomposer = LUDecomposer(self.verbose)
-        self.decomposer.set(self.A[:, : self.N])
+    def set(self, A: Iterable[Iterable], overwrite_a=False) -> None:
+        super().set(A, overwrite_a)
+        self.decomposer = LUDecomposer(self.verbose, metrics=self.metrics)
+        self.decomposer.set(self.A[:, : self.N], overwrite_a)
+        self.factorization = None
+        self.refinement_iterations = 0
+        self.fallback = False
+
+    def solve(self, B: Iterable = None):
+        """solve the linear system. B optionally supplies other right hand
+        sides, either a vector or a matrix with one right hand side per column.
+        by default the last column of the extended matrix is used.
+        """
+        if self.factorization is None:
+            self.factorization = self.factorize()
+        if B is None:
+            B = self.A[:, self.N]
+        with phase(self.metrics, "substitute"):
+            if self.factorization.lu.dtype != self.A.dtype:
+                x = self.refine(as_array(B, working_dtype(self.A, B)))
+            else:
+                x = self.factorization.solve(B, metrics=self.metrics)
+        self.print_vector_if_verbose(x, title="Solved Solution")
+        return x
 
-    def solve(self):
-        # LU decomposition
+    def factorize(self) -> LUFactorization:
+        """LU decomposition of the coefficient matrix, in single precision
+        (float32 or complex64) with mixed_precision unless the single
+        precision factorization already failed
+        """
+        single = np.complex64 if self.A.dtype.kind == "c" else np.float32
+        if self.mixed_precision and not self.fallback and self.A.dtype != single:
+            try:
+                factorization = self._factorize(single)
+            except ValueError:
+                # singular in float32
+                factorization = None
+            if factorization is not None and np.isfinite(factorization.lu).all():
+                self.L, self.U = factorization.L, factorization.U
+                return factorization
+            self._fall_back()
+
+        if self.cache is not None:
+            factorization = self._factorize(self.A.dtype)
+            self.L, self.U = factorization.L, factorization.U
+            return factorization
         self.L, self.U = self.decomposer.decompose()
+        return LUFactorization.from_factors(
+            self.decomposer.lu, self.decomposer.perm, self.decomposer.block_size
+        )
 
-        # solve Ld = b
-        b = self.A[:, self.N].reshape(self.N, 1)
-        self.A = np.concatenate([self.L, b], axis=1)
-        d = self.forward_substitute()
+    def _factorize(self, dtype) -> LUFactorization:
+        """LU factorization of the coefficient matrix in dtype, looked up in
+        the cache first when there is one
+        """
+        A = self.A[:, : self.N]
+        if self.cache is not None:
+            return self.cache.factorize(A, "lu", dtype=dtype, metrics=self.metrics)
+        return LUFactorization(A, metrics=self.metrics, dtype=dtype)
 
-        # solve Ux = d
-        d = d.reshape(self.N, 1)
-        self.A = np.concatenate([self.U, d], axis=1)
-        x = self.backward_substitute()
-        return x
+    def refine(self, B: np.ndarray) -> np.ndarray:
+        """solve AX = B with the float32 factorization followed by iterative
+        refinement: r = B - AX in the precision of A, solve Ad = r in single
+        precision, X += d.
+        stops when every residual is below sqrt(N) * eps * |A| * |X|, or falls
+        back to the float64 factorization when the correction doesn't halve
+        between iterations or max_refinement is reached.
+        """
+        A = self.A[:, : self.N]
+        norm_A = np.abs(A).sum(axis=1).max()
+        threshold = np.sqrt(self.N) * np.finfo(B.dtype).eps * norm_A
+        X = self.factorization.solve(B, metrics=self.metrics).astype(B.dtype)
+        prev_correction = np.inf
+        self.refinement_iterations = 0
+        for _ in range(self.max_refinement):
+            R = B - A @ X
+            if np.all(np.abs(R).max(axis=0) <= threshold * np.abs(X).max(axis=0)):
+                return X
+            D = self.factorization.solve(R, metrics=self.metrics)
+            correction = np.abs(D).max() / np.abs(X).max()
+            if not correction < prev_correction / 2:
+                break
+            prev_correction = correction
+            X += D
+            self.refinement_iterations += 1
+            if self.metrics is not None:
+                self.metrics.count("refinement_iterations")
+                self.metrics.record("refinement_residual", np.abs(R).max())
+
+        # refinement stalled, e.g. A is too ill-conditioned for float32
+        self._fall_back()
+        self.factorization = self.factorize()
+        return self.factorization.solve(B, metrics=self.metrics)
 
+    def _fall_back(self) -> None:
+        """use a float64 factorization from now on"""
+        self.fallback = True
+        if self.metrics is not None:
+            self.metrics.count("fallback")
 
-def matrix_inv_lu(A, verbose=True):
-    """returns inverse of matrix A using LU decompostion method"""
+
+def matrix_inv_lu(
+    A, verbose=False, metrics: Metrics = None, processes=1, chunk_size=None
+):
+    """returns inverse of matrix A using LU decompostion method, in the
+    dtype of A: float32, float64, complex64 or complex128.
+    with processes > 1 (or None for every CPU) the columns of the inverse
+    are solved in chunks of chunk_size by worker processes
+    """
     # check A should be square matrix
-    A = np.array(A, dtype=float)
+    A = as_array(A)
     nrow, ncol = A.shape
     if not nrow == ncol:
         raise ValueError("A must be a square matrix")
-    solver = LUDecompositionSolver(verbose)
-
-    # each column of the inverse matrix is a separate solution
-    # of a linear system by setting proper b vector
-    inv = np.zeros(shape=(nrow, ncol), dtype=float)
-    for i in range(nrow):
-        # set the righthand side b vector
-        b = np.zeros(shape=(nrow, 1))
-        b[i] = 1
-        # solve the linear equations
-        solver.set(np.concatenate([A, b], axis=1))
-        x = solver.solve()
-        # place the result into the solution matrix
-        inv[:, i] = x
+
+    # each column of the inverse matrix is the solution of a linear system
+    # whose right hand side is the matching column of the identity matrix,
+    # so A is factorized once and all columns are solved together
+    with LUFactorization(A, metrics=metrics) as factorization:
+        inv = factorization.solve(np.identity(nrow, A.dtype), processes, chunk_size)
 
     if verbose:
         print("============ Solved Inverse Matrix ============")
@@ -3,21 +3,32 @@ import numpy as np
 
 from typing import Iterable
 
+from core.arrays import as_array, writable_array
+from core.factorization.triangular import solve_triangular
+from core.instrumentation import Metrics
+
 
 class Solver(ABC):
     """base solver class for solving system of linear equations"""
 
-    def __init__(self, verbose=True) -> None:
-        """instantiate a solver object"""
+    # whether solve modifies the extended matrix A, so set has to copy it
+    modifies_a = True
+
+    def __init__(self, verbose=False, metrics: Metrics = None) -> None:
+        """instantiate a solver object. verbose prints the intermediate
+        matrices. metrics optionally collects timings, iteration counts
+        and residuals, see `core.instrumentation.Metrics`
+        """
         self.A = None  # extended matrix with dimension N * (N + 1)
         self.N = None  # number of rows
         self.verbose = verbose
+        self.metrics = metrics
 
     @abstractmethod
     def solve(self):
         pass
 
-    def set(self, A: Iterable[Iterable]) -> None:
+    def set(self, A: Iterable[Iterable], overwrite_a=False) -> None:
         """set up the linear equations to be sovled.
         A is the extended coefficient matrix of the system that includes right hand side coefficients.
         example:
@@ -26,9 +37,15 @@ class Solver(ABC):
                 [-3, -1, 7, -34],
                 [-8, 1, -2, -20]
             ]
+        A is any array-like or buffer and keeps its dtype when it is float32,
+        float64, complex64 or complex128, other types are solved in float64.
+        solvers that only read A use an ndarray A without copying it. the
+        others copy A, unless overwrite_a allows solve to modify it in place.
         """
-        # note dtype of A must be float
-        self.A = np.array(A, dtype=float)
+        if self.modifies_a or overwrite_a:
+            self.A = writable_array(A, overwrite_a=overwrite_a)
+        else:
+            self.A = as_array(A)
         nrow, ncol = self.A.shape
         if not nrow + 1 == ncol:
             raise ValueError("Expecting square matrix for coefficient A")
@@ -54,24 +71,26 @@ class LUSolver(Solver):
     this base class implements the forward and backward substition methods
     """
 
-    def __init__(self, verbose=True) -> None:
+    def __init__(self, verbose=False, metrics: Metrics = None) -> None:
         """instantiate a solver object"""
-        super().__init__(verbose)
+        super().__init__(verbose, metrics)
 
-    def backward_substitute(self):
-        """solve upper triangular matrix using backward substitution"""
-        # initiate solution vector
-        x = np.ndarray(self.N, float)
-        for i in range(self.N)[::-1]:
-            x[i] = (
-                self.A[i, self.N] - sum(self.A[i, (i + 1) : self.N] * x[i + 1 :])
-            ) / self.A[i, i]
+    def backward_substitute(self, U=None, b=None, unit_diagonal=False):
+        """solve upper triangular matrix using backward substitution.
+        U and b default to the coefficient part and the right hand side
+        of the extended matrix A, which are used as views without copying
+        """
+        U = self.A[:, : self.N] if U is None else U
+        b = self.A[:, self.N] if b is None else b
+        x = solve_triangular(U, b, lower=False, unit_diagonal=unit_diagonal)
         self.print_vector_if_verbose(x, title="Solved Solution")
         return x
 
-    def forward_substitute(self):
-        """solve lower triangular matrix using forward substitution"""
-        x = np.ndarray(self.N, float)
-        for i in range(self.N):
-            x[i] = (self.A[i, self.N] - sum(self.A[i, :i] * x[:i])) / self.A[i, i]
-        return x
+    def forward_substitute(self, L=None, b=None, unit_diagonal=False):
+        """solve lower triangular matrix using forward substitution.
+        L and b default to the coefficient part and the right hand side
+        of the extended matrix A, which are used as views without copying
+        """
+        L = self.A[:, : self.N] if L is None else L
+        b = self.A[:, self.N] if b is None else b
+        return solve_triangular(L, b, lower=True, unit_diagonal=unit_diagonal)
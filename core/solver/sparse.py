@@ -0,0 +1,159 @@
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from core.arrays import as_array, solve_dtype
+
+
+class CSRMatrix:
+    """square or rectangular matrix in compressed sparse row (CSR) format.
+    the column indices and values of row i are stored in
+    indices[indptr[i]:indptr[i+1]] and data[indptr[i]:indptr[i+1]].
+    data keeps its dtype: float32, float64, complex64 or complex128.
+    """
+
+    def __init__(
+        self,
+        data: Iterable,
+        indices: Iterable,
+        indptr: Iterable,
+        shape: Tuple[int, int],
+    ) -> None:
+        self.data = as_array(data)
+        self.indices = np.asarray(indices, dtype=np.intp)
+        self.indptr = np.asarray(indptr, dtype=np.intp)
+        self.shape = tuple(shape)
+        if len(self.indptr) != self.shape[0] + 1:
+            raise ValueError("indptr must have one entry per row plus one.")
+        if len(self.data) != len(self.indices):
+            raise ValueError("data and indices must have the same length.")
+        self._rows = None
+
+    @classmethod
+    def from_dense(cls, A: Iterable[Iterable]) -> "CSRMatrix":
+        """build a CSR matrix from the nonzeros of a dense matrix"""
+        A = as_array(A)
+        rows, cols = np.nonzero(A)
+        indptr = np.zeros(A.shape[0] + 1, dtype=np.intp)
+        np.cumsum(np.bincount(rows, minlength=A.shape[0]), out=indptr[1:])
+        return cls(A[rows, cols], cols, indptr, A.shape)
+
+    @classmethod
+    def from_any(cls, A) -> "CSRMatrix":
+        """accept a CSRMatrix, any object exposing the CSR attributes
+        data, indices, indptr and shape (such as scipy.sparse.csr_matrix),
+        or a dense matrix
+        """
+        if isinstance(A, cls):
+            return A
+        if all(hasattr(A, name) for name in ("data", "indices", "indptr", "shape")):
+            return cls(A.data, A.indices, A.indptr, A.shape)
+        return cls.from_dense(A)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """dtype of the values"""
+        return self.data.dtype
+
+    @property
+    def nnz(self) -> int:
+        """number of stored nonzeros"""
+        return len(self.data)
+
+    @property
+    def rows(self) -> np.ndarray:
+        """row index of each stored nonzero"""
+        if self._rows is None:
+            self._rows = np.repeat(
+                np.arange(self.shape[0], dtype=np.intp), np.diff(self.indptr)
+            )
+        return self._rows
+
+    def diagonal(self) -> np.ndarray:
+        """returns the main diagonal. duplicated entries are summed"""
+        mask = self.rows == self.indices
+        return sum_by_index(self.rows[mask], self.data[mask], min(self.shape))
+
+    def matvec(self, x: Iterable) -> np.ndarray:
+        """returns Ax with cost proportional to the number of nonzeros"""
+        x = as_array(x, solve_dtype(self.dtype, x))
+        return sum_by_index(self.rows, self.data * x[self.indices], self.shape[0])
+
+    def canonical(self) -> "CSRMatrix":
+        """returns an equal matrix whose rows have sorted column indices and
+        no duplicate entries, which are summed
+        """
+        ncol = self.shape[1]
+        keys = self.rows * ncol + self.indices
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else []
+        data = np.add.reduceat(self.data[order], first) if len(keys) else self.data
+        keys = keys[first]
+        indptr = np.zeros(self.shape[0] + 1, dtype=np.intp)
+        np.cumsum(np.bincount(keys // ncol, minlength=self.shape[0]), out=indptr[1:])
+        return CSRMatrix(data, keys % ncol, indptr, self.shape)
+
+    def todense(self) -> np.ndarray:
+        """returns the dense matrix"""
+        A = np.zeros(self.shape, dtype=self.dtype)
+        np.add.at(A, (self.rows, self.indices), self.data)
+        return A
+
+
+def sum_by_index(index: np.ndarray, values: np.ndarray, length: int) -> np.ndarray:
+    """array of length whose element i is the sum of the values at index i,
+    in the dtype of values. np.bincount only sums float64, so complex values
+    are summed as their real and imaginary parts
+    """
+    if np.iscomplexobj(values):
+        total = np.bincount(index, values.real, length) + 1j * np.bincount(
+            index, values.imag, length
+        )
+    else:
+        total = np.bincount(index, values, length)
+    return total.astype(values.dtype, copy=False)
+
+
+def multicolor_ordering(A: CSRMatrix) -> np.ndarray:
+    """greedy coloring of the adjacency graph of A, returns the color of
+    every row. two rows share a color only if neither depends on the other,
+    namely A[i, j] == A[j, i] == 0, so all rows of a color can be updated
+    simultaneously in a Gauss-Seidel sweep. for a 5-point stencil in natural
+    order this gives the red-black ordering.
+    """
+    n = A.shape[0]
+    # symmetrize the sparsity pattern and drop the diagonal
+    rows = np.concatenate([A.rows, A.indices])
+    cols = np.concatenate([A.indices, A.rows])
+    offdiag = rows != cols
+    rows, cols = rows[offdiag], cols[offdiag]
+    order = np.argsort(rows, kind="stable")
+    rows, cols = rows[order], cols[order]
+    indptr = np.searchsorted(rows, np.arange(n + 1))
+
+    colors = np.full(n, -1, dtype=np.intp)
+    for i in range(n):
+        neighbors = colors[cols[indptr[i] : indptr[i + 1]]]
+        taken = np.zeros(len(neighbors) + 1, dtype=bool)
+        taken[neighbors[(neighbors >= 0) & (neighbors <= len(neighbors))]] = True
+        colors[i] = taken.argmin()
+    return colors
+
+
+def split_by_color(A: CSRMatrix, colors: Iterable) -> List[Tuple]:
+    """group the rows of A by color. for each color returns the tuple
+    (rows, local row of each nonzero, column indices, values), so that
+    a color can be swept with a handful of whole-array operations
+    """
+    colors = np.asarray(colors)
+    groups = []
+    for color in np.unique(colors):
+        rows = np.flatnonzero(colors == color)
+        counts = A.indptr[rows + 1] - A.indptr[rows]
+        # positions of the nonzeros of the selected rows in data and indices
+        starts = np.repeat(A.indptr[rows] - np.cumsum(counts) + counts, counts)
+        positions = starts + np.arange(counts.sum())
+        local_rows = np.repeat(np.arange(len(rows)), counts)
+        groups.append((rows, local_rows, A.indices[positions], A.data[positions]))
+    return groups
@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from core.factorization.cholesky import (
+    CholeskyFactorization,
+    LDLFactorization,
+    cholesky_factor,
+    ldl_factor,
+)
+
+
+def spd(n, seed=0):
+    M = np.random.default_rng(seed).standard_normal((n, n))
+    return M @ M.T + n * np.identity(n)
+
+
+@pytest.mark.parametrize("n, block_size", [(1, 4), (10, 4), (37, 8), (64, 64)])
+def test_cholesky_factor(n, block_size):
+    A = spd(n)
+    L, info = cholesky_factor(A, block_size)
+    assert info == 0
+    assert_allclose(np.triu(L, 1), 0)
+    assert_allclose(L @ L.T, A, atol=1e-10)
+
+
+def test_cholesky_factor_overwrite_a():
+    A = spd(12)
+    expected = np.linalg.cholesky(A)
+    L, info = cholesky_factor(A, 4, overwrite_a=True)
+    assert L is A
+    assert_allclose(A, expected, atol=1e-12)
+
+
+def test_cholesky_not_positive_definite():
+    A = np.diag([1.0, 2.0, -1.0, 3.0])
+    L, info = cholesky_factor(A, block_size=2)
+    assert info == 3
+    factorization = CholeskyFactorization(A)
+    assert not factorization.positive_definite
+    with pytest.raises(ValueError):
+        factorization.solve(np.ones(4))
+
+
+def test_cholesky_factorization_solve_logdet():
+    A = spd(30)
+    factorization = CholeskyFactorization(A, block_size=8)
+    B = np.random.default_rng(1).standard_normal((30, 4))
+    assert_allclose(A @ factorization.solve(B), B, atol=1e-10)
+    assert_allclose(A @ factorization.solve(B[:, 0]), B[:, 0], atol=1e-10)
+    assert_allclose(factorization.logdet(), np.linalg.slogdet(A)[1])
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 40])
+def test_ldl_factorization(n):
+    M = np.random.default_rng(n).standard_normal((n, n))
+    A = M + M.T
+    factorization = LDLFactorization(A)
+    P = factorization.perm
+    L = factorization.L
+    assert_allclose(L @ factorization.D @ L.T, A[P][:, P], atol=1e-10)
+    assert_allclose(np.triu(L, 1), 0)
+    B = np.random.default_rng(0).standard_normal((n, 3))
+    assert_allclose(A @ factorization.solve(B), B, atol=1e-8)
+    sign, logdet = factorization.slogdet()
+    assert_allclose([sign, logdet], np.linalg.slogdet(A))
+
+
+def test_ldl_2x2_pivot():
+    A = np.array([[0, 1], [1, 0]], dtype=float)
+    factorization = LDLFactorization(A)
+    assert_allclose(factorization.e, [1])
+    assert_allclose(factorization.solve([1, 2]), [2, 1])
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.complex64, np.complex128])
+def test_cholesky_keeps_dtype(dtype):
+    rng = np.random.default_rng(4)
+    M = rng.standard_normal((30, 30))
+    if np.dtype(dtype).kind == "c":
+        M = M + 1j * rng.standard_normal((30, 30))
+    A = (M @ M.conj().T + 30 * np.identity(30)).astype(dtype)
+    factorization = CholeskyFactorization(A, block_size=8)
+    L = factorization.L
+    assert L.dtype == dtype
+    assert_allclose(L @ L.conj().T, A, rtol=1e-4, atol=1e-3)
+    b = np.ones(30)
+    x = factorization.solve(b)
+    assert x.dtype == dtype
+    assert_allclose(A @ x, b, atol=1e-4)
+    assert_allclose(factorization.logdet(), np.linalg.slogdet(A)[1], rtol=1e-4)
+
+
+def test_cholesky_overwrite_a():
+    A = np.array([[4.0, 2.0], [2.0, 3.0]])
+    L, info = cholesky_factor(A, overwrite_a=True)
+    assert info == 0 and L is A
+    A.flags.writeable = False
+    L, info = cholesky_factor(A, overwrite_a=True)
+    assert L is not A
+
+
+def test_ldl_complex_symmetric():
+    rng = np.random.default_rng(5)
+    M = rng.standard_normal((6, 6)) + 1j * rng.standard_normal((6, 6))
+    A = M + M.T
+    factorization = LDLFactorization(A)
+    assert factorization.L.dtype == np.complex128
+    assert_allclose(A @ factorization.solve(np.ones(6)), 1, atol=1e-8)
+    sign, logdet = factorization.slogdet()
+    assert_allclose(sign * np.exp(logdet), np.linalg.det(A))
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 8, 64])
+def test_ldl_factor_blocked(block_size):
+    # a zero diagonal forces 2x2 pivots, some of them across panel ends
+    M = np.random.default_rng(6).standard_normal((30, 30))
+    A = M + M.T
+    A[np.diag_indices(30)] = 0
+    L, d, e, perm = ldl_factor(A, block_size=block_size)
+    assert np.count_nonzero(e) > 0
+    D = np.diag(d) + np.diag(e, -1) + np.diag(e, 1)
+    assert_allclose(L @ D @ L.T, A[perm][:, perm], atol=1e-10)
+    # the pivots don't depend on the block size
+    L1, d1, e1, perm1 = ldl_factor(A, block_size=1)
+    assert_allclose(perm, perm1)
+    assert_allclose(L, L1, atol=1e-10)
+
+
+def test_ldl_factor_lower_triangle_overwrite_a():
+    M = np.random.default_rng(7).standard_normal((12, 12))
+    A = M + M.T
+    B = np.tril(A)  # the upper triangle is never read
+    L, d, e, perm = ldl_factor(B, block_size=4, overwrite_a=True)
+    assert L is B
+    assert_allclose(np.diag(L), 1)
+    factorization = LDLFactorization(A, block_size=4)
+    assert_allclose(L, factorization.L)
+    assert_allclose(A @ factorization.solve(np.ones(12)), 1, atol=1e-10)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from core.factorization.eigen import (
+    companion,
+    eigvals,
+    hessenberg,
+    hessenberg_eigvals,
+    polynomial_roots,
+)
+from core.instrumentation import Metrics
+
+
+def test_hessenberg():
+    A = np.random.default_rng(0).standard_normal((8, 8))
+    H, Q = hessenberg(A, compute_q=True)
+    assert_allclose(np.tril(H, -2), 0)
+    assert_allclose(Q.T @ Q, np.identity(8), atol=1e-12)
+    assert_allclose(Q @ H @ Q.T, A, atol=1e-12)
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 10, 60])
+def test_eigvals(n):
+    A = np.random.default_rng(n).standard_normal((n, n))
+    expected = np.sort_complex(np.linalg.eigvals(A))
+    assert_allclose(np.sort_complex(eigvals(A)), expected, atol=1e-10)
+
+
+def test_eigvals_symmetric():
+    M = np.random.default_rng(0).standard_normal((30, 30))
+    S = M + M.T
+    assert_allclose(np.sort(eigvals(S).real), np.linalg.eigvalsh(S), atol=1e-10)
+
+
+def test_eigvals_not_square():
+    with pytest.raises(ValueError):
+        eigvals(np.ones((2, 3)))
+
+
+def test_hessenberg_eigvals_max_iter():
+    H = hessenberg(np.random.default_rng(0).standard_normal((10, 10)))
+    with pytest.raises(ValueError):
+        hessenberg_eigvals(H, max_iter=0)
+
+
+def test_companion():
+    C = companion([4, -10, 10, -5, 1])
+    assert_allclose(C[:, -1], [-4, 10, -10, 5])
+    assert_allclose(np.diag(C, -1), 1)
+
+
+def test_polynomial_roots():
+    metrics = Metrics()
+    roots = polynomial_roots([4, -10, 10, -5, 1], metrics=metrics)
+    assert_allclose(np.sort_complex(roots), [1 - 1j, 1 + 1j, 1, 2], atol=1e-12)
+    assert metrics.counts["iterations"] > 0
+
+
+def test_polynomial_roots_zeros():
+    # x^4 - 5x^3 + 6x^2 with zero leading coef
+    roots = polynomial_roots([0, 0, 6, -5, 1, 0])
+    assert_allclose(np.sort_complex(roots), [0, 0, 2, 3], atol=1e-12)
+
+
+def test_polynomial_roots_wilkinson():
+    a = np.polynomial.polynomial.polyfromroots(np.arange(1, 11))
+    assert_allclose(np.sort(polynomial_roots(a).real), np.arange(1, 11), rtol=1e-8)
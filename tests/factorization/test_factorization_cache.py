@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from core.factorization.cache import FactorizationCache, content_key
+from core.instrumentation import Metrics
+from core.solver.lu_decomposition_solver import LUDecompositionSolver
+
+
+def _matrix(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, n)) + n * np.identity(n)
+
+
+def test_content_key():
+    A = _matrix(5)
+    assert content_key(A, "lu") == content_key(A.copy(), "lu")
+    assert content_key(A, "lu") == content_key(np.asfortranarray(A), "lu")
+    assert content_key(A, "lu") != content_key(A, "cholesky")
+    assert content_key(A, "lu") != content_key(A, "lu", np.float32)
+    assert content_key(A, "lu") != content_key(A, "lu", block_size=2)
+    B = A.copy()
+    B[2, 3] += 1e-12
+    assert content_key(A, "lu") != content_key(B, "lu")
+
+
+def test_hits_and_misses():
+    cache = FactorizationCache()
+    metrics = Metrics()
+    A = _matrix(6)
+    b = np.arange(6.0)
+    first = cache.factorize(A, "lu", metrics=metrics)
+    second = cache.factorize(A.copy(), "lu", metrics=metrics)
+    assert first is second
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+    assert metrics.counts["cache_hits"] == 1
+    assert metrics.counts["cache_misses"] == 1
+    assert_allclose(A @ second.solve(b), b, atol=1e-10)
+
+    single = cache.factorize(A, "lu", dtype=np.float32)
+    assert single.lu.dtype == np.float32
+    assert cache.misses == 2
+
+
+@pytest.mark.parametrize("method", ["lu", "cholesky", "ldl"])
+def test_methods(method):
+    cache = FactorizationCache()
+    A = _matrix(5)
+    A = A @ A.T
+    b = np.ones(5)
+    factorization = cache.factorize(A, method)
+    assert cache.factorize(A, method) is factorization
+    assert_allclose(A @ factorization.solve(b), b, atol=1e-10)
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        FactorizationCache().factorize(np.identity(2), "svd")
+    with pytest.raises(ValueError):
+        FactorizationCache().factorize(np.identity(2), "cholesky", dtype=np.float32)
+
+
+def test_lru_eviction():
+    n = 10
+    entry = n * n * 8 + n * 8  # packed factors and permutation
+    cache = FactorizationCache(max_bytes=2 * entry)
+    A, B, C = (_matrix(n, seed) for seed in range(3))
+    cache.factorize(A)
+    cache.factorize(B)
+    cache.factorize(A)  # A is now the most recently used
+    cache.factorize(C)  # evicts B
+    assert (len(cache), cache.evictions, cache.nbytes) == (2, 1, 2 * entry)
+    assert content_key(B, "lu", dtype=float) not in cache
+    cache.factorize(A)
+    assert cache.hits == 2
+
+    small = FactorizationCache(max_bytes=entry - 1)
+    small.factorize(A)
+    assert len(small) == 0 and small.nbytes == 0
+
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0 and cache.hits == 2
+
+
+def test_solver_cache():
+    cache = FactorizationCache()
+    A = _matrix(4)
+    b = np.arange(4.0)
+    extended = np.column_stack([A, b])
+    for _ in range(3):
+        solver = LUDecompositionSolver(cache=cache)
+        solver.set(extended.copy())
+        assert_allclose(A @ solver.solve(), b, atol=1e-10)
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert_allclose(solver.L @ solver.U, A[solver.factorization.perm], atol=1e-10)
+
+    solver = LUDecompositionSolver(mixed_precision=True, cache=cache)
+    solver.set(extended)
+    assert_allclose(A @ solver.solve(), b, atol=1e-10)
+    assert solver.factorization.lu.dtype == np.float32
+    assert cache.misses == 2
+
+
+def test_content_key_of_view():
+    extended = np.column_stack([_matrix(6), np.ones(6)])
+    view = extended[:, :6]
+    assert not view.flags.c_contiguous
+    assert content_key(view, "lu") == content_key(view.copy(), "lu")
+
+
+def test_shared_factorization_keeps_caller_metrics():
+    cache = FactorizationCache()
+    A = np.column_stack([_matrix(5), np.ones(5)])
+    first, second = Metrics(), Metrics()
+    for metrics in (first, second):
+        solver = LUDecompositionSolver(metrics=metrics, cache=cache)
+        solver.set(A)
+        solver.solve()
+    assert solver.factorization.metrics is None
+    assert "factorize" in first.timings and "factorize" not in second.timings
+    assert "solve" in first.timings and "solve" in second.timings
+    assert first.counts["cache_misses"] == second.counts["cache_hits"] == 1
@@ -1,11 +1,13 @@
-from core.factorization.lu import LUDecomposer
+import numpy as np
+import pytest
+from core.factorization.lu import LUDecomposer, LUFactorization, lu_factor, unpack_lu
 from numpy import matmul
-from numpy.testing import assert_allclose
+from numpy.testing import assert_allclose, assert_array_equal
 
 
 def test_lu_decomposer():
     A = [[2, 4, 3, 5], [-4, -7, -5, -8], [6, 8, 2, 9], [4, 9, -2, 14]]
-    decomposer = LUDecomposer()
+    decomposer = LUDecomposer(pivot=False)
     decomposer.set(A)
 
     L, U = decomposer.decompose()
@@ -34,4 +36,99 @@ def test_lu_decomposer2():
     decomposer.set(A)
 
     L, U = decomposer.decompose()
-    assert_allclose(A, matmul(L, U), rtol=1e-6)
+    assert_allclose(np.array(A)[decomposer.perm], matmul(L, U), rtol=1e-6)
+
+
+def test_lu_decomposer_zero_pivot():
+    A = [[0, 1, 2], [1, 0, 3], [4, -3, 8]]
+    decomposer = LUDecomposer()
+    decomposer.set(A)
+
+    L, U = decomposer.decompose()
+    assert_allclose(np.array(A)[decomposer.perm], matmul(L, U), atol=1e-12)
+    assert np.all(np.abs(np.tril(L, -1)) <= 1)
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 8, 64])
+def test_lu_factor_blocked(block_size):
+    rng = np.random.default_rng(0)
+    A = rng.standard_normal((37, 37))
+    lu, perm = lu_factor(A, block_size=block_size)
+    L, U = unpack_lu(lu)
+    assert_allclose(A[perm], L @ U, atol=1e-10)
+    assert sorted(perm) == list(range(37))
+
+
+def test_lu_factor_singular():
+    with pytest.raises(ValueError):
+        lu_factor([[1, 2], [2, 4]])
+
+
+def test_lu_factorization_solve_many():
+    rng = np.random.default_rng(1)
+    A = rng.standard_normal((50, 50))
+    B = rng.standard_normal((50, 7))
+    factorization = LUFactorization(A, block_size=16)
+
+    X = factorization.solve(B)
+    assert X.shape == (50, 7)
+    assert_allclose(A @ X, B, atol=1e-10)
+
+    x = factorization.solve(B[:, 0])
+    assert x.shape == (50,)
+    assert_allclose(x, X[:, 0], atol=1e-12)
+    assert_allclose(
+        A[factorization.perm], factorization.L @ factorization.U, atol=1e-10
+    )
+
+
+def test_lu_factorization_solve_transpose():
+    rng = np.random.default_rng(2)
+    A = rng.standard_normal((30, 30))
+    B = rng.standard_normal((30, 3))
+    X = LUFactorization(A, block_size=8).solve_transpose(B)
+    assert_allclose(A.T @ X, B, atol=1e-10)
+
+
+def test_lu_factorization_float32():
+    A = np.random.default_rng(0).standard_normal((20, 20))
+    factorization = LUFactorization(A, block_size=8, dtype=np.float32)
+    assert factorization.lu.dtype == np.float32
+    x = factorization.solve(np.ones(20))
+    assert x.dtype == np.float32
+    assert_allclose(A @ x, np.ones(20), atol=1e-3)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.complex64, np.complex128])
+def test_lu_factorization_keeps_dtype(dtype):
+    rng = np.random.default_rng(3)
+    A = rng.standard_normal((20, 20)) + 20 * np.identity(20)
+    if np.dtype(dtype).kind == "c":
+        A = A + 1j * rng.standard_normal((20, 20))
+    A = A.astype(dtype)
+    factorization = LUFactorization(A, block_size=8)
+    assert factorization.lu.dtype == dtype
+    x = factorization.solve(np.ones(20))
+    assert x.dtype == dtype
+    assert_allclose(A @ x, np.ones(20), atol=1e-4)
+    assert_allclose(A.T @ factorization.solve_transpose(np.ones(20)), 1, atol=1e-4)
+
+
+def test_lu_factorization_complex_rhs():
+    A = np.array([[4.0, 1.0], [2.0, 3.0]])
+    x = LUFactorization(A).solve([1j, 1])
+    assert x.dtype == np.complex128
+    assert_allclose(A @ x, [1j, 1])
+
+
+def test_lu_decomposer_overwrite_a():
+    A = np.array([[7, 2, -3], [2, 5, -3], [1, -1, -6]], dtype=float)
+    original = A.copy()
+    decomposer = LUDecomposer()
+    decomposer.set(A)
+    L, U = decomposer.decompose()
+    assert_array_equal(A, original)
+
+    decomposer.set(A, overwrite_a=True)
+    assert_allclose(decomposer.decompose()[1], U)
+    assert decomposer.lu is A
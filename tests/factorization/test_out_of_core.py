@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from core.factorization.lu import lu_factor
+from core.factorization.out_of_core import (
+    OutOfCoreLUFactorization,
+    lu_factor_out_of_core,
+)
+
+
+@pytest.fixture
+def A():
+    return np.random.default_rng(0).standard_normal((45, 45))
+
+
+@pytest.mark.parametrize("panel_size", [1, 8, 64])
+def test_lu_factor_out_of_core(tmp_path, A, panel_size):
+    path = tmp_path / "factors.npy"
+    factorization = lu_factor_out_of_core(A, path, panel_size=panel_size)
+
+    lu, perm = lu_factor(A)
+    assert_allclose(factorization.perm, perm)
+    assert_allclose(factorization.lu, lu, atol=1e-10)
+
+    B = np.arange(90, dtype=float).reshape(45, 2)
+    assert_allclose(A @ factorization.solve(B), B, atol=1e-9)
+
+
+def test_lu_factor_out_of_core_from_npy(tmp_path, A):
+    source = tmp_path / "A.npy"
+    np.save(source, A)
+    lu_factor_out_of_core(str(source), tmp_path / "factors.npy", panel_size=10)
+
+    # the factors can be reopened later and streamed from disk
+    factorization = OutOfCoreLUFactorization(tmp_path / "factors.npy", panel_size=10)
+    b = np.ones(45)
+    assert_allclose(A @ factorization.solve(b), b, atol=1e-9)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.complex128])
+def test_lu_factor_out_of_core_dtypes(tmp_path, A, dtype):
+    A = A.astype(dtype)
+    if np.iscomplexobj(A):
+        A *= 1 + 1j
+    factorization = lu_factor_out_of_core(A, tmp_path / "factors.npy", panel_size=8)
+    assert factorization.lu.dtype == dtype
+    b = np.ones(45, dtype=dtype)
+    x = factorization.solve(b)
+    assert x.dtype == dtype
+    assert_allclose(A @ x, b, atol=1e-3 if dtype == np.float32 else 1e-9)
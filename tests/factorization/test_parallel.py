@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from core.factorization.lu import LUFactorization, lu_factor
+from core.factorization.parallel import SharedLUFactors, parallel_lu_solve
+from core.solver.lu_decomposition_solver import matrix_inv_lu
+
+
+@pytest.mark.parametrize("processes, chunk_size", [(1, None), (2, None), (3, 4)])
+def test_parallel_lu_solve(processes, chunk_size):
+    rng = np.random.default_rng(0)
+    A = rng.standard_normal((40, 40))
+    B = rng.standard_normal((40, 10))
+    lu, perm = lu_factor(A, block_size=16)
+    X = parallel_lu_solve(lu, perm, B, 16, processes, chunk_size)
+    assert_allclose(A @ X, B, atol=1e-10)
+
+
+def test_parallel_solve_and_inverse():
+    A = np.random.default_rng(1).standard_normal((30, 30))
+    factorization = LUFactorization(A)
+    B = np.identity(30)[:, :7]
+    assert_allclose(factorization.solve(B, processes=2), factorization.solve(B))
+    inv = matrix_inv_lu(A, processes=2, chunk_size=8)
+    assert_allclose(A @ inv, np.identity(30), atol=1e-10)
+
+
+def test_parallel_lu_solve_shape():
+    lu, perm = lu_factor(np.identity(3))
+    with pytest.raises(ValueError):
+        parallel_lu_solve(lu, perm, np.ones(3))
+
+
+@pytest.mark.parametrize("dtype, rtol", [(np.float32, 1e-4), (np.complex128, 1e-10)])
+def test_parallel_solve_dtypes(dtype, rtol):
+    rng = np.random.default_rng(2)
+    A = rng.standard_normal((20, 20)).astype(dtype)
+    factorization = LUFactorization(A)
+    B = rng.standard_normal((20, 6)).astype(dtype)
+    if np.iscomplexobj(B):
+        B += 1j * rng.standard_normal((20, 6))
+    X = factorization.solve(B, processes=2)
+    assert X.dtype == dtype
+    assert_allclose(X, factorization.solve(B), rtol=rtol)
+
+
+def test_parallel_solve_complex_right_hand_side():
+    rng = np.random.default_rng(3)
+    A = rng.standard_normal((20, 20))
+    B = rng.standard_normal((20, 6)) + 1j * rng.standard_normal((20, 6))
+    X = LUFactorization(A).solve(B, processes=2)
+    assert X.dtype == np.complex128
+    assert_allclose(A @ X, B, atol=1e-10)
+
+
+def test_shared_factors_are_reused():
+    rng = np.random.default_rng(4)
+    A = rng.standard_normal((20, 20))
+    B = rng.standard_normal((20, 6))
+    with LUFactorization(A) as factorization:
+        X = factorization.solve(B, processes=2)
+        shared, executor = factorization._shared, factorization._shared._executor
+        assert_allclose(factorization.solve(2 * B, processes=2), 2 * X)
+        assert factorization._shared is shared
+        assert shared._executor is executor
+    assert factorization._shared is None
+    with pytest.raises(ValueError):
+        shared.solve(B)
+    # closed factorizations share their factors again when needed
+    assert_allclose(factorization.solve(B, processes=2), X)
+    factorization.close()
+
+
+def test_shared_lu_factors():
+    A = np.random.default_rng(5).standard_normal((15, 15))
+    lu, perm = lu_factor(A)
+    with SharedLUFactors(lu, perm) as shared:
+        X = shared.solve(np.identity(15), processes=1)
+        with pytest.raises(ValueError):
+            shared.solve(np.ones((14, 2)))
+    assert_allclose(A @ X, np.identity(15), atol=1e-10)
@@ -1,8 +1,19 @@
 import numpy as np
 import pytest
 
-from numpy.testing import assert_almost_equal
-from core.factorization.qr import classical_gram_schmidt, modified_gram_schmidt, house_qr
+from numpy.testing import assert_allclose, assert_almost_equal
+from core.factorization.qr import (
+    StreamingLeastSquares,
+    blocked_house_qr,
+    classical_gram_schmidt,
+    house_apply,
+    house_apply_transpose,
+    house_lstsq,
+    house_qr,
+    house_qr_apply,
+    modified_gram_schmidt,
+    tsqr,
+)
 
 
 @pytest.fixture
@@ -37,3 +48,140 @@ def test_householder_reflection(A):
     Q, R = house_qr(A)
     assert_almost_equal(Q.T * Q, np.identity(3))
     assert_almost_equal(Q * R, np.matrix(A))
+
+
+@pytest.mark.parametrize("shape", [(60, 20), (20, 20), (15, 25)])
+@pytest.mark.parametrize("block_size", [1, 4, 32])
+def test_blocked_house_qr(shape, block_size):
+    B = np.random.default_rng(0).standard_normal(shape)
+    Q, R = house_qr(B, block_size=block_size)
+    k = min(shape)
+    assert isinstance(Q, np.ndarray) and not isinstance(Q, np.matrix)
+    assert Q.shape == (shape[0], k)
+    assert_almost_equal(Q.T @ Q, np.identity(k))
+    assert_almost_equal(Q @ R, B)
+    assert_almost_equal(np.tril(R, -1), 0)
+
+
+def test_blocked_house_qr_packed():
+    B = np.random.default_rng(1).standard_normal((40, 10))
+    qr, tau = blocked_house_qr(B, block_size=4)
+    R = np.triu(qr[:10])
+
+    # Q.T * B recovers R without forming Q
+    QtB = house_qr_apply(qr, tau, B, transpose=True, block_size=4)
+    assert_almost_equal(QtB[:10], R)
+    assert_almost_equal(QtB[10:], 0)
+    assert_almost_equal(house_qr_apply(qr, tau, QtB, block_size=4), B)
+
+
+def test_house_qr_u_mode(A):
+    U, R = house_qr(A, compute_q=False)
+    assert_almost_equal(house_apply_transpose(U, A)[:3], R)
+    assert_almost_equal(house_apply(U, np.identity(4))[:, :3] * R, A)
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_tsqr(processes):
+    B = np.random.default_rng(2).standard_normal((500, 12))
+    R = tsqr(B, chunk_rows=60, processes=processes)
+    assert R.shape == (12, 12)
+    assert_almost_equal(np.tril(R, -1), 0)
+    # R is unique up to the sign of its rows
+    _, R_ref = house_qr(B)
+    assert_almost_equal(np.abs(R), np.abs(R_ref))
+    assert_almost_equal(R.T @ R, B.T @ B)
+
+
+def test_tsqr_empty():
+    with pytest.raises(ValueError):
+        tsqr(np.zeros((0, 3)), processes=1)
+    with pytest.raises(ValueError):
+        tsqr(np.zeros((5, 3)), chunk_rows=0, processes=1)
+
+
+def test_tsqr_npy_file(tmp_path):
+    B = np.random.default_rng(3).standard_normal((300, 5))
+    path = tmp_path / "design.npy"
+    np.save(path, B)
+    R = tsqr(str(path), chunk_rows=70, processes=2)
+    assert_almost_equal(R.T @ R, B.T @ B)
+
+
+def test_house_lstsq():
+    rng = np.random.default_rng(0)
+    A = rng.standard_normal((50, 6))
+    b = rng.standard_normal(50)
+    expected, residual = np.linalg.lstsq(A, b, rcond=None)[:2]
+    x, norm = house_lstsq(A, b, block_size=4)
+    assert_allclose(x, expected)
+    assert_allclose(norm**2, residual[0])
+    X, norms = house_lstsq(A, np.column_stack([b, 2 * b]))
+    assert_allclose(X[:, 1], 2 * expected)
+    with pytest.raises(ValueError):
+        house_lstsq(A.T, b[:6])
+
+
+def test_streaming_least_squares():
+    rng = np.random.default_rng(1)
+    A = rng.standard_normal((300, 5))
+    b = A @ np.arange(5) + 0.1 * rng.standard_normal(300)
+    expected, residual = np.linalg.lstsq(A, b, rcond=None)[:2]
+    fit = StreamingLeastSquares(5)
+    with pytest.raises(ValueError):
+        fit.solve()
+    fit.add_batches((A[i : i + 32], b[i : i + 32]) for i in range(0, 300, 32))
+    assert fit.count == 300
+    assert_allclose(fit.solve(), expected)
+    assert_allclose(fit.residual, residual[0])
+
+
+def test_streaming_least_squares_forgetting():
+    rng = np.random.default_rng(2)
+    A = rng.standard_normal((40, 3))
+    b = rng.standard_normal(40)
+    fit = StreamingLeastSquares(3, forgetting=0.9)
+    for row, rhs in zip(A, b):
+        fit.add(row, rhs)
+    weights = np.sqrt(0.9 ** np.arange(39, -1, -1))
+    expected = np.linalg.lstsq(A * weights[:, None], b * weights, rcond=None)[0]
+    assert_allclose(fit.solve(), expected)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.complex64, np.complex128])
+def test_house_qr_dtypes(dtype):
+    rng = np.random.default_rng(4)
+    B = rng.standard_normal((30, 8)).astype(dtype)
+    if np.iscomplexobj(B):
+        B += 1j * rng.standard_normal((30, 8))
+    Q, R = house_qr(B, block_size=3)
+    decimal = 4 if dtype in (np.float32, np.complex64) else 7
+    assert Q.dtype == R.dtype == dtype
+    assert_almost_equal(Q.conj().T @ Q, np.identity(8), decimal)
+    assert_almost_equal(Q @ R, B, decimal)
+    if np.iscomplexobj(B):
+        with pytest.raises(ValueError):
+            house_qr(B, compute_q=False)
+
+
+def test_house_lstsq_complex():
+    rng = np.random.default_rng(5)
+    A = rng.standard_normal((40, 5)) + 1j * rng.standard_normal((40, 5))
+    b = rng.standard_normal(40) + 1j * rng.standard_normal(40)
+    expected, residual = np.linalg.lstsq(A, b, rcond=None)[:2]
+    x, norm = house_lstsq(A, b, block_size=2)
+    assert_allclose(x, expected)
+    assert_allclose(norm**2, residual[0])
+    # a complex b against a real A
+    x, _ = house_lstsq(A.real, b)
+    assert_allclose(x, np.linalg.lstsq(A.real, b, rcond=None)[0])
+
+
+def test_streaming_least_squares_complex():
+    rng = np.random.default_rng(6)
+    A = rng.standard_normal((60, 4)) + 1j * rng.standard_normal((60, 4))
+    b = rng.standard_normal(60) + 1j * rng.standard_normal(60)
+    expected, residual = np.linalg.lstsq(A, b, rcond=None)[:2]
+    fit = StreamingLeastSquares(4).add_batches([(A[:25], b[:25]), (A[25:], b[25:])])
+    assert_allclose(fit.solve(), expected)
+    assert_allclose(fit.residual, residual[0])
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from core.factorization.triangular import (
+    backward_substitute,
+    forward_substitute,
+    solve_triangular,
+)
+
+
+@pytest.fixture
+def T():
+    rng = np.random.default_rng(0)
+    return rng.standard_normal((20, 20)) + 20 * np.identity(20)
+
+
+@pytest.mark.parametrize("block_size", [1, 6, 64])
+def test_forward_substitute(T, block_size):
+    L = np.tril(T)
+    B = np.arange(60, dtype=float).reshape(20, 3)
+    X = forward_substitute(T, B, block_size=block_size)
+    assert_allclose(L @ X, B, atol=1e-10)
+
+
+@pytest.mark.parametrize("block_size", [1, 6, 64])
+def test_backward_substitute(T, block_size):
+    U = np.triu(T)
+    b = np.arange(20, dtype=float)
+    x = backward_substitute(T, b, block_size=block_size)
+    assert_allclose(U @ x, b, atol=1e-10)
+
+
+def test_unit_diagonal(T):
+    L = np.tril(T, -1) + np.identity(20)
+    b = np.ones(20)
+    assert_allclose(L @ forward_substitute(T, b, unit_diagonal=True), b, atol=1e-10)
+
+
+@pytest.mark.parametrize("lower", [True, False])
+def test_solve_triangular_transpose(T, lower):
+    M = np.tril(T) if lower else np.triu(T)
+    B = np.ones((20, 2))
+    X = solve_triangular(T, B, lower=lower, trans=True, block_size=7)
+    assert_allclose(M.T @ X, B, atol=1e-10)
+
+
+def test_solve_triangular_overwrite_b(T):
+    B = np.ones((20, 4))
+    X = solve_triangular(T, B, lower=True, overwrite_b=True)
+    assert X is B
+    assert_allclose(np.tril(T) @ X, np.ones((20, 4)), atol=1e-10)
+
+    b = np.ones(20)
+    x = solve_triangular(T, b, lower=True)
+    assert x is not b
+    assert_allclose(b, np.ones(20))
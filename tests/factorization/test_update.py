@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from core.factorization.lu import lu_factor, unpack_lu
+from core.factorization.update import (
+    full_qr,
+    lu_update,
+    qr_delete_col,
+    qr_delete_row,
+    qr_insert_col,
+    qr_insert_row,
+    qr_update,
+    r_delete_row,
+    r_insert_row,
+)
+
+
+def assert_qr(Q, R, A):
+    assert_allclose(Q @ R, A, atol=1e-12)
+    assert_allclose(Q.T @ Q, np.identity(Q.shape[0]), atol=1e-12)
+    assert_allclose(np.tril(R, -1), 0, atol=1e-12)
+
+
+@pytest.fixture(params=[(8, 5), (5, 5), (4, 6)])
+def factorization(request):
+    m, n = request.param
+    A = np.random.default_rng(m * n).standard_normal((m, n))
+    Q, R = full_qr(A)
+    assert_qr(Q, R, A)
+    return A, Q, R
+
+
+def test_qr_update(factorization):
+    A, Q, R = factorization
+    rng = np.random.default_rng(0)
+    u, v = rng.standard_normal(A.shape[0]), rng.standard_normal(A.shape[1])
+    assert_qr(*qr_update(Q, R, u, v), A + np.outer(u, v))
+
+
+def test_qr_insert_delete_row(factorization):
+    A, Q, R = factorization
+    row = np.random.default_rng(0).standard_normal(A.shape[1])
+    for k in [0, 2, A.shape[0]]:
+        assert_qr(*qr_insert_row(Q, R, row, k), np.insert(A, k, row, axis=0))
+    for k in [0, 2, A.shape[0] - 1]:
+        assert_qr(*qr_delete_row(Q, R, k), np.delete(A, k, axis=0))
+
+
+def test_qr_insert_row_lists():
+    A = np.array([[3.0, 1.0], [4.0, 2.0]])
+    Q, R = full_qr(A)
+    assert_qr(
+        *qr_insert_row(Q.tolist(), R.tolist(), [1, 1], 1), [[3, 1], [1, 1], [4, 2]]
+    )
+
+
+def test_qr_insert_delete_col(factorization):
+    A, Q, R = factorization
+    col = np.random.default_rng(0).standard_normal(A.shape[0])
+    for k in [0, 2, A.shape[1]]:
+        assert_qr(*qr_insert_col(Q, R, col, k), np.insert(A, k, col, axis=1))
+    for k in [0, 2, A.shape[1] - 1]:
+        assert_qr(*qr_delete_col(Q, R, k), np.delete(A, k, axis=1))
+
+
+def test_sliding_window():
+    rng = np.random.default_rng(1)
+    rows = rng.standard_normal((20, 4))
+    Q, R = full_qr(rows[:6])
+    for t in range(6, 20):
+        Q, R = qr_insert_row(Q, R, rows[t], Q.shape[0])
+        Q, R = qr_delete_row(Q, R, 0)
+    assert_qr(Q, R, rows[14:])
+
+
+def test_r_sliding_window():
+    rng = np.random.default_rng(2)
+    rows = rng.standard_normal((30, 4))
+    R = np.zeros((0, 4))
+    for t in range(6):
+        R = r_insert_row(R, rows[t])
+    assert R.shape == (4, 4)
+    for t in range(6, 30):
+        R = r_insert_row(R, rows[t])
+        R = r_delete_row(R, rows[t - 6])
+    A = rows[24:]
+    assert_allclose(np.tril(R, -1), 0, atol=1e-12)
+    assert_allclose(R.T @ R, A.T @ A, atol=1e-10)
+    assert_allclose(np.abs(R), np.abs(full_qr(A)[1][:4]), atol=1e-10)
+
+
+def test_r_delete_row_rank_deficient():
+    A = np.array([[1.0, 0.0], [0.0, 1.0]])
+    R = full_qr(A)[1]
+    with pytest.raises(ValueError):
+        r_delete_row(R, A[0])
+
+
+def test_lu_update():
+    rng = np.random.default_rng(2)
+    A = rng.standard_normal((7, 7))
+    u, v = rng.standard_normal(7), rng.standard_normal(7)
+    lu, perm = lu_update(*lu_factor(A, block_size=3), u, v)
+    L, U = unpack_lu(lu)
+    assert_allclose(L @ U, (A + np.outer(u, v))[perm], atol=1e-10)
+    with pytest.raises(ValueError):
+        lu_update(*lu_factor(np.identity(2)), [-1, 0], [1, 0])
@@ -0,0 +1,32 @@
+import pytest
+
+from core.instrumentation import Metrics
+from core.optimization.cache import CachedFunction, cached
+
+
+def test_cached_function():
+    calls = []
+
+    def f(x):
+        calls.append(x)
+        return x * x
+
+    metrics = Metrics()
+    g = CachedFunction(f, maxsize=2, metrics=metrics)
+    assert [g(1), g(2), g(1), g(3), g(2)] == [1, 4, 1, 9, 4]
+    # 2 was the least recently used entry when 3 was added
+    assert calls == [1, 2, 3, 2]
+    assert (g.hits, g.misses, len(g)) == (1, 4, 2)
+    assert metrics.counts["evaluations"] == 4
+    assert metrics.counts["cache_hits"] == 1
+
+    g.clear()
+    assert (g.hits, g.misses, len(g)) == (0, 0, 0)
+
+
+def test_cached_shares_cache():
+    g = CachedFunction(abs)
+    assert cached(g) is g
+    assert cached(abs).f is abs
+    with pytest.raises(ValueError):
+        CachedFunction(abs, maxsize=0)
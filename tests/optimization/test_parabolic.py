@@ -1,5 +1,10 @@
 from math import sin
 
+import pytest
+
+from core.instrumentation import Metrics
+from core.optimization.brent import brent
+from core.optimization.cache import CachedFunction
 from core.optimization.parabolic import parabolic
 
 
@@ -10,3 +15,20 @@ def f(x):
 def test_parabolic():
     assert abs(parabolic(f, 0, 1, 4) - 1.4275523) < 1e-6
 
+
+
+def test_parabolic_evaluates_once_per_iteration():
+    f_cached = CachedFunction(f)
+    metrics = Metrics()
+    parabolic(f_cached, 0, 1, 4, metrics=metrics)
+    # the three initial points, then one new point per iteration
+    assert f_cached.misses <= metrics.counts["iterations"] + 3
+    assert f_cached.hits >= 2 * metrics.counts["iterations"]
+
+
+def test_brent():
+    assert abs(parabolic(f, 0, 1, 4, method="brent") - 1.4275523) < 1e-6
+    # a kink at the maximum degenerates the parabola
+    assert abs(brent(lambda x: -abs(x - 1), 0, 0.5, 4) - 1) < 1e-5
+    with pytest.raises(ValueError):
+        brent(f, 0, 5, 4)
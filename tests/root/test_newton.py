@@ -1,4 +1,7 @@
-from core.root.newton import newton
+import numpy as np
+import pytest
+
+from core.root.newton import newton, newton_vectorized
 
 
 def f(x):
@@ -10,3 +13,25 @@ def g(x):
 def test_newton():
     assert abs(newton(f, g, 0) - 1) < 1e-6
     
+
+
+@pytest.mark.parametrize("derivative", ["complex_step", "finite_difference"])
+def test_newton_vectorized(derivative):
+    x0 = np.linspace(0.5, 4, 1000)
+    x, converged = newton_vectorized(lambda x: x**3 - 2, x0, derivative=derivative)
+    assert converged.all()
+    assert np.allclose(x, 2 ** (1 / 3))
+
+
+def test_newton_vectorized_analytic_derivative():
+    x, converged = newton_vectorized(f, [0.0, 3.0], g=g, tol=1e-8)
+    assert converged.all()
+    assert np.allclose(x, 1, atol=1e-6)
+
+
+def test_newton_vectorized_not_converged():
+    # no real root, and a zero derivative at the initial guess
+    x, converged = newton_vectorized(lambda x: x**2 + 1, [1.0], max_iter=5)
+    assert not converged[0]
+    x, converged = newton_vectorized(lambda x: x**2 - 1, [0.0, 2.0])
+    assert list(converged) == [False, True]
@@ -0,0 +1,38 @@
+import numpy as np
+from numpy.testing import assert_allclose
+
+from core.instrumentation import Metrics
+from core.solver.bairstow_solver import BairstowSolver
+
+
+def test_solve_batch_matches_solve():
+    a = [4, -10, 10, -5, 1]
+    solver = BairstowSolver(1e-10, 1e-10)
+    expected = solver.solve(a, r=0.5, s=-0.5)
+    roots = solver.solve_batch([a, a], r=0.5, s=-0.5)
+    assert roots.shape == (2, 4)
+    assert solver.converged.all()
+    assert_allclose(roots[0], expected, atol=1e-8)
+    assert_allclose(roots[1], expected, atol=1e-8)
+
+
+def test_solve_batch_real_roots():
+    rng = np.random.default_rng(0)
+    expected = np.sort(rng.uniform(1, 5, (200, 5)), axis=1)
+    A = np.array([np.polynomial.polynomial.polyfromroots(r) for r in expected])
+    solver = BairstowSolver(1e-8, 1e-8)
+    roots = solver.solve_batch(A, r=0.5, s=-0.5)
+    converged = solver.converged
+    assert converged.mean() > 0.95
+    assert_allclose(
+        np.sort(roots[converged].real, axis=1), expected[converged], atol=1e-6
+    )
+    assert_allclose(roots[converged].imag, 0, atol=1e-6)
+
+
+def test_solve_batch_max_iter():
+    metrics = Metrics()
+    solver = BairstowSolver(1e-12, 1e-12, metrics=metrics)
+    solver.solve_batch([[4, -10, 10, -5, 1]], r=0.5, s=-0.5, max_iter=2)
+    assert not solver.converged[0]
+    assert metrics.counts["iterations"] == 2
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from core.solver.banded_solver import (
+    BandedSolver,
+    CyclicTridiagonalSolver,
+    TridiagonalSolver,
+    dense_to_banded,
+)
+
+
+def random_banded(rng, batch, n, lower, upper):
+    A = np.zeros((batch, n, n))
+    for k in range(-lower, upper + 1):
+        i = np.arange(max(-k, 0), min(n - k, n))
+        A[:, i, i + k] = rng.standard_normal((batch, len(i)))
+    return A
+
+
+def test_dense_to_banded():
+    A = np.array([[1, 2, 0], [3, 4, 5], [0, 6, 7]], dtype=float)
+    assert_allclose(dense_to_banded(A, 1, 1), [[0, 2, 5], [1, 4, 7], [3, 6, 0]])
+
+
+@pytest.mark.parametrize("lower, upper", [(1, 1), (2, 2), (1, 3), (2, 0), (0, 2)])
+def test_banded_solver(lower, upper):
+    rng = np.random.default_rng(lower * 10 + upper)
+    A = random_banded(rng, 8, 15, lower, upper) + 3 * np.identity(15)
+    b = rng.standard_normal((8, 15))
+    solver = BandedSolver()
+    solver.set(dense_to_banded(A, lower, upper), b, lower, upper)
+    x = solver.solve()
+    assert_allclose(np.einsum("bij,bj->bi", A, x), b, atol=1e-10)
+    # the factorization is reused for other right hand sides
+    assert_allclose(solver.solve(2 * b), 2 * x)
+
+
+def test_banded_solver_pivoting_and_singular():
+    A = np.array([[[0, 1, 0], [1, 0, 1], [0, 1, 1]], np.identity(3)], dtype=float)
+    A[1, 2, 2] = 0
+    solver = BandedSolver()
+    solver.set(dense_to_banded(A, 1, 1), np.ones((2, 3)))
+    x = solver.solve()
+    assert_allclose(x[0], np.linalg.solve(A[0], np.ones(3)))
+    assert list(solver.singular) == [False, True]
+    assert np.isnan(x[1]).all()
+
+
+def test_tridiagonal_solver():
+    n = 20
+    A = 4 * np.identity(n) + np.eye(n, k=1) + 2 * np.eye(n, k=-1)
+    b = np.arange(n, dtype=float)
+    solver = TridiagonalSolver()
+    solver.set(dense_to_banded(A, 1, 1), b)
+    assert_allclose(solver.solve(), np.linalg.solve(A, b))
+
+    stacked = np.stack([dense_to_banded(A, 1, 1), dense_to_banded(2 * A, 1, 1)])
+    solver.set(stacked, np.stack([b, b]))
+    x = solver.solve()
+    assert_allclose(x[1], x[0] / 2)
+
+
+def test_cyclic_tridiagonal_solver():
+    n = 10
+    A = 4 * np.identity(n) - np.eye(n, k=1) - np.eye(n, k=-1)
+    A[0, -1], A[-1, 0] = 0.5, -1.5
+    ab = dense_to_banded(A, 1, 1)
+    ab[0, 0], ab[2, -1] = A[-1, 0], A[0, -1]
+    b = np.random.default_rng(0).standard_normal(n)
+    solver = CyclicTridiagonalSolver()
+    solver.set(ab, b)
+    assert_allclose(solver.solve(), np.linalg.solve(A, b))
+    with pytest.raises(ValueError):
+        solver.set(ab[:, :2], b[:2])
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.complex128])
+@pytest.mark.parametrize("solver", [BandedSolver, TridiagonalSolver])
+def test_dtypes(solver, dtype):
+    rng = np.random.default_rng(7)
+    A = random_banded(rng, 3, 10, 1, 1) + 4 * np.identity(10)
+    b = rng.standard_normal((3, 10))
+    if dtype == np.complex128:
+        A = A + 1j * random_banded(rng, 3, 10, 1, 1)
+        b = b + 1j * rng.standard_normal((3, 10))
+    A, b = A.astype(dtype), b.astype(dtype)
+    banded = solver()
+    banded.set(dense_to_banded(A, 1, 1), b)
+    x = banded.solve()
+    assert x.dtype == dtype
+    atol = 1e-4 if dtype == np.float32 else 1e-10
+    assert_allclose(np.einsum("bij,bj->bi", A, x), b, atol=atol)
+
+
+def test_complex_right_hand_side():
+    A = 4 * np.identity(6) - np.diag(np.ones(5), 1) - np.diag(np.ones(5), -1)
+    b = np.arange(6) * (1 + 2j)
+    solver = TridiagonalSolver()
+    solver.set(dense_to_banded(A, 1, 1), b)
+    assert_allclose(A @ solver.solve(), b, atol=1e-12)
+    cyclic = CyclicTridiagonalSolver()
+    cyclic.set(dense_to_banded(A, 1, 1), np.ones(6))
+    x = cyclic.solve(b)
+    assert x.dtype == np.complex128
+    assert_allclose(A @ x, b, atol=1e-12)
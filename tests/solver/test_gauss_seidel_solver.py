@@ -1,14 +1,16 @@
 import numpy as np
+import pytest
 from numpy.testing import assert_allclose
 
 from core.solver.gauss_seidel_solver import GuassSeidelSolver
+from core.solver.sparse import CSRMatrix, multicolor_ordering
 
 
 def test_solve_when_converge():
     A = [[-3, 1, 15, 44], [6, -2, 1, 5], [5, 10, 1, 28]]
     solver = GuassSeidelSolver()
-    # no relaxation
-    solver.set(A, tolerance=0.05)
+    # no relaxation. tolerance bounds the relative residual norm
+    solver.set(A, tolerance=0.01)
     solution = solver.solve()
     assert_allclose(
         np.matmul(
@@ -20,7 +22,7 @@ def test_solve_when_converge():
     )
 
     # relaxation 0.95
-    solver.set(A, relaxation=0.95, tolerance=0.05)
+    solver.set(A, relaxation=0.95, tolerance=0.01)
     solution = solver.solve()
     assert_allclose(
         np.matmul(
@@ -30,3 +32,137 @@ def test_solve_when_converge():
         np.array([44, 5, 28], dtype=float),
         rtol=0.05,
     )
+
+
+def poisson_2d(m):
+    """5-point stencil on an m x m grid as a dense matrix, to be converted
+    with `CSRMatrix.from_dense` for the sparse solves
+    """
+    n = m * m
+    A = np.zeros((n, n))
+    for i in range(m):
+        for j in range(m):
+            k = i * m + j
+            A[k, k] = 4
+            for di, dj in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                if 0 <= i + di < m and 0 <= j + dj < m:
+                    A[k, (i + di) * m + j + dj] = -1
+    return A
+
+
+@pytest.mark.parametrize("ordering", ["multicolor", "natural"])
+def test_solve_sparse(ordering):
+    A = poisson_2d(8)
+    x_true = np.random.default_rng(0).uniform(1, 2, 64)
+    b = A @ x_true
+    solver = GuassSeidelSolver(verbose=False)
+    solver.set_sparse(
+        CSRMatrix.from_dense(A), b, tolerance=1e-10, relaxation=1.5, ordering=ordering
+    )
+    assert_allclose(solver.solve(), x_true, rtol=1e-6)
+
+
+def test_solve_sparse_red_black():
+    A = CSRMatrix.from_dense(poisson_2d(6))
+    assert len(np.unique(multicolor_ordering(A))) == 2
+
+    grid = np.add.outer(np.arange(6), np.arange(6)).ravel()
+    solver = GuassSeidelSolver(verbose=False)
+    solver.set_sparse(A, np.ones(36), tolerance=1e-10, colors=grid % 2)
+    assert_allclose(A.matvec(solver.solve()), np.ones(36), rtol=1e-6)
+
+
+def _poisson_system(m, ordering="multicolor", **options):
+    A = poisson_2d(m)
+    b = np.random.default_rng(m).uniform(0, 1, m * m)
+    solver = GuassSeidelSolver(verbose=False)
+    solver.set_sparse(CSRMatrix.from_dense(A), b, ordering=ordering, **options)
+    return solver, A, b
+
+
+@pytest.mark.parametrize("ordering", ["multicolor", "natural"])
+def test_adaptive_relaxation(ordering):
+    solver, A, b = _poisson_system(16, ordering, tolerance=1e-8)
+    solver.solve()
+    baseline = solver.iterations
+
+    solver, A, b = _poisson_system(16, ordering, tolerance=1e-8, relaxation="auto")
+    x = solver.solve()
+    assert solver.converged
+    assert_allclose(A @ x, b, atol=1e-6)
+    assert solver.iterations * 5 < baseline
+
+
+@pytest.mark.parametrize("relaxation", [1, 1.5])
+def test_chebyshev_acceleration(relaxation):
+    solver, A, b = _poisson_system(12, "natural", tolerance=1e-8)
+    solver.solve()
+    baseline = solver.iterations
+
+    solver, A, b = _poisson_system(
+        12, "natural", tolerance=1e-8, relaxation=relaxation, acceleration="chebyshev"
+    )
+    x = solver.solve()
+    assert solver.converged
+    assert_allclose(A @ x, b, atol=1e-6)
+    assert solver.iterations * 4 < baseline
+
+
+def test_chebyshev_dense():
+    A = poisson_2d(3)
+    solver = GuassSeidelSolver()
+    solver.set(
+        np.column_stack([A, np.ones(9)]), tolerance=1e-10, acceleration="chebyshev"
+    )
+    assert_allclose(A @ solver.solve(), np.ones(9), atol=1e-8)
+
+
+def test_warm_start():
+    solver, A, b = _poisson_system(8, tolerance=1e-8)
+    x = solver.solve()
+    cold = solver.iterations
+    solver.solve(x0=x + 1e-6)
+    assert solver.iterations < cold / 2
+    solver.solve(x0=x)
+    assert solver.iterations == 0 and solver.converged
+
+
+def test_zero_solution_components():
+    # the old criterion max|1 - prev / curr| divided by the zero component
+    A = [[4, -1, 0, 4], [-1, 4, -1, 0], [0, -1, 4, -4]]
+    solver = GuassSeidelSolver()
+    solver.set(A, tolerance=1e-12)
+    assert_allclose(solver.solve(), [1, 0, -1], atol=1e-10)
+    assert solver.converged
+
+    solver.set([[2, 0, 0], [0, 3, 0]], tolerance=1e-12)
+    assert_allclose(solver.solve(), [0, 0])
+    assert solver.converged
+
+
+def test_max_iter():
+    solver, A, b = _poisson_system(8, tolerance=1e-12, max_iter=5)
+    solver.solve()
+    assert solver.iterations == 5
+    assert not solver.converged
+
+
+def test_invalid_options():
+    solver = GuassSeidelSolver()
+    with pytest.raises(ValueError):
+        solver.set([[2, 1]], acceleration="jacobi")
+    with pytest.raises(ValueError):
+        solver.set([[2, 1]], relaxation="auto", acceleration="chebyshev")
+
+
+@pytest.mark.parametrize("ordering", ["multicolor", "natural"])
+def test_solve_sparse_complex(ordering):
+    A = poisson_2d(5) * (1 + 0.5j)
+    x_true = np.random.default_rng(1).uniform(1, 2, 25) * (1 - 1j)
+    solver = GuassSeidelSolver(verbose=False)
+    solver.set_sparse(
+        CSRMatrix.from_dense(A), A @ x_true, tolerance=1e-10, ordering=ordering
+    )
+    x = solver.solve()
+    assert x.dtype == np.complex128
+    assert_allclose(x, x_true, rtol=1e-6)
@@ -1,7 +1,11 @@
+import numpy as np
 import pytest
 from numpy.testing import assert_allclose
 
-from core.solver.gaussian_elimination_solver import GaussianEliminationSolver
+from core.solver.gaussian_elimination_solver import (
+    BatchGaussianEliminationSolver,
+    GaussianEliminationSolver,
+)
 
 
 @pytest.fixture
@@ -60,3 +64,60 @@ def test_eliminate(eliminator):
         [[2.0, -6.0, -1.0, -38.0], [0.0, -10.0, 5.5, -91.0], [0.0, 0.0, -18.65, 37.3]],
         rtol=1e-6,
     )
+
+
+def test_substitute_separate_arrays(eliminator):
+    U = [[2.0, 1.0], [0.0, 4.0]]
+    L = [[2.0, 0.0], [1.0, 4.0]]
+    assert_allclose(eliminator.backward_substitute(U, [4.0, 8.0]), [1.0, 2.0])
+    assert_allclose(eliminator.forward_substitute(L, [2.0, 9.0]), [1.0, 2.0])
+
+
+def test_batch_solve():
+    rng = np.random.default_rng(0)
+    A = rng.standard_normal((200, 8, 9))
+    # second system is singular: two identical rows
+    A[1, 3] = A[1, 5]
+    # third system needs pivoting: zero on the leading diagonal
+    A[2, 0, 0] = 0.0
+    solver = BatchGaussianEliminationSolver(verbose=False)
+    solver.set(A)
+    x = solver.solve()
+
+    assert x.shape == (200, 8)
+    assert list(np.flatnonzero(solver.singular)) == [1]
+    assert np.all(np.isnan(x[1]))
+    regular = ~solver.singular
+    residual = np.einsum("bij,bj->bi", A[regular, :, :8], x[regular]) - A[regular, :, 8]
+    assert_allclose(residual, 0, atol=1e-9)
+
+
+def test_batch_solve_matches_single(eliminator):
+    A = [[2, -6, -1, -38], [-3, -1, 7, -34], [-8, 1, -2, -20]]
+    solver = BatchGaussianEliminationSolver()
+    solver.set([A, A])
+    assert_allclose(solver.solve(), [[4, 8.0, -2.0], [4, 8.0, -2.0]], rtol=1e-6)
+
+
+def test_set_copies_unless_overwrite_a():
+    A = np.array([[2, -6, -1, -38], [-3, -1, 7, -34], [-8, 1, -2, -20]], dtype=float)
+    original = A.copy()
+    solver = GaussianEliminationSolver()
+    solver.set(A)
+    x = solver.solve()
+    assert_allclose(A, original)
+
+    solver.set(A, overwrite_a=True)
+    assert solver.A is A
+    assert_allclose(solver.solve(), x)
+
+
+def test_batch_solve_complex():
+    rng = np.random.default_rng(6)
+    M = rng.standard_normal((4, 3, 3)) + 1j * rng.standard_normal((4, 3, 3))
+    b = rng.standard_normal((4, 3)) + 0j
+    solver = BatchGaussianEliminationSolver()
+    solver.set(np.concatenate([M, b[:, :, None]], axis=2).astype(np.complex64))
+    x = solver.solve()
+    assert x.dtype == np.complex64
+    assert_allclose(np.einsum("bij,bj->bi", M, x), b, atol=1e-4)
@@ -0,0 +1,177 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from core.factorization.lu import lu_factor
+from core.instrumentation import Metrics
+from core.solver.krylov import (
+    LinearOperator,
+    aslinearoperator,
+    bicgstab,
+    cg,
+    gmres,
+    ilu0,
+    ssor_preconditioner,
+)
+from core.solver.sparse import CSRMatrix
+
+
+def laplacian_2d(m):
+    """matrix-free 5-point stencil on an m x m grid"""
+
+    def matvec(x):
+        u = x.reshape(m, m)
+        y = 4 * u
+        y[1:] -= u[:-1]
+        y[:-1] -= u[1:]
+        y[:, 1:] -= u[:, :-1]
+        y[:, :-1] -= u[:, 1:]
+        return y.ravel()
+
+    return LinearOperator((m * m, m * m), matvec)
+
+
+def assemble(A):
+    return np.column_stack([A.matvec(e) for e in np.identity(A.shape[1])])
+
+
+def test_aslinearoperator():
+    A = np.array([[2, 1], [0, 3]], dtype=float)
+    assert_allclose(aslinearoperator(A) @ [1, 1], [3, 3])
+    assert_allclose(aslinearoperator(A).rmatvec([1, 1]), [2, 4])
+    assert_allclose(aslinearoperator(CSRMatrix.from_dense(A)).matvec([1, 1]), [3, 3])
+    operator = LinearOperator((2, 2), lambda x: x)
+    assert aslinearoperator(operator) is operator
+    with pytest.raises(ValueError):
+        operator.rmatvec([1, 1])
+
+
+@pytest.mark.parametrize("method", [cg, gmres, bicgstab])
+@pytest.mark.parametrize("preconditioner", [None, "ssor", "ilu0"])
+def test_poisson(method, preconditioner):
+    A = laplacian_2d(12)
+    dense = assemble(A)
+    x_true = np.random.default_rng(0).standard_normal(144)
+    M = {None: None, "ssor": ssor_preconditioner, "ilu0": ilu0}[preconditioner]
+    if M is not None:
+        M = M(dense)
+    metrics = Metrics()
+    x, converged = method(A, A @ x_true, tol=1e-10, M=M, metrics=metrics)
+    assert converged
+    assert_allclose(x, x_true, atol=1e-7)
+    assert metrics.counts["iterations"] > 0
+
+
+def test_preconditioners_reduce_iterations():
+    A = laplacian_2d(16)
+    b = np.ones(256)
+    counts = []
+    for M in [None, ssor_preconditioner(assemble(A)), ilu0(assemble(A))]:
+        metrics = Metrics()
+        cg(A, b, M=M, metrics=metrics)
+        counts.append(metrics.counts["iterations"])
+    assert counts[1] < counts[0] and counts[2] < counts[0]
+
+
+@pytest.mark.parametrize("method", [gmres, bicgstab])
+def test_nonsymmetric(method):
+    rng = np.random.default_rng(1)
+    A = 10 * np.identity(50) + rng.standard_normal((50, 50))
+    b = rng.standard_normal(50)
+    x, converged = method(A, b, tol=1e-10, x0=np.ones(50))
+    assert converged
+    assert_allclose(A @ x, b, atol=1e-8)
+
+
+def test_gmres_restart_max_iter():
+    A = assemble(laplacian_2d(10))
+    x, converged = gmres(A, np.ones(100), restart=5, max_iter=3)
+    assert not converged
+
+
+def test_ilu0_without_fill_is_exact():
+    # a tridiagonal matrix has no fill-in, so ILU(0) equals LU
+    A = 4 * np.identity(6) - np.diag(np.ones(5), 1) - np.diag(np.ones(5), -1)
+    lu, perm = lu_factor(A, pivot=False)
+    assert_allclose(ilu0(A).csr.todense(), lu)
+    assert_allclose(A @ ilu0(CSRMatrix.from_dense(A)).solve(np.ones(6)), 1)
+    with pytest.raises(ValueError):
+        ilu0(np.array([[0, 1], [1, 0]]))
+
+
+def test_ilu0_sparse():
+    # L * U matches A on its nonzero pattern, and only there
+    A = CSRMatrix.from_dense(assemble(laplacian_2d(10)))
+    factorization = ilu0(A)
+    assert factorization.csr.nnz == A.nnz
+    packed = factorization.csr.todense()
+    L = np.tril(packed, -1) + np.identity(100)
+    U = np.triu(packed)
+    pattern = A.todense() != 0
+    assert_allclose((L @ U)[pattern], A.todense()[pattern], atol=1e-12)
+    B = np.ones((100, 2))
+    assert_allclose(L @ U @ factorization.solve(B), B, atol=1e-12)
+
+
+def test_ilu0_unsorted_duplicates():
+    # rows with unsorted column indices and a diagonal stored in two parts
+    A = CSRMatrix([-1, 2, 2, 4, -1, 4], [1, 0, 0, 1, 0, 1], [0, 3, 6], (2, 2))
+    dense = np.array([[4.0, -1.0], [-1.0, 8.0]])
+    assert_allclose(A.canonical().todense(), dense)
+    assert_allclose(dense @ ilu0(A).solve([1, 2]), [1, 2])
+
+
+def tridiagonal(n, diagonal, off_diagonal):
+    return (
+        diagonal * np.identity(n)
+        + off_diagonal * np.diag(np.ones(n - 1), 1)
+        + np.conj(off_diagonal) * np.diag(np.ones(n - 1), -1)
+    )
+
+
+@pytest.mark.parametrize("method", [cg, gmres, bicgstab])
+@pytest.mark.parametrize("preconditioner", [None, "ssor", "ilu0"])
+def test_complex(method, preconditioner):
+    # hermitian positive definite, so cg applies as well
+    A = tridiagonal(6, 4, 1 + 1j)
+    b = np.arange(6) + 1j
+    M = {None: None, "ssor": ssor_preconditioner, "ilu0": ilu0}[preconditioner]
+    if M is not None:
+        M = M(A)
+    x, converged = method(CSRMatrix.from_dense(A), b, tol=1e-10, M=M)
+    assert converged
+    assert x.dtype == np.complex128
+    assert_allclose(A @ x, b, atol=1e-8)
+
+
+def test_complex_right_hand_side():
+    A = laplacian_2d(4)
+    x_true = np.arange(16) * (1 - 2j)
+    x, converged = gmres(A, A @ x_true, tol=1e-10)
+    assert converged and x.dtype == np.complex128
+    assert_allclose(x, x_true, atol=1e-8)
+
+
+@pytest.mark.parametrize("method", [cg, gmres, bicgstab])
+def test_float32(method):
+    A = tridiagonal(20, 4, -1).astype(np.float32)
+    b = np.ones(20, dtype=np.float32)
+    x, converged = method(A, b, tol=1e-5, M=ilu0(A))
+    assert converged
+    assert x.dtype == np.float32
+    assert_allclose(A @ x, b, atol=1e-4)
+
+
+@pytest.mark.parametrize(
+    "A, b",
+    [
+        # r_hat @ v vanishes in the first iteration
+        ([[0.0, 1.0], [1.0, 0.0]], [1.0, 0.0]),
+        # t @ t vanishes, s is in the null space of A
+        ([[1.0, 1.0], [0.0, 0.0]], [1.0, 1.0]),
+    ],
+)
+def test_bicgstab_breakdown(A, b):
+    x, converged = bicgstab(A, b)
+    assert not converged
+    assert np.all(np.isfinite(x))
@@ -17,3 +17,75 @@ def test_matrix_inv_lu():
     A = [[7, 2, -3], [2, 5, -3], [1, -1, -6]]
     inv = matrix_inv_lu(A)
     assert_allclose(np.matmul(np.array(A, dtype=float), inv), np.identity(3), atol=1e-6)
+
+
+def test_solve_multiple_rhs():
+    A = [[7, 2, -3, 1], [2, 5, -3, 0], [1, -1, -6, 0]]
+    solver = LUDecompositionSolver()
+    solver.set(A)
+    solver.solve()
+    B = np.array([[1, 2], [3, 4], [5, 6]], dtype=float)
+    X = solver.solve(B)
+    assert_allclose(np.matmul(np.array(A, dtype=float)[:, :3], X), B, atol=1e-6)
+
+
+def test_solve_mixed_precision():
+    rng = np.random.default_rng(0)
+    A = rng.standard_normal((100, 100))
+    x = rng.standard_normal(100)
+    solver = LUDecompositionSolver(mixed_precision=True)
+    solver.set(np.column_stack([A, A @ x]))
+    assert_allclose(solver.solve(), x, rtol=1e-10)
+    assert solver.factorization.lu.dtype == np.float32
+    assert solver.refinement_iterations > 0
+    assert not solver.fallback
+
+
+def test_solve_mixed_precision_fallback():
+    # condition number 1e10 is too large for a float32 factorization
+    rng = np.random.default_rng(0)
+    U, _ = np.linalg.qr(rng.standard_normal((50, 50)))
+    V, _ = np.linalg.qr(rng.standard_normal((50, 50)))
+    A = (U * np.logspace(0, -10, 50)) @ V.T
+    b = rng.standard_normal(50)
+    solver = LUDecompositionSolver(mixed_precision=True)
+    solver.set(np.column_stack([A, b]))
+    x = solver.solve()
+    assert solver.fallback
+    assert solver.factorization.lu.dtype == np.float64
+    assert_allclose(A @ x, b, atol=1e-6)
+
+
+def test_set_without_copy():
+    A = np.array([[7, 2, -3, 1], [2, 5, -3, 0], [1, -1, -6, 0]], dtype=float)
+    original = A.copy()
+    solver = LUDecompositionSolver()
+    solver.set(A)
+    assert solver.A is A
+    x = solver.solve()
+    assert_allclose(A, original)
+
+    solver.set(A, overwrite_a=True)
+    assert_allclose(solver.solve(), x)
+    assert np.shares_memory(solver.factorization.lu, A)
+
+
+def test_solve_complex_mixed_precision():
+    rng = np.random.default_rng(7)
+    M = rng.standard_normal((10, 10)) + 1j * rng.standard_normal((10, 10))
+    M += 10 * np.identity(10)
+    b = rng.standard_normal(10) + 1j * rng.standard_normal(10)
+    solver = LUDecompositionSolver(mixed_precision=True)
+    solver.set(np.column_stack([M, b]))
+    x = solver.solve()
+    assert solver.factorization.lu.dtype == np.complex64
+    assert x.dtype == np.complex128
+    assert_allclose(M @ x, b, atol=1e-12)
+
+
+def test_matrix_inv_lu_keeps_dtype():
+    A = np.array([[7, 2, -3], [2, 5, -3], [1, -1, -6]])
+    for B, atol in [(A.astype(np.float32), 1e-5), (A * (1 + 2j), 1e-12)]:
+        inv = matrix_inv_lu(B)
+        assert inv.dtype == B.dtype
+        assert_allclose(B @ inv, np.identity(3), atol=atol)
@@ -0,0 +1,33 @@
+import numpy as np
+from numpy.testing import assert_allclose
+
+from core.solver.sparse import CSRMatrix, multicolor_ordering, split_by_color
+
+
+def test_csr_from_dense():
+    A = np.array([[4, 0, 1], [0, 3, 0], [2, 0, 5]], dtype=float)
+    csr = CSRMatrix.from_dense(A)
+    assert csr.nnz == 5
+    assert_allclose(csr.indptr, [0, 2, 3, 5])
+    assert_allclose(csr.diagonal(), [4, 3, 5])
+    assert_allclose(csr.matvec([1, 2, 3]), A @ [1, 2, 3])
+    assert_allclose(csr.todense(), A)
+
+
+def test_csr_from_any_duck_typed():
+    A = np.array([[1, 2], [0, 3]], dtype=float)
+    other = CSRMatrix.from_dense(A)
+    assert CSRMatrix.from_any(other) is other
+    assert_allclose(CSRMatrix.from_any(A).todense(), A)
+
+
+def test_multicolor_ordering():
+    A = CSRMatrix.from_dense(
+        np.identity(5) * 2 + np.diag(np.ones(4), 1) + np.diag(np.ones(4), -1)
+    )
+    colors = multicolor_ordering(A)
+    assert_allclose(colors, [0, 1, 0, 1, 0])
+    rows, local_rows, indices, data = split_by_color(A, colors)[1]
+    assert_allclose(rows, [1, 3])
+    assert_allclose(local_rows, [0, 0, 0, 1, 1, 1])
+    assert_allclose(indices, [0, 1, 2, 2, 3, 4])
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from core.arrays import as_array, solve_dtype, working_dtype, writable_array
+
+
+@pytest.mark.parametrize(
+    "dtype, expected",
+    [
+        (np.int64, np.float64),
+        (bool, np.float64),
+        (np.float16, np.float32),
+        (np.float32, np.float32),
+        (np.float64, np.float64),
+        (np.complex64, np.complex64),
+        (np.complex128, np.complex128),
+    ],
+)
+def test_working_dtype(dtype, expected):
+    assert working_dtype(np.zeros(2, dtype=dtype)) == expected
+
+
+def test_working_dtype_promotes():
+    assert working_dtype(np.zeros(2, np.float32), np.zeros(2)) == np.float64
+    assert working_dtype(np.zeros(2, np.float32), [1j]) == np.complex128
+    assert working_dtype([[1, 2], [3, 4]]) == np.float64
+    assert solve_dtype(np.float32, np.zeros(2)) == np.float32
+    assert solve_dtype(np.float32, [1j]) == np.complex64
+    assert solve_dtype(np.complex128, np.zeros(2)) == np.complex128
+
+
+def test_as_array_zero_copy():
+    A = np.asfortranarray(np.ones((3, 3), dtype=np.float32))
+    assert as_array(A) is A
+    buffer = memoryview(np.arange(4.0))
+    assert np.shares_memory(as_array(buffer), np.asarray(buffer))
+    assert as_array([1, 2]).dtype == np.float64
+
+
+def test_writable_array():
+    A = np.ones((3, 3), dtype=np.complex64)
+    copy = writable_array(A)
+    assert copy is not A and copy.dtype == np.complex64
+    assert writable_array(A, overwrite_a=True) is A
+    assert writable_array(A, np.complex128, overwrite_a=True) is not A
+
+    A.flags.writeable = False
+    assert writable_array(A, overwrite_a=True) is not A
+
+    rows = [[1.0, 2.0], [3.0, 4.0]]
+    assert writable_array(rows).flags.writeable
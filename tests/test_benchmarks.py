@@ -0,0 +1,46 @@
+import json
+
+from benchmarks.run import compare, main
+
+
+def test_run_and_compare_to_baseline(tmp_path, capsys):
+    output = tmp_path / "bench.json"
+    argv = ["--sizes", "4", "8", "--structures", "spd", "--repeat", "1"]
+    argv += ["--only", "LUDecompositionSolver", "newton"]
+    assert main(argv + ["--output", str(output)]) == 0
+    stored = json.loads(output.read_text())
+    assert set(stored["meta"]) == {"python", "numpy", "platform", "timestamp"}
+    results = stored["results"]
+    assert {(r["name"], r["n"]) for r in results} == {
+        ("LUDecompositionSolver", 4),
+        ("LUDecompositionSolver", 8),
+        ("newton", 4),
+        ("newton", 8),
+    }
+    assert all(r["time"] > 0 and r["peak_memory"] >= 0 for r in results)
+
+    # a baseline far faster than any run flags every matching result
+    for r in results:
+        r["time"] /= 1e6
+    fast = tmp_path / "fast.json"
+    fast.write_text(json.dumps(stored))
+    assert main(argv + ["--baseline", str(fast)]) == 1
+    assert capsys.readouterr().out.count("REGRESSION") == 4
+
+    # a baseline far slower than any run flags nothing
+    for r in results:
+        r["time"] *= 1e12
+    slow = tmp_path / "slow.json"
+    slow.write_text(json.dumps(stored))
+    assert main(argv + ["--baseline", str(slow)]) == 0
+    assert "REGRESSION" not in capsys.readouterr().out
+
+
+def test_compare():
+    result = {"name": "lu", "n": 8, "dtype": "float64", "structure": "spd"}
+    baseline = [dict(result, time=1.0), dict(result, n=16, time=1.0)]
+    assert compare([dict(result, time=1.1)], baseline, threshold=0.2) == []
+    (regression,) = compare([dict(result, time=1.5)], baseline, threshold=0.2)
+    assert regression["baseline_time"] == 1.0 and regression["ratio"] == 1.5
+    # results without a baseline are never flagged
+    assert compare([dict(result, n=32, time=9.0)], baseline) == []
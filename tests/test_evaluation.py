@@ -0,0 +1,54 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.evaluation import evaluate
+from core.optimization.cache import CachedFunction
+from core.optimization.parabolic import parabolic
+from core.root.newton import newton
+
+
+def test_evaluate_sequential():
+    assert evaluate([(abs, -1), (str, 2)]) == [1, "2"]
+    assert evaluate([]) == []
+
+
+def test_evaluate_executor_runs_concurrently():
+    # both calls must be running at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    def f(x):
+        barrier.wait()
+        return x + 1
+
+    with ThreadPoolExecutor(2) as executor:
+        assert evaluate([(f, 1), (f, 2)], executor) == [2, 3]
+
+
+def test_evaluate_async():
+    async def f(x):
+        await asyncio.sleep(0)
+        return x * 2
+
+    assert evaluate([(f, 1), (abs, -3)]) == [2, 3]
+
+
+def test_cached_function_map():
+    f = CachedFunction(lambda x: x * x)
+    with ThreadPoolExecutor(2) as executor:
+        assert f.map([1, 2, 1], executor) == [1, 4, 1]
+    assert f.map([2, 3]) == [4, 9]
+    assert (f.hits, f.misses) == (1, 3)
+
+
+def test_optimizers_with_executor():
+    async def g(x):
+        return 2 * x - 2
+
+    async def h(x):
+        return (x - 1) ** 2
+
+    assert abs(newton(h, g, 0) - 1) < 1e-6
+    with ThreadPoolExecutor(3) as executor:
+        x = parabolic(lambda x: -((x - 2) ** 2), 0, 1, 4, executor=executor)
+    assert abs(x - 2) < 1e-6
@@ -0,0 +1,66 @@
+import numpy as np
+from numpy.testing import assert_allclose
+
+from core.factorization.lu import LUFactorization
+from core.instrumentation import Metrics, phase
+from core.root.newton import newton
+from core.solver.bairstow_solver import BairstowSolver
+from core.solver.gauss_seidel_solver import GuassSeidelSolver
+from core.solver.gaussian_elimination_solver import GaussianEliminationSolver
+
+
+def test_metrics_collects_and_emits():
+    events = []
+    metrics = Metrics(callbacks=[lambda event, data: events.append((event, data))])
+    with phase(metrics, "work"):
+        metrics.count("iterations")
+        metrics.count("iterations", 2)
+        metrics.record("residual", 0.5)
+
+    assert metrics.counts["iterations"] == 3
+    assert metrics.values["residual"] == [0.5]
+    assert metrics.timings["work"] >= 0
+    assert [event for event, _ in events] == ["count", "count", "record", "phase"]
+    assert set(metrics.summary()) == {"timings", "counts", "values"}
+
+    metrics.reset()
+    assert metrics.summary() == {"timings": {}, "counts": {}, "values": {}}
+
+
+def test_phase_without_metrics():
+    with phase(None, "work"):
+        pass
+
+
+def test_solver_metrics():
+    metrics = Metrics()
+    A = [[2, -6, -1, -38], [-3, -1, 7, -34], [-8, 1, -2, -20]]
+    solver = GaussianEliminationSolver(metrics=metrics)
+    solver.set(A)
+    assert_allclose(solver.solve(), [4, 8, -2], rtol=1e-6)
+    assert {"eliminate", "substitute"} <= set(metrics.timings)
+    assert metrics.values["pivot_growth"][0] >= 1
+
+    solver = GuassSeidelSolver(metrics=metrics)
+    solver.set([[-3, 1, 15, 44], [6, -2, 1, 5], [5, 10, 1, 28]])
+    solver.solve()
+    assert metrics.counts["iterations"] == len(metrics.values["residual"]) > 0
+
+
+def test_factorization_and_root_metrics(capsys):
+    metrics = Metrics()
+    LUFactorization(np.identity(3) * 2, metrics=metrics).solve(np.ones(3))
+    assert {"factorize", "solve"} <= set(metrics.timings)
+
+    metrics = Metrics()
+    newton(lambda x: x**2 - 2, lambda x: 2 * x, 1.0, metrics=metrics)
+    assert metrics.counts["iterations"] > 0
+
+    metrics = Metrics()
+    roots = BairstowSolver(1e-6, 1e-6, metrics=metrics).solve(
+        [4, -10, 10, -5, 1], r=0.5, s=-0.5
+    )
+    assert len(roots) == 4
+    assert metrics.counts["iterations"] > 0
+    # quiet unless verbose
+    assert capsys.readouterr().out == ""